@@ -1,23 +1,40 @@
 #!/usr/bin/env python3
 import json
 
+RULE_VERSION = 2
+
+def proper_case_word(word):
+    # Parenthesised words are acronyms such as "(eCRF)", which capitalize() would lower
+    if word.startswith('(') and word.endswith(')'):
+        return word
+    return word.capitalize()
+
 def proper_case(text):
-    """Convert text to proper case (capitalize first letter of each word)"""
+    """Convert text to proper case (capitalize first letter of each word, keeping
+    parenthesised acronyms as they are)"""
     if not text:
         return text
-    return ' '.join(word.capitalize() for word in text.split())
-
-# Read the JSON file
-with open('eua-tagged-files.json', 'r') as f:
-    data = json.load(f)
+    return ' '.join(proper_case_word(word) for word in text.split())
 
-# Update all documentType values to proper case
-for document in data['documents']:
+def proper_case_document_type(document):
+    """Convert one document's documentType to proper case"""
     if 'documentType' in document and document['documentType']:
         document['documentType'] = proper_case(document['documentType'])
 
-# Write the updated data back to the file
-with open('eua-tagged-files.json', 'w') as f:
-    json.dump(data, f, indent=2)
+def main():
+    # Read the JSON file
+    with open('eua-tagged-files.json', 'r') as f:
+        data = json.load(f)
+    
+    # Update all documentType values to proper case
+    for document in data['documents']:
+        proper_case_document_type(document)
+    
+    # Write the updated data back to the file
+    with open('eua-tagged-files.json', 'w') as f:
+        json.dump(data, f, indent=2)
+    
+    print("Successfully updated all documentType values to proper case")
 
-print("Successfully updated all documentType values to proper case")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,94 +1,109 @@
 #!/usr/bin/env python3
 import json
-import re
+import sys
+from pathlib import Path
 
-def extract_vaccine_candidates(text):
-    """Extract vaccine candidates from text, return as list"""
-    candidates = []
-    
-    # Define patterns for each vaccine candidate
-    patterns = {
-        'BNT162b2': r'BNT162[Bb]2',
-        'BNT162b1': r'BNT162[Bb]1',
-        'BNT162a1': r'BNT162[Aa]1',
-        'BNT162b3c': r'BNT162[Bb]3[Cc]',
-        'BNT162c2': r'BNT162[Cc]2'
-    }
-    
-    for candidate, pattern in patterns.items():
-        if re.search(pattern, text, re.IGNORECASE):
-            candidates.append(candidate)
+# The shared entity extractor lives in _scripts/
+sys.path.append(str(Path(__file__).resolve().parent.parent / '_scripts'))
+
+from entity_extractor import extract_document_entities
+
+RULE_VERSION = 1
+
+# Candidates this script reports, in output order (COMIRNATY and BNT162b3 are not split out here)
+SPLIT_CANDIDATES = ['BNT162b2', 'BNT162b1', 'BNT162a1', 'BNT162b3c', 'BNT162c2']
+
+def extract_vaccine_candidates(entities):
+    """Extract vaccine candidates from scanned entities, return as list"""
+    found = {e.rule for e in entities if e.kind == 'vaccine'}
+    candidates = [candidate for candidate in SPLIT_CANDIDATES if candidate.lower() in found]
     
     return candidates if candidates else None
 
-def extract_clinical_trial(text):
-    """Extract clinical trial from text"""
+def extract_clinical_trial(entities):
+    """Extract clinical trial from scanned entities"""
+    # Trial IDs are matched case-sensitively here, as they appear in the EUA filenames
+    texts = {e.text for e in entities if e.kind == 'trial'}
+    
     # Check for clinical trials
-    if 'C4591001' in text:
+    if 'C4591001' in texts:
         return 'C4591001'
-    elif 'C4591011' in text:
+    elif 'C4591011' in texts:
         return 'C4591011'
-    elif re.search(r'BNT162-01|bnt162-01', text):
+    elif 'BNT162-01' in texts or 'bnt162-01' in texts:
         return 'BNT162-01'
     
     return None
 
-# Read the JSON file
-with open('eua-tagged-files.json', 'r') as f:
-    data = json.load(f)
-
-# Statistics
-vaccine_stats = {}
-trial_stats = {}
-multi_vaccine_count = 0
-
-# Process each document
-for document in data['documents']:
-    # Combine filename, title, and tags for searching
-    search_text = document['filename'] + ' ' + document.get('title', '') + ' ' + ' '.join(document.get('tags', []))
+def split_document_fields(document):
+    """Set vaccineCandidate and clinicalTrial on one document from its filename, title, and tags"""
+    # Scan filename, title, and tags once
+    scanned = extract_document_entities(document)
+    entities = scanned['filename'] + scanned['title'] + scanned['tags']
     
     # Extract vaccine candidates (can be multiple)
-    vaccine_candidates = extract_vaccine_candidates(search_text)
+    document['vaccineCandidate'] = extract_vaccine_candidates(entities)
     
     # Extract clinical trial (single value)
-    clinical_trial = extract_clinical_trial(search_text)
+    document['clinicalTrial'] = extract_clinical_trial(entities)
+
+def update_statistics(data):
+    """Recompute the vaccine candidate and clinical trial statistics for the whole file"""
+    vaccine_stats = {}
+    trial_stats = {}
+    multi_vaccine_count = 0
     
-    # Update document
-    document['vaccineCandidate'] = vaccine_candidates
-    document['clinicalTrial'] = clinical_trial
+    for document in data['documents']:
+        vaccine_candidates = document.get('vaccineCandidate')
+        clinical_trial = document.get('clinicalTrial')
+        
+        if vaccine_candidates:
+            if len(vaccine_candidates) > 1:
+                multi_vaccine_count += 1
+            for candidate in vaccine_candidates:
+                vaccine_stats[candidate] = vaccine_stats.get(candidate, 0) + 1
+        else:
+            vaccine_stats['None'] = vaccine_stats.get('None', 0) + 1
+        
+        if clinical_trial:
+            trial_stats[clinical_trial] = trial_stats.get(clinical_trial, 0) + 1
+        else:
+            trial_stats['None'] = trial_stats.get('None', 0) + 1
     
-    # Update statistics
-    if vaccine_candidates:
-        if len(vaccine_candidates) > 1:
-            multi_vaccine_count += 1
-        for candidate in vaccine_candidates:
-            vaccine_stats[candidate] = vaccine_stats.get(candidate, 0) + 1
-    else:
-        vaccine_stats['None'] = vaccine_stats.get('None', 0) + 1
+    # Update statistics in the data
+    if 'statistics' not in data:
+        data['statistics'] = {}
     
-    if clinical_trial:
-        trial_stats[clinical_trial] = trial_stats.get(clinical_trial, 0) + 1
-    else:
-        trial_stats['None'] = trial_stats.get('None', 0) + 1
-
-# Update statistics in the data
-if 'statistics' not in data:
-    data['statistics'] = {}
-
-data['statistics']['byVaccineCandidate'] = vaccine_stats
-data['statistics']['byClinicalTrial'] = trial_stats
-
-# Write the updated data back to the file
-with open('eua-tagged-files.json', 'w') as f:
-    json.dump(data, f, indent=2)
-
-print("Successfully split vaccine candidate and clinical trial fields")
-print(f"\nVaccine Candidate distribution:")
-for candidate, count in sorted(vaccine_stats.items()):
-    print(f"  {candidate}: {count} documents")
+    data['statistics']['byVaccineCandidate'] = vaccine_stats
+    data['statistics']['byClinicalTrial'] = trial_stats
+    
+    return multi_vaccine_count
 
-print(f"\nClinical Trial distribution:")
-for trial, count in sorted(trial_stats.items()):
-    print(f"  {trial}: {count} documents")
+def main():
+    # Read the JSON file
+    with open('eua-tagged-files.json', 'r') as f:
+        data = json.load(f)
+    
+    # Process each document
+    for document in data['documents']:
+        split_document_fields(document)
+    
+    multi_vaccine_count = update_statistics(data)
+    
+    # Write the updated data back to the file
+    with open('eua-tagged-files.json', 'w') as f:
+        json.dump(data, f, indent=2)
+    
+    print("Successfully split vaccine candidate and clinical trial fields")
+    print(f"\nVaccine Candidate distribution:")
+    for candidate, count in sorted(data['statistics']['byVaccineCandidate'].items()):
+        print(f"  {candidate}: {count} documents")
+    
+    print(f"\nClinical Trial distribution:")
+    for trial, count in sorted(data['statistics']['byClinicalTrial'].items()):
+        print(f"  {trial}: {count} documents")
+    
+    print(f"\nDocuments with multiple vaccine candidates: {multi_vaccine_count}")
 
-print(f"\nDocuments with multiple vaccine candidates: {multi_vaccine_count}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
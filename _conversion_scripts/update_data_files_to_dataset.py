@@ -1,43 +1,55 @@
 #!/usr/bin/env python3
 import json
 
-# Read the JSON file
-with open('eua-tagged-files.json', 'r') as f:
-    data = json.load(f)
+RULE_VERSION = 1
 
-# Counter for updated files
-updated_count = 0
-file_types_updated = {'XPT': 0, 'JMP': 0}
-
-# Update documentType for all XPT and JMP files
-for document in data['documents']:
+def set_dataset_document_type(document):
+    """Set documentType to 'Dataset' for XPT and JMP files. Returns the old type if updated."""
     if document['fileType'] in ['XPT', 'JMP']:
         old_type = document['documentType']
         document['documentType'] = 'Dataset'
-        updated_count += 1
-        file_types_updated[document['fileType']] += 1
-        print(f"Updated: {document['filename']} from '{old_type}' to 'Dataset'")
+        return old_type
+    return None
 
-# Write the updated data back to the file
-with open('eua-tagged-files.json', 'w') as f:
-    json.dump(data, f, indent=2)
+def update_document_type_statistics(data):
+    """Recalculate document type statistics if they exist"""
+    if 'summary' in data and 'statistics' in data['summary']:
+        stats = data['summary']['statistics']
+        if 'byDocumentType' in stats:
+            doc_type_counts = {}
+            for document in data['documents']:
+                doc_type = document.get('documentType', 'Unknown')
+                doc_type_counts[doc_type] = doc_type_counts.get(doc_type, 0) + 1
+            
+            stats['byDocumentType'] = doc_type_counts
 
-# Update statistics if they exist
-if 'summary' in data and 'statistics' in data['summary']:
-    stats = data['summary']['statistics']
-    if 'byDocumentType' in stats:
-        # Recalculate document type statistics
-        doc_type_counts = {}
-        for document in data['documents']:
-            doc_type = document.get('documentType', 'Unknown')
-            doc_type_counts[doc_type] = doc_type_counts.get(doc_type, 0) + 1
-        
-        stats['byDocumentType'] = doc_type_counts
-        
-        # Write updated statistics
-        with open('eua-tagged-files.json', 'w') as f:
-            json.dump(data, f, indent=2)
+def main():
+    # Read the JSON file
+    with open('eua-tagged-files.json', 'r') as f:
+        data = json.load(f)
+    
+    # Counter for updated files
+    updated_count = 0
+    file_types_updated = {'XPT': 0, 'JMP': 0}
+    
+    # Update documentType for all XPT and JMP files
+    for document in data['documents']:
+        old_type = set_dataset_document_type(document)
+        if old_type is not None:
+            updated_count += 1
+            file_types_updated[document['fileType']] += 1
+            print(f"Updated: {document['filename']} from '{old_type}' to 'Dataset'")
+    
+    # Update statistics if they exist
+    update_document_type_statistics(data)
+    
+    # Write the updated data back to the file
+    with open('eua-tagged-files.json', 'w') as f:
+        json.dump(data, f, indent=2)
+    
+    print(f"\nSuccessfully updated {updated_count} files to documentType: 'Dataset'")
+    print(f"  - XPT files: {file_types_updated['XPT']}")
+    print(f"  - JMP files: {file_types_updated['JMP']}")
 
-print(f"\nSuccessfully updated {updated_count} files to documentType: 'Dataset'")
-print(f"  - XPT files: {file_types_updated['XPT']}")
-print(f"  - JMP files: {file_types_updated['JMP']}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark the one-scan entity extractor against one regex search per pattern.
+
+The per-pattern baseline mirrors how the enrichment scripts used to work:
+every field was searched separately for each vaccine candidate, trial ID and
+CRF pattern. Both approaches run over the filename, title and tags of every
+document in the tagged-files corpora.
+
+Usage (from the repository root):
+    python _scripts/benchmark_entity_extractor.py
+    python _scripts/benchmark_entity_extractor.py --repeat 10 moderna-tagged-files.json
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+
+from entity_extractor import extract_entities
+
+DEFAULT_CORPORA = [
+    'pd-bla-tagged-files.json',
+    'pfizer-eua-tagged-files.json',
+    'moderna-tagged-files.json',
+]
+
+# One entry per pattern the scripts searched for individually
+LEGACY_PATTERNS = [
+    ('vaccine', re.compile(r'bnt162b3c', re.IGNORECASE)),
+    ('vaccine', re.compile(r'bnt162b3(?!c)', re.IGNORECASE)),
+    ('vaccine', re.compile(r'(?:bnt162b2|comirnaty)', re.IGNORECASE)),
+    ('vaccine', re.compile(r'bnt162b1', re.IGNORECASE)),
+    ('vaccine', re.compile(r'bnt162a1', re.IGNORECASE)),
+    ('vaccine', re.compile(r'bnt162c2', re.IGNORECASE)),
+    ('trial', re.compile(r'bnt162-01', re.IGNORECASE)),
+    ('trial', re.compile(r'c4591(\d{3})', re.IGNORECASE)),
+    ('site', re.compile(r'CRF_mrna-(\d+)-p\d+-us(\d+)\.pdf')),
+    ('site', re.compile(r'CRF_c4591001-(\d{4})-(\d{4})(\d+)\.pdf')),
+    ('site', re.compile(r'CRFs-for-site-(\d+)\.pdf')),
+]
+
+def load_texts(json_files):
+    """Every filename, title and tag in the given corpora"""
+    texts = []
+    for json_file in json_files:
+        if not os.path.exists(json_file):
+            print(f"File not found: {json_file}")
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for doc in data['documents']:
+            texts.append(doc.get('filename') or '')
+            texts.append(doc.get('title') or '')
+            texts.extend(doc.get('tags') or [])
+    return texts
+
+def scan_per_pattern(texts):
+    """Baseline: one search per pattern per text"""
+    counts = Counter()
+    for text in texts:
+        for kind, pattern in LEGACY_PATTERNS:
+            if pattern.search(text):
+                counts[kind] += 1
+    return counts
+
+def scan_once(texts):
+    """One combined scan per text"""
+    counts = Counter()
+    for text in texts:
+        for entity in extract_entities(text):
+            if entity.kind != 'subject':
+                counts[entity.kind] += 1
+    return counts
+
+def best_time(function, texts, repeat):
+    """Fastest of several runs, plus the result of the last run"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(texts)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the one-scan entity extractor")
+    parser.add_argument('corpora', nargs='*', default=DEFAULT_CORPORA, help="Corpus JSON files (default: all)")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per approach; the fastest is reported")
+    args = parser.parse_args()
+
+    texts = load_texts(args.corpora)
+    print(f"Scanning {len(texts)} text fields ({sum(len(t) for t in texts):,} characters), best of {args.repeat}")
+    print("-" * 50)
+
+    legacy_time, legacy_counts = best_time(scan_per_pattern, texts, args.repeat)
+    single_time, single_counts = best_time(scan_once, texts, args.repeat)
+
+    print(f"  {'per-pattern searches':<24} {legacy_time:7.3f}s  ({len(LEGACY_PATTERNS)} patterns)")
+    print(f"  {'one-scan extractor':<24} {single_time:7.3f}s")
+    if single_time:
+        print(f"  Speedup: {legacy_time / single_time:.2f}x")
+
+    # Counts differ where one text holds several entities of a kind (the
+    # baseline counts patterns that matched, the extractor counts every match)
+    print(f"\n  {'kind':<10} {'per-pattern':>12} {'one-scan':>12}")
+    for kind in ('vaccine', 'trial', 'site'):
+        print(f"  {kind:<10} {legacy_counts[kind]:>12} {single_counts[kind]:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Inverted bitmap index for navigator filtering.
+
+For every filter value of every facet (see facet_counts.py) and every tag,
+the index holds a compressed bitmap of the document ordinals (positions in
+the corpus' documents array) that the page's filter keeps. The page then
+filters with bitwise ANDs instead of a .filter() pass per active filter.
+
+Bitmaps are roaring-style: ordinals are split into chunks of 65536 by their
+high 16 bits, and each chunk is stored as whichever container is smallest:
+- array  (type 0): n sorted uint16 low bits
+- bitmap (type 1): n uint32 words, bit i of word w = low bits 32*w + i
+- run    (type 2): n (uint16 start, uint16 length - 1) pairs
+Each container is a header (uint16 high bits, uint8 type, uint16 n) followed
+by its payload, all little-endian; the containers are concatenated and the
+bytes base64-encoded.
+
+The index goes in <corpus>.bitmaps.json, written by
+build_compact_navigator_data.py next to the compact data file. Its "source"
+must match the compact file's for the page to use it.
+"""
+
+import base64
+import struct
+
+from facet_counts import facet_rules, navigator_row
+
+INDEX_FORMAT = 'tagged-files-bitmaps'
+INDEX_VERSION = 1
+
+ARRAY, BITMAP, RUN = 0, 1, 2
+_HEADER = struct.Struct('<HBH')
+
+
+def _runs(lows):
+    runs = []
+    for low in lows:
+        if runs and runs[-1][0] + runs[-1][1] + 1 == low:
+            runs[-1][1] += 1
+        else:
+            runs.append([low, 0])
+    return runs
+
+
+def _container(high, lows):
+    """The smallest encoding of one chunk's sorted low bits"""
+    words = [0] * (lows[-1] // 32 + 1)
+    for low in lows:
+        words[low // 32] |= 1 << (low % 32)
+    runs = _runs(lows)
+
+    candidates = [
+        (2 * len(lows), ARRAY, struct.pack(f'<{len(lows)}H', *lows)),
+        (4 * len(words), BITMAP, struct.pack(f'<{len(words)}I', *words)),
+        (4 * len(runs), RUN, b''.join(struct.pack('<HH', start, length) for start, length in runs)),
+    ]
+    _, kind, payload = min(candidates, key=lambda candidate: candidate[0])
+    count = {ARRAY: len(lows), BITMAP: len(words), RUN: len(runs)}[kind]
+    return _HEADER.pack(high, kind, count) + payload
+
+
+def encode_bitmap(ordinals):
+    """Base64 roaring-style bitmap of a set of document ordinals"""
+    chunks = {}
+    for ordinal in sorted(set(ordinals)):
+        chunks.setdefault(ordinal >> 16, []).append(ordinal & 0xFFFF)
+    data = b''.join(_container(high, lows) for high, lows in sorted(chunks.items()))
+    return base64.b64encode(data).decode('ascii')
+
+
+def decode_bitmap(text):
+    """Sorted ordinals of an encoded bitmap; mirrors decodeBitmap() in the pages"""
+    data = base64.b64decode(text)
+    ordinals = []
+    pos = 0
+    while pos < len(data):
+        high, kind, count = _HEADER.unpack_from(data, pos)
+        pos += _HEADER.size
+        base = high << 16
+        if kind == ARRAY:
+            ordinals.extend(base + low for low in struct.unpack_from(f'<{count}H', data, pos))
+            pos += 2 * count
+        elif kind == BITMAP:
+            for w, word in enumerate(struct.unpack_from(f'<{count}I', data, pos)):
+                ordinals.extend(base + 32 * w + i for i in range(32) if word >> i & 1)
+            pos += 4 * count
+        elif kind == RUN:
+            for r in range(count):
+                start, length = struct.unpack_from('<HH', data, pos + 4 * r)
+                ordinals.extend(range(base + start, base + start + length + 1))
+            pos += 4 * count
+        else:
+            raise ValueError(f"Unknown bitmap container type {kind}")
+    return ordinals
+
+
+def tag_ordinals(rows):
+    """tag -> ordinals of the rows the tag filter keeps"""
+    ordinals = {}
+    for i, row in enumerate(rows):
+        for tag in dict.fromkeys(row['tags']):
+            ordinals.setdefault(tag, []).append(i)
+    return ordinals
+
+
+def build_bitmap_index(documents, profile, source):
+    """The bitmap index for one corpus; source identifies the data it indexes"""
+    rules = facet_rules(profile)
+    rows = [navigator_row(doc) for doc in documents]
+
+    facets = {}
+    for facet, (keys, matches) in rules.items():
+        values = {'none': None} if facet == 'module' else {}
+        for row in rows:
+            values.update(dict.fromkeys(keys(row)))
+        facets[facet] = {}
+        for value in values:
+            ordinals = [i for i, row in enumerate(rows) if matches(row, value)]
+            facets[facet][value] = encode_bitmap(ordinals)
+
+    return {
+        'format': INDEX_FORMAT,
+        'version': INDEX_VERSION,
+        'count': len(rows),
+        'source': source,
+        'facets': facets,
+        'tags': {tag: encode_bitmap(ordinals) for tag, ordinals in sorted(tag_ordinals(rows).items())},
+    }
+
+
+def verify_bitmap_index(index, documents, profile):
+    """Check every bitmap against the filter rules it was built from"""
+    rules = facet_rules(profile)
+    rows = [navigator_row(doc) for doc in documents]
+    for facet, bitmaps in index['facets'].items():
+        matches = rules[facet][1]
+        for value, text in bitmaps.items():
+            if decode_bitmap(text) != [i for i, row in enumerate(rows) if matches(row, value)]:
+                raise ValueError(f"Bitmap for {facet}={value!r} does not match its filter")
+    expected = tag_ordinals(rows)
+    if set(index['tags']) != set(expected):
+        raise ValueError("Bitmap index tags do not match the documents")
+    for tag, text in index['tags'].items():
+        if decode_bitmap(text) != expected[tag]:
+            raise ValueError(f"Bitmap for tag {tag!r} does not match its filter")
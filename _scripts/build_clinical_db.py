@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Build a clinical data SQLite database (pd-eua-data.db, md-bla-data.db) for
+datasette from a production's datasets.
+
+Every .xpt, .parquet and .csv file under the given directories becomes one
+table named after the file's stem, which is what sqlite-utils gave the
+original databases and what the queries in documentation/sql.md use, e.g.
+    FDA-CBER-2022-1614-3825109-3825910_125752_S3_M5_mrna-1273-p301_S_dm
+If the same stem turns up in more than one format, the XPT is used, then
+the Parquet file; the CSV is the fallback.
+
+- XPT files are read directly in chunks, with the date, datetime and time
+  conversions (and, with --decode-codelists, the decode columns) that
+  xpt2csv.py applies, so a table has the same columns as the converted CSV.
+- CSVs are read with the csv module; empty values are stored as NULL.
+- Parquet files (pyarrow) are read batch by batch.
+
+Column types come from the Define-XML variables report (definexml2csv.py),
+looked up by dataset and variable name: integer -> INTEGER, float -> REAL,
+anything else (and every converted date) -> TEXT. Variables the report
+doesn't cover fall back on the file's own types (numeric XPT variables and
+Parquet numbers) or TEXT.
+
+The load is tuned for one bulk write: the database is built in a temporary
+file with the journal off and synchronous writes disabled, each table is
+created and then filled by a single executemany over all its rows with one
+commit at the end, and the indexes (on USUBJID, the usual filter) are
+created once the data is in. With the journal off nothing can be rolled
+back, so a table whose source fails partway is dropped, leaving it out of
+the database altogether. The finished file replaces the output at the end.
+A dataset_sources table records each table's source file, format and size.
+
+Usage (from the repository root):
+    python _scripts/build_clinical_db.py pd-eua-data.db pd-eua-production-051925 pd-eua-production-063025
+    python _scripts/build_clinical_db.py md-bla-data.db xpt_converted_20250701_120000 --define variables_report.csv
+"""
+
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from xpt2csv import (ISO_DATE_FORMAT, ISO_DATETIME_FORMAT, XPT_CHUNK_ROWS, apply_type_rules, build_type_rules,
+                     format_times, load_define_metadata, read_xpt_header)
+
+DEFINE_REPORT = 'variables_report.csv'
+
+# Preferred first when a dataset is present in several formats
+SOURCE_FORMATS = ['.xpt', '.parquet', '.csv']
+
+DEFINE_COLUMN_TYPES = {'integer': 'INTEGER', 'float': 'REAL'}
+
+# Columns indexed in every table that has them
+INDEXED_COLUMNS = ['USUBJID']
+
+BULK_LOAD_PRAGMAS = [
+    'PRAGMA journal_mode = OFF',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA locking_mode = EXCLUSIVE',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -262144',
+]
+
+csv.field_size_limit(sys.maxsize)
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def dataset_name(stem):
+    """The dataset a file holds, from the end of its name (..._S_dm -> DM, ...-A-adae -> ADAE)"""
+    return re.split(r'[-_]', stem)[-1].upper()
+
+
+def find_sources(directories):
+    """Table name -> source file, one per stem in order of SOURCE_FORMATS"""
+    found = {}
+    for directory in directories:
+        if not Path(directory).is_dir():
+            print(f"Warning: Directory {directory} not found")
+            continue
+        for path in sorted(Path(directory).rglob('*')):
+            suffix = path.suffix.lower()
+            if suffix not in SOURCE_FORMATS or not path.is_file():
+                continue
+            current = found.get(path.stem)
+            if current is None or SOURCE_FORMATS.index(suffix) < SOURCE_FORMATS.index(current.suffix.lower()):
+                found[path.stem] = path
+    return found
+
+
+def column_types(dataset, columns, metadata, native=None):
+    """SQLite type per column: the Define-XML data type, else the file's own, else TEXT"""
+    native = native or {}
+    types = []
+    for column in columns:
+        data_type = metadata.get((dataset, column.upper()), {}).get('data_type')
+        if data_type:
+            types.append(DEFINE_COLUMN_TYPES.get(data_type, 'TEXT'))
+        else:
+            types.append(native.get(column, 'TEXT'))
+    return types
+
+
+def dataframe_rows(chunk, date_columns=(), time_columns=()):
+    """Rows of a chunk as tuples of values sqlite3 accepts, NaN as NULL. Dates, datetimes and
+    times become text in the fixed formats xpt2csv.py writes, whatever the chunk holds: the
+    date_columns are written without a time, the time_columns (datetime.time values) as
+    HH:MM:SS, like durations"""
+    for name in chunk.columns:
+        values = chunk[name]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            chunk[name] = values.dt.strftime(ISO_DATE_FORMAT if name in date_columns else ISO_DATETIME_FORMAT)
+        elif pd.api.types.is_timedelta64_dtype(values):
+            chunk[name] = format_times(values.dt.total_seconds())
+        elif name in time_columns:
+            chunk[name] = values.map(lambda value: value.strftime('%H:%M:%S'), na_action='ignore')
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    return chunk.itertuples(index=False, name=None)
+
+
+def read_xpt(path, metadata, decode_codelists):
+    """(columns, types, row iterator) of an XPT file"""
+    header = read_xpt_header(path)
+    dataset = header['member_name'].upper() or dataset_name(path.stem)
+    rules = build_type_rules(header['member_name'], header['variables'], metadata, decode_codelists)
+    native = {variable['name']: 'REAL' if variable['type'] == 'numeric' else 'TEXT'
+              for variable in header['variables']}
+    columns = [variable['name'] for variable in header['variables']]
+    # Parsed --DTC values and decodes are extra text columns, as in the converted CSVs
+    for name, (conversion, codelist) in rules.items():
+        if conversion == 'iso8601':
+            columns.append(f"{name}_DT")
+        if codelist:
+            columns.append(f"{name}_DECODE")
+    # Converted dates and times are stored as text, whatever their Define-XML type
+    types = ['TEXT' if rules.get(column, (None, None))[0] else sql_type
+             for column, sql_type in zip(columns, column_types(dataset, columns, metadata, native))]
+
+    def rows():
+        with pd.read_sas(str(path), format='xport', encoding='latin1', chunksize=XPT_CHUNK_ROWS) as reader:
+            for chunk in reader:
+                yield from dataframe_rows(apply_type_rules(chunk, rules).reindex(columns=columns))
+
+    return columns, types, rows()
+
+
+def read_csv_file(path, metadata):
+    with open(path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+        columns = next(csv.reader(f), [])
+    types = column_types(dataset_name(path.stem), columns, metadata)
+
+    def rows():
+        with open(path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                yield [value or None for value in row]
+
+    return columns, types, rows()
+
+
+def read_parquet(path, metadata):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print(f"  pyarrow not installed; skipping {path.name}")
+        return None
+    parquet = pq.ParquetFile(path)
+    schema = parquet.schema_arrow
+    native = {}
+    for field in schema:
+        if pa.types.is_integer(field.type) or pa.types.is_boolean(field.type):
+            native[field.name] = 'INTEGER'
+        elif pa.types.is_floating(field.type) or pa.types.is_decimal(field.type):
+            native[field.name] = 'REAL'
+    columns = schema.names
+    types = column_types(dataset_name(path.stem), columns, metadata, native)
+    date_columns = {field.name for field in schema if pa.types.is_date(field.type)}
+    time_columns = {field.name for field in schema if pa.types.is_time(field.type)}
+
+    def rows():
+        for batch in parquet.iter_batches(batch_size=XPT_CHUNK_ROWS):
+            yield from dataframe_rows(batch.to_pandas(date_as_object=False), date_columns, time_columns)
+
+    return columns, types, rows()
+
+
+def load_table(conn, table, columns, types, rows):
+    """Create the table and insert every row with one executemany, committed once; returns
+    the row count"""
+    definitions = ', '.join(f"{quote(column)} {sql_type}" for column, sql_type in zip(columns, types))
+    placeholders = ', '.join('?' * len(columns))
+    conn.execute(f"CREATE TABLE {quote(table)} ({definitions})")
+    conn.executemany(f"INSERT INTO {quote(table)} VALUES ({placeholders})", rows)
+    conn.commit()
+    return conn.execute(f"SELECT COUNT(*) FROM {quote(table)}").fetchone()[0]
+
+
+def create_indexes(conn, tables):
+    for table, columns in tables.items():
+        for column in INDEXED_COLUMNS:
+            if column in columns:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {quote(f'idx_{table}_{column}')} "
+                             f"ON {quote(table)} ({quote(column)})")
+    conn.commit()
+
+
+def build_database(output, sources, metadata, decode_codelists=False):
+    building = f"{output}.building"
+    if os.path.exists(building):
+        os.remove(building)
+    conn = sqlite3.connect(building)
+    for pragma in BULK_LOAD_PRAGMAS:
+        conn.execute(pragma)
+    conn.execute("""
+        CREATE TABLE dataset_sources (
+            table_name TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            format TEXT NOT NULL,
+            dataset TEXT,
+            records INTEGER,
+            columns INTEGER,
+            size_mb REAL
+        )
+    """)
+
+    loaded = {}
+    failed = []
+    total_rows = 0
+    started = time.perf_counter()
+    for table, path in sorted(sources.items()):
+        table_started = time.perf_counter()
+        file_format = path.suffix.lower().lstrip('.')
+        try:
+            if file_format == 'xpt':
+                result = read_xpt(path, metadata, decode_codelists)
+            elif file_format == 'parquet':
+                result = read_parquet(path, metadata)
+            else:
+                result = read_csv_file(path, metadata)
+            if result is None:
+                continue
+            columns, types, rows = result
+            records = load_table(conn, table, columns, types, rows)
+        except Exception as e:
+            print(f"  Error loading {path}: {e}")
+            failed.append(path)
+            # Rollback is undefined with the journal off: keep what was written, then drop it
+            conn.commit()
+            conn.execute(f"DROP TABLE IF EXISTS {quote(table)}")
+            conn.commit()
+            continue
+        size_mb = round(path.stat().st_size / 1024 / 1024, 2)
+        with conn:
+            conn.execute("INSERT INTO dataset_sources VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (table, str(path), file_format, dataset_name(table), records, len(columns), size_mb))
+        loaded[table] = columns
+        total_rows += records
+        print(f"  {table}: {records:,} rows, {len(columns)} columns from {file_format.upper()} "
+              f"({time.perf_counter() - table_started:.1f}s)")
+
+    create_indexes(conn, loaded)
+    conn.execute("PRAGMA analysis_limit = 1000")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+    os.replace(building, output)
+
+    elapsed = time.perf_counter() - started
+    print(f"\nLoaded {len(loaded)} tables, {total_rows:,} rows in {elapsed:.1f}s "
+          f"({total_rows / elapsed if elapsed else 0:,.0f} rows/s) into {output}")
+    if failed:
+        print(f"Failed: {len(failed)} files")
+    return loaded, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a clinical data SQLite database for datasette")
+    parser.add_argument('output', help="Database to write, e.g. pd-eua-data.db")
+    parser.add_argument('directories', nargs='+', help="Directories of XPT, Parquet or CSV datasets")
+    parser.add_argument('--define', default=DEFINE_REPORT if os.path.exists(DEFINE_REPORT) else None,
+                        help=f"Define-XML variables report for column types (default: {DEFINE_REPORT} if present)")
+    parser.add_argument('--decode-codelists', action='store_true',
+                        help="Add <VAR>_DECODE columns to XPT tables, as xpt2csv.py does")
+    args = parser.parse_args()
+
+    sources = find_sources(args.directories)
+    if not sources:
+        print("No XPT, Parquet or CSV files found")
+        sys.exit(1)
+    formats = {suffix: sum(1 for path in sources.values() if path.suffix.lower() == suffix)
+               for suffix in SOURCE_FORMATS}
+    print(f"{len(sources)} datasets: " + ', '.join(f"{count} {suffix[1:].upper()}"
+                                                   for suffix, count in formats.items() if count))
+
+    metadata = load_define_metadata(args.define) if args.define else {}
+    if metadata:
+        print(f"Column types from {args.define} ({len(metadata)} dataset variables)")
+    else:
+        print("No Define-XML report; column types come from the files")
+
+    _, failed = build_database(args.output, sources, metadata, args.decode_codelists)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
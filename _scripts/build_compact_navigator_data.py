@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Build the compact, columnar navigator data files from the tagged-files JSON.
+
+Each <corpus>.json gets a <corpus>.compact.json next to it, plus precompressed
+.gz and (if the brotli package is installed) .br variants for servers set up
+to serve them. The navigator pages fetch the compact file first and fall back
+to the original JSON. The filter bitmap index (bitmap_index.py) is written to
+<corpus>.bitmaps.json the same way, and the folder/module shards the pages
+load lazily (navigator_shards.py) to <corpus>.shards/.
+
+Format (version 1): documents are stored column by column, one entry per field
+in "columns", each with one of these encodings:
+- raw:      {"values": [v0, v1, ...]}                 one value per document
+- dict:     {"values": [distinct...], "codes": [...]} code -1 = field absent
+- list:     {"values": [distinct...], "codes": [[...], ...]}  for tags/people;
+            a null entry = field absent
+- template: {"templates": [[prefix, suffix], ...], "codes": [...], "ids": [...]}
+            for Google Drive links, value = prefix + id + suffix
+
+Top-level keys other than "documents" (e.g. statistics) are kept in "extras".
+"facets" holds the precomputed filter counts from facet_counts.py and "source"
+a hash of the source JSON shared with the bitmap index; neither is part of the
+decoded data.
+The build decodes its own output and checks it against the source before
+writing anything.
+
+Usage (from the repository root):
+    python _scripts/build_compact_navigator_data.py
+    python _scripts/build_compact_navigator_data.py moderna-tagged-files.json
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+from bitmap_index import build_bitmap_index, encode_bitmap, verify_bitmap_index
+from facet_counts import build_facets, profile_for
+from navigator_shards import build_shards, verify_shards
+from tagged_json import TaggedFilesReader
+
+FORMAT_NAME = 'tagged-files-columnar'
+FORMAT_VERSION = 1
+
+DEFAULT_CORPORA = [
+    'pd-bla-tagged-files.json',
+    'pfizer-eua-tagged-files.json',
+    'moderna-tagged-files.json',
+]
+
+# Dictionary-encode a scalar column when it has at most this share of distinct values
+DICT_MAX_DISTINCT_RATIO = 0.5
+
+# Google Drive / Docs links: https://<host>/<kind>/d/<file id>/<view|edit>?usp=...
+LINK_PATTERN = re.compile(r'^(https?://[^?#]*?/d/)([A-Za-z0-9_-]+)(.*)$')
+
+# Fields whose values are file IDs wrapped in a handful of URL shapes
+TEMPLATE_FIELDS = {'googleDriveLink'}
+
+_brotli_warning_shown = False
+
+
+def _value_key(value):
+    """Hashable key for any JSON value (lists such as vaccineCandidate included)"""
+    return json.dumps(value, sort_keys=True)
+
+
+def _dictionary(values):
+    """Distinct values ordered by frequency (most common get the smallest codes)"""
+    counts = Counter(_value_key(v) for v in values)
+    first = {}
+    for value in values:
+        first.setdefault(_value_key(value), value)
+    ordered = [first[key] for key, _ in counts.most_common()]
+    return ordered, {_value_key(v): i for i, v in enumerate(ordered)}
+
+
+def encode_list_column(documents, field):
+    items = [item for doc in documents for item in doc.get(field) or []]
+    values, index = _dictionary(items)
+    codes = [[index[_value_key(item)] for item in doc[field]] if field in doc else None
+             for doc in documents]
+    return {'type': 'list', 'values': values, 'codes': codes}
+
+
+def encode_dict_column(documents, field):
+    present = [doc[field] for doc in documents if field in doc]
+    values, index = _dictionary(present)
+    codes = [index[_value_key(doc[field])] if field in doc else -1 for doc in documents]
+    return {'type': 'dict', 'values': values, 'codes': codes}
+
+
+def encode_template_column(documents, field):
+    templates = []
+    template_index = {}
+    codes = []
+    ids = []
+    for doc in documents:
+        match = LINK_PATTERN.match(doc[field])
+        if match:
+            template, file_id = (match.group(1), match.group(3)), match.group(2)
+        else:
+            template, file_id = ('', ''), doc[field]
+        if template not in template_index:
+            template_index[template] = len(templates)
+            templates.append(list(template))
+        codes.append(template_index[template])
+        ids.append(file_id)
+    return {'type': 'template', 'templates': templates, 'codes': codes, 'ids': ids}
+
+
+def choose_encoding(documents, field):
+    """Pick the encoding for one field from the values it actually holds"""
+    present = [doc[field] for doc in documents if field in doc]
+    everywhere = len(present) == len(documents)
+
+    if present and all(isinstance(v, list) and all(isinstance(i, str) for i in v) for v in present):
+        return 'list'
+    if everywhere and field in TEMPLATE_FIELDS and all(isinstance(v, str) for v in present):
+        return 'template'
+
+    distinct = len({_value_key(v) for v in present})
+    if not everywhere or distinct <= max(1, len(present) * DICT_MAX_DISTINCT_RATIO):
+        return 'dict'
+    return 'raw'
+
+
+def encode_corpus(documents, extras):
+    """Columnar, dictionary-encoded form of a corpus"""
+    fields = []
+    for doc in documents:
+        for field in doc:
+            if field not in fields:
+                fields.append(field)
+
+    columns = {}
+    for field in fields:
+        encoding = choose_encoding(documents, field)
+        if encoding == 'list':
+            columns[field] = encode_list_column(documents, field)
+        elif encoding == 'template':
+            columns[field] = encode_template_column(documents, field)
+        elif encoding == 'dict':
+            columns[field] = encode_dict_column(documents, field)
+        else:
+            columns[field] = {'type': 'raw', 'values': [doc[field] for doc in documents]}
+
+    return {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'count': len(documents),
+        'fields': fields,
+        'columns': columns,
+        'extras': extras,
+    }
+
+
+def decode_corpus(compact):
+    """Inverse of encode_corpus; mirrors decodeTaggedFiles() in the navigator pages"""
+    documents = []
+    for i in range(compact['count']):
+        doc = {}
+        for field in compact['fields']:
+            column = compact['columns'][field]
+            kind = column['type']
+            if kind == 'raw':
+                doc[field] = column['values'][i]
+            elif kind == 'dict':
+                code = column['codes'][i]
+                if code >= 0:
+                    doc[field] = column['values'][code]
+            elif kind == 'list':
+                codes = column['codes'][i]
+                if codes is not None:
+                    doc[field] = [column['values'][c] for c in codes]
+            elif kind == 'template':
+                prefix, suffix = column['templates'][column['codes'][i]]
+                doc[field] = prefix + column['ids'][i] + suffix
+        documents.append(doc)
+    data = {'documents': documents}
+    data.update(compact['extras'])
+    return data
+
+
+def write_compressed(path, payload):
+    """Write .gz (always) and .br (when brotli is available) next to path"""
+    written = []
+    gz_path = Path(f"{path}.gz")
+    # mtime=0 keeps the output byte-identical between builds
+    with open(gz_path, 'wb') as f:
+        f.write(gzip.compress(payload, compresslevel=9, mtime=0))
+    written.append(gz_path)
+
+    try:
+        import brotli
+        br_path = Path(f"{path}.br")
+        with open(br_path, 'wb') as f:
+            f.write(brotli.compress(payload, quality=11))
+        written.append(br_path)
+    except ImportError:
+        global _brotli_warning_shown
+        if not _brotli_warning_shown:
+            print("  brotli not installed; skipping .br output")
+            _brotli_warning_shown = True
+    return written
+
+
+def source_hash(json_file):
+    """Short content hash tying the compact file and bitmap index to one source"""
+    digest = hashlib.sha1()
+    with open(json_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def write_json(path, data):
+    """Write minified JSON plus compressed variants; returns the paths written"""
+    payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(payload)
+    return [path] + write_compressed(path, payload)
+
+
+def write_shards(json_file, manifest, shards, facets):
+    """Write <corpus>.shards/, replacing any previous build; returns the paths written"""
+    output_dir = Path(json_file).with_suffix('.shards')
+    output_dir.mkdir(exist_ok=True)
+    # Shard numbers shift when folders are added, so nothing old is kept
+    for stale in output_dir.glob('*.json*'):
+        stale.unlink()
+    written = []
+    for entry, shard in zip(manifest['shards'], shards):
+        written += write_json(output_dir / entry['file'], shard)
+    written += write_json(output_dir / 'facets.json', {'source': manifest['source'], 'facets': facets})
+    written += write_json(output_dir / 'manifest.json', manifest)
+    return written
+
+
+def build_compact_file(json_file):
+    """Encode one corpus, verify the round trip, and write the compact file, bitmap index, shards and variants"""
+    with TaggedFilesReader(json_file) as reader:
+        documents = list(reader.documents())
+        extras = reader.extras
+
+    compact = encode_corpus(documents, extras)
+    if decode_corpus(compact) != dict({'documents': documents}, **extras):
+        raise ValueError(f"{json_file}: compact encoding does not round-trip")
+    profile = profile_for(json_file)
+    source = source_hash(json_file)
+    compact['source'] = source
+    compact['facets'] = build_facets(documents, profile)
+
+    index = build_bitmap_index(documents, profile, source)
+    verify_bitmap_index(index, documents, profile)
+
+    manifest, shard_ordinals = build_shards(documents, profile, source, compact['facets'])
+    shards = []
+    for ordinals in shard_ordinals:
+        shard = encode_corpus([documents[ordinal] for ordinal in ordinals], {})
+        shard['ordinals'] = encode_bitmap(ordinals)
+        shards.append(shard)
+    verify_shards(manifest, [(shard['ordinals'], decode_corpus(shard)['documents']) for shard in shards],
+                  documents, profile)
+
+    print(f"\n{json_file} ({len(documents)} documents)")
+    written = write_json(Path(json_file).with_suffix('.compact.json'), compact)
+    written += write_json(Path(json_file).with_suffix('.bitmaps.json'), index)
+    shard_files = write_shards(json_file, manifest, shards, compact['facets'])
+
+    print(f"  {'source':<40} {os.path.getsize(json_file):>10,} bytes")
+    for path in written:
+        print(f"  {path.name:<40} {os.path.getsize(path):>10,} bytes")
+    encodings = Counter(column['type'] for column in compact['columns'].values())
+    print("  Columns: " + ', '.join(f"{count} {kind}" for kind, count in sorted(encodings.items())))
+    states = sum(len(rows) for rows in compact['facets']['cross'].values())
+    print(f"  Facet counts: whole corpus + {states} single-filter states")
+    bitmaps = sum(len(values) for values in index['facets'].values())
+    print(f"  Bitmap index: {bitmaps} filter values, {len(index['tags'])} tags")
+    shard_bytes = sum(os.path.getsize(path) for path in shard_files
+                      if path.suffix == '.json' and path.stem not in ('manifest', 'facets'))
+    manifest_path = Path(json_file).with_suffix('.shards') / 'manifest.json'
+    print(f"  Shards: {len(shards)} by folder/module, {shard_bytes:,} bytes "
+          f"(manifest {os.path.getsize(manifest_path):,}, "
+          f"largest {max(entry['count'] for entry in manifest['shards'])} documents)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build compact columnar navigator data files")
+    parser.add_argument('corpora', nargs='*', default=DEFAULT_CORPORA, help="Corpus JSON files (default: all)")
+    args = parser.parse_args()
+
+    for json_file in args.corpora:
+        if not os.path.exists(json_file):
+            print(f"File not found: {json_file}")
+            continue
+        build_compact_file(json_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Fill the Define-XML metadata into field-definitions-flat.json and build the
+data dictionary's search index.
+
+field-definitions-flat.json (from field-definitions.json, via
+_conversion_scripts/convert-field-definitions.js) holds a curated definition,
+comment and section per variable, with placeholders for the rest. Those come
+from variables_report.csv (definexml2csv.py), which lists every variable of
+every dataset in the Define-XML files, study by study. The report is read
+once with pandas and grouped by variable name:
+- dataType:  the most common Variable_Data_Type; on a tie, the wider type
+             (DATA_TYPE_ORDER), so integer vs float gives float
+- mandatory: whether most of the variable's datasets mark it mandatory
+             (ties count as mandatory)
+- codeList:  the most common codelist name, or null if it has none
+- domain:    the datasets the variable appears in, most frequent first
+- origin:    the most common Variable_Origin, or null if the report has none
+- studies:   the studies it appears in
+- conflicts: for dataType, mandatory and codeList, the count of each value
+             when the variable's datasets disagree, else null
+The codelists themselves go in a top-level "codeLists" object, name ->
+{"dataType", "values": {coded value: decode}}, merged across studies.
+Variables in the report but not in the dictionary are added under the
+section NEW_FIELD_SECTION with their Define-XML label as the definition.
+Curated definitions, comments and sections are never changed.
+
+The search index, field-definitions-search.json (plus .gz/.br), maps every
+word of a field's name, definition and labels to the fields containing it,
+so data-dictionary.html can find fields by the start of any word without
+scanning the definitions:
+    {"format", "version", "fields": [names...], "tokens": [sorted...],
+     "postings": [[field indexes...], ...]}
+
+Usage (from the repository root):
+    python _scripts/build_data_dictionary.py
+    python _scripts/build_data_dictionary.py --check
+"""
+
+import argparse
+import json
+import sys
+from datetime import date
+
+import pandas as pd
+
+from build_compact_navigator_data import write_json
+from build_search_index import js_sort_key, tokenize
+
+DICTIONARY_FILE = 'field-definitions-flat.json'
+REPORT_FILE = 'variables_report.csv'
+SEARCH_INDEX_FILE = 'field-definitions-search.json'
+
+INDEX_FORMAT = 'field-definitions-search'
+INDEX_VERSION = 1
+
+REPORT_COLUMNS = ['Study_Name', 'Dataset_Name', 'Variable_Name', 'Variable_Label', 'Variable_Data_Type',
+                  'Variable_Origin', 'Variable_Mandatory', 'CodeList_Name', 'CodeList_Data_Type',
+                  'CodeList_Coded_Values']
+
+# Widest first: a value of any type fits a later one's column only the other way round
+DATA_TYPE_ORDER = ['text', 'partialDatetime', 'datetime', 'date', 'durationDatetime', 'float', 'integer']
+
+NEW_FIELD_SECTION = 'Define-XML Variables'
+
+# Keys the report fills in, in the order they appear in each field
+DERIVED_KEYS = ['mandatory', 'codeList', 'dataType', 'domain', 'origin', 'studies', 'conflicts']
+
+
+def load_report(path=REPORT_FILE):
+    report = pd.read_csv(path, dtype=str, keep_default_na=False, usecols=REPORT_COLUMNS)
+    return report[report['Variable_Name'] != '']
+
+
+def ranked_values(report, column, order=None):
+    """Per variable, the distinct non-empty values of a column with their instance counts,
+    best first: most instances, then by order (if given), then by value"""
+    counts = (report[report[column] != '']
+              .groupby(['Variable_Name', column]).size().rename('count').reset_index())
+    counts['rank'] = counts[column].map({value: i for i, value in enumerate(order)}).fillna(len(order)) \
+        if order else 0
+    return counts.sort_values(['Variable_Name', 'count', 'rank', column], ascending=[True, False, True, True])
+
+
+def winners(counts, column):
+    return counts.drop_duplicates('Variable_Name').set_index('Variable_Name')[column].to_dict()
+
+
+def disagreements(counts, column):
+    """Variable -> {value: count} where the variable has more than one value"""
+    split = counts[counts.duplicated('Variable_Name', keep=False)]
+    result = {}
+    for name, value, count in zip(split['Variable_Name'], split[column], split['count']):
+        result.setdefault(name, {})[value] = int(count)
+    return result
+
+
+def listed(report, column):
+    """Variable -> the distinct values of a column, most frequent first"""
+    counts = ranked_values(report, column)
+    return counts.groupby('Variable_Name', sort=False)[column].agg(list).to_dict()
+
+
+def parse_coded_values(text):
+    """'CODE: Decode;\\nCODE;\\n...' -> {code: decode}, null for a code without a decode"""
+    values = {}
+    for item in text.split(';\n'):
+        code, separator, decode = item.partition(': ')
+        if code:
+            values[code] = decode if separator else None
+    return values
+
+
+def code_lists(report, names):
+    """The named codelists, values merged across studies (the first study's decode wins)"""
+    rows = report[report['CodeList_Name'].isin(names)].drop_duplicates(
+        ['CodeList_Name', 'CodeList_Data_Type', 'CodeList_Coded_Values'])
+    lists = {}
+    for name, data_type, coded in zip(rows['CodeList_Name'], rows['CodeList_Data_Type'],
+                                      rows['CodeList_Coded_Values']):
+        entry = lists.setdefault(name, {'dataType': data_type or None, 'values': {}})
+        for code, decode in parse_coded_values(coded).items():
+            entry['values'].setdefault(code, decode)
+    return {name: lists[name] for name in sorted(lists)}
+
+
+def field_metadata(report):
+    """Variable -> the keys derived from the report"""
+    data_types = ranked_values(report, 'Variable_Data_Type', DATA_TYPE_ORDER)
+    # "True" before "False": a tie counts as mandatory
+    mandatory = ranked_values(report, 'Variable_Mandatory', ['True', 'False'])
+    code_list_names = ranked_values(report, 'CodeList_Name')
+    chosen = {
+        'dataType': winners(data_types, 'Variable_Data_Type'),
+        'mandatory': winners(mandatory, 'Variable_Mandatory'),
+        'codeList': winners(code_list_names, 'CodeList_Name'),
+        'origin': winners(ranked_values(report, 'Variable_Origin'), 'Variable_Origin'),
+    }
+    conflicts = {
+        'dataType': disagreements(data_types, 'Variable_Data_Type'),
+        'mandatory': disagreements(mandatory, 'Variable_Mandatory'),
+        'codeList': disagreements(code_list_names, 'CodeList_Name'),
+    }
+    datasets = listed(report, 'Dataset_Name')
+    studies = report.drop_duplicates(['Variable_Name', 'Study_Name']).groupby('Variable_Name')['Study_Name'] \
+        .agg(sorted).to_dict()
+
+    metadata = {}
+    for name in sorted(set(report['Variable_Name'])):
+        field_conflicts = {key: values[name] for key, values in conflicts.items() if name in values}
+        mandatory_value = chosen['mandatory'].get(name)
+        metadata[name] = {
+            'mandatory': mandatory_value == 'True' if mandatory_value else None,
+            'codeList': chosen['codeList'].get(name),
+            'dataType': chosen['dataType'].get(name),
+            'domain': datasets.get(name),
+            'origin': chosen['origin'].get(name),
+            'studies': studies.get(name),
+            'conflicts': field_conflicts or None,
+        }
+    return metadata
+
+
+def enrich_dictionary(dictionary, report):
+    """Fill the derived keys of every field and add the report's other variables; returns
+    the number of fields added"""
+    fields = dictionary['fields']
+    metadata = field_metadata(report)
+    labels = winners(ranked_values(report, 'Variable_Label'), 'Variable_Label')
+    added = 0
+    for name, derived in metadata.items():
+        if name not in fields:
+            fields[name] = {'definition': labels.get(name, name),
+                            'comment': None, 'section': NEW_FIELD_SECTION}
+            added += 1
+        fields[name].update(derived)
+    for name, field in fields.items():
+        if name not in metadata:
+            field.update(dict.fromkeys(DERIVED_KEYS))
+
+    used = {field['codeList'] for field in fields.values() if field.get('codeList')}
+    dictionary['codeLists'] = code_lists(report, used)
+    info = dictionary['metadata']
+    info['totalFields'] = len(fields)
+    if added and NEW_FIELD_SECTION not in info['sections']:
+        info['sections'].append(NEW_FIELD_SECTION)
+    info['source'] = {
+        'file': REPORT_FILE,
+        'studies': sorted(set(report['Study_Name'])),
+        'variableInstances': len(report),
+    }
+    return added
+
+
+def build_search_index(dictionary, report):
+    """Word -> fields index over names, definitions and Define-XML labels"""
+    names = sorted(dictionary['fields'], key=js_sort_key)
+    position = {name: i for i, name in enumerate(names)}
+    label_lists = listed(report, 'Variable_Label')
+    postings = {}
+    for name in names:
+        text = [name, dictionary['fields'][name]['definition'] or ''] + label_lists.get(name, [])
+        for token in {token for part in text for token in tokenize(part)}:
+            postings.setdefault(token, []).append(position[name])
+    tokens = sorted(postings, key=js_sort_key)
+    return {
+        'format': INDEX_FORMAT,
+        'version': INDEX_VERSION,
+        'fields': names,
+        'tokens': tokens,
+        'postings': [postings[token] for token in tokens],
+    }
+
+
+def dictionary_text(dictionary):
+    # As convert-field-definitions.js writes it: JSON.stringify(output, null, 2)
+    return json.dumps(dictionary, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill field-definitions-flat.json from the Define-XML report")
+    parser.add_argument('--check', action='store_true',
+                        help="Report whether the dictionary is up to date, without writing anything")
+    args = parser.parse_args()
+
+    with open(DICTIONARY_FILE, 'r', encoding='utf-8') as f:
+        current = f.read()
+    dictionary = json.loads(current)
+    report = load_report()
+    added = enrich_dictionary(dictionary, report)
+    changed = dictionary_text(dictionary) != current
+    if changed:
+        dictionary['metadata']['lastUpdated'] = date.today().isoformat()
+
+    fields = dictionary['fields']
+    filled = sum(1 for field in fields.values() if field['dataType'])
+    conflicting = sum(1 for field in fields.values() if field['conflicts'])
+    print(f"{len(report)} variable instances from {REPORT_FILE}, {len(set(report['Variable_Name']))} variables")
+    print(f"  {filled} of {len(fields)} fields have Define-XML metadata ({added} added from the report)")
+    print(f"  {conflicting} fields where datasets disagree; {len(dictionary['codeLists'])} codelists")
+
+    if args.check:
+        print(f"{DICTIONARY_FILE} is {'out of date' if changed else 'up to date'}")
+        sys.exit(1 if changed else 0)
+    if changed:
+        with open(DICTIONARY_FILE, 'w', encoding='utf-8') as f:
+            f.write(dictionary_text(dictionary))
+        print(f"Wrote {DICTIONARY_FILE}")
+
+    index = build_search_index(dictionary, report)
+    write_json(SEARCH_INDEX_FILE, index)
+    print(f"Wrote {SEARCH_INDEX_FILE}: {len(index['tokens'])} words over {len(index['fields'])} fields")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Build fda_field_dictionary.csv from the CSVs xpt2csv.py converted.
+
+One row per column of every converted dataset:
+    file_name, field_name, position, table_short_name, category, record_count
+sorted by file name and column position, as data-dictionary.html and
+build_field_usage.py read it.
+
+Nothing is loaded into pandas. For each CSV:
+- the columns come from its header line alone,
+- the record count comes from counting the line breaks of the memory-mapped
+  file, in large chunks. A chunk without a double quote is counted in one
+  go; one with quotes is split on them and only the pieces outside quoted
+  values are counted (an escaped "" splits off an empty piece, so the
+  parity still holds), so a line break inside a quoted value never counts
+  as a new record,
+- the content hash (sha1) is taken in the same pass.
+Files are scanned in parallel, one process each. The results are cached in
+.field-dictionary-cache.json by path, with each file's size, modification
+time and hash: a file whose size and modification time are unchanged is not
+read again, and one whose hash comes out the same is reported as unchanged.
+
+The table short name is the part of the file name after "_M5_" (the eCTD
+module 5 folder), and the category follows from its study prefix
+(STUDY_CATEGORIES).
+
+Usage (from the repository root):
+    python _scripts/build_field_dictionary.py xpt_converted_20250701_120000
+    python _scripts/build_field_dictionary.py xpt_converted_20250701_120000 --check
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+DICTIONARY_CSV = 'fda_field_dictionary.csv'
+CACHE_FILE = '.field-dictionary-cache.json'
+CACHE_VERSION = 1
+
+DICTIONARY_COLUMNS = ['file_name', 'field_name', 'position', 'table_short_name', 'category', 'record_count']
+
+# Bytes counted at a time; large enough that the per-chunk overhead is negligible
+SCAN_CHUNK_BYTES = 16 * 1024 * 1024
+
+TABLE_NAME_MARKER = '_M5_'
+
+# Table short name prefix -> category, first match wins
+STUDY_CATEGORIES = [
+    ('bnt162-01-', 'phase1'),
+    ('c4591001-ia efficacy-', 'efficacy'),
+    ('c4591001-safety-', 'safety'),
+]
+DEFAULT_CATEGORY = 'other'
+
+
+def count_records(mm, digest):
+    """Rows after the header in a mapped CSV, not counting line breaks inside quoted values;
+    feeds the bytes to digest on the way"""
+    size = len(mm)
+    line_breaks = 0
+    in_quotes = False
+    for start in range(0, size, SCAN_CHUNK_BYTES):
+        chunk = mm[start:start + SCAN_CHUNK_BYTES]
+        digest.update(chunk)
+        if not in_quotes and b'"' not in chunk:
+            line_breaks += chunk.count(b'\n')
+            continue
+        # Pieces alternate between outside and inside quotes, starting from the current state
+        pieces = chunk.split(b'"')
+        line_breaks += sum(piece.count(b'\n') for piece in pieces[1 if in_quotes else 0::2])
+        if len(pieces) % 2 == 0:
+            in_quotes = not in_quotes
+    if not size:
+        return 0
+    # The last row may lack a line break of its own
+    rows = line_breaks + (0 if mm[size - 1:size] == b'\n' else 1)
+    return max(rows - 1, 0)
+
+
+def read_header(path):
+    with open(path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def scan_csv(path):
+    """(columns, record count, sha1) of a CSV"""
+    columns = read_header(path)
+    digest = hashlib.sha1()
+    if os.path.getsize(path) == 0:
+        return columns, 0, digest.hexdigest()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        records = count_records(mm, digest)
+    return columns, records, digest.hexdigest()
+
+
+def table_short_name(file_name):
+    stem = file_name[:-len('.csv')] if file_name.lower().endswith('.csv') else file_name
+    _, marker, name = stem.rpartition(TABLE_NAME_MARKER)
+    return name if marker else stem
+
+
+def table_category(table):
+    for prefix, category in STUDY_CATEGORIES:
+        if table.startswith(prefix):
+            return category
+    return DEFAULT_CATEGORY
+
+
+def find_csvs(directories):
+    """Converted CSVs under the directories, by file name (the first of any duplicate names)"""
+    found = {}
+    for directory in directories:
+        if not Path(directory).is_dir():
+            print(f"Warning: Directory {directory} not found")
+            continue
+        for path in sorted(Path(directory).rglob('*.csv')):
+            if path.name in found:
+                print(f"Warning: {path} has the same name as {found[path.name]}; skipping it")
+            else:
+                found[path.name] = path
+    return found
+
+
+def load_cache(path=CACHE_FILE):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') == CACHE_VERSION:
+            return cache
+    return {'version': CACHE_VERSION, 'files': {}}
+
+
+def save_cache(cache, path=CACHE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def scan_all(files, cache, workers, force=False):
+    """Scan the files whose size or modification time changed; returns the file name -> entry
+    map and the counts of (reused, rescanned but unchanged, changed) files"""
+    entries = {}
+    pending = []
+    for name, path in files.items():
+        stat = path.stat()
+        cached = cache['files'].get(str(path))
+        if not force and cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime_ns:
+            entries[name] = cached
+        else:
+            pending.append((name, path, stat))
+
+    unchanged = changed = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(scan_csv, [path for _, path, _ in pending], chunksize=4)
+            for (name, path, stat), (columns, records, sha1) in zip(pending, results):
+                cached = cache['files'].get(str(path))
+                if cached and cached['sha1'] == sha1:
+                    unchanged += 1
+                else:
+                    changed += 1
+                entries[name] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha1': sha1,
+                                 'columns': columns, 'records': records}
+
+    cache['files'] = {str(files[name]): entry for name, entry in sorted(entries.items())}
+    return entries, len(files) - len(pending), unchanged, changed
+
+
+def dictionary_text(entries):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(DICTIONARY_COLUMNS)
+    for name in sorted(entries):
+        entry = entries[name]
+        table = table_short_name(name)
+        category = table_category(table)
+        for position, field in enumerate(entry['columns'], start=1):
+            writer.writerow([name, field, position, table, category, entry['records']])
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build fda_field_dictionary.csv from converted CSV headers")
+    parser.add_argument('directories', nargs='+', help="Directories of converted CSVs (searched recursively)")
+    parser.add_argument('--output', default=DICTIONARY_CSV, help=f"Dictionary to write (default: {DICTIONARY_CSV})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Parallel scans (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="Rescan every file, ignoring the cache")
+    parser.add_argument('--check', action='store_true',
+                        help="Report whether the dictionary is up to date, without writing it")
+    args = parser.parse_args()
+
+    files = find_csvs(args.directories)
+    if not files:
+        print("No CSV files found")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    cache = load_cache()
+    entries, reused, unchanged, changed = scan_all(files, cache, args.workers, args.force)
+    elapsed = time.perf_counter() - started
+    save_cache(cache)
+    print(f"{len(files)} CSV files in {elapsed:.2f}s: {reused} cached, {unchanged} rescanned but unchanged, "
+          f"{changed} new or changed")
+
+    other = sorted(name for name in entries if table_category(table_short_name(name)) == DEFAULT_CATEGORY)
+    for name in other:
+        print(f"  No category for {name}; using '{DEFAULT_CATEGORY}'")
+
+    text = dictionary_text(entries)
+    columns = sum(len(entry['columns']) for entry in entries.values())
+    records = sum(entry['records'] for entry in entries.values())
+    print(f"  {columns:,} columns, {records:,} records")
+
+    current = None
+    if os.path.exists(args.output):
+        with open(args.output, 'r', encoding='utf-8', newline='') as f:
+            current = f.read()
+    if args.check:
+        print(f"{args.output} is {'up to date' if text == current else 'out of date'}")
+        sys.exit(0 if text == current else 1)
+    if text != current:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        print(f"Wrote {args.output}")
+    else:
+        print(f"{args.output} is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Build the field usage index from fda_field_dictionary.csv.
+
+The CSV (from build_field_dictionary.py) has one row per column of every
+converted dataset (file_name, field_name, position, table_short_name,
+category, record_count). This
+inverts it, so "which datasets contain AETOXGR, and how many rows" is one
+lookup instead of a scan:
+
+field-usage.json (plus .gz/.br), minified:
+    {"format", "version", "source": hash of the CSV,
+     "tables": [{"name": table_short_name, "file", "category", "records",
+                 "fields": [field names in column order]}, ...],
+     "fields": {"AETOXGR": {"tables": [indexes into "tables"],
+                            "positions": [its column number in each],
+                            "records": total records of those tables}}}
+Tables are sorted by name then file (a short name can repeat across
+deliveries), and each field's tables follow that order.
+
+field-usage.db, the same for SQL (e.g. datasette):
+- tables(id, file_name, table_short_name, category, record_count, field_count)
+- field_usage(field_name, table_id, position), clustered by field name,
+  with an index by table and position for table -> fields
+- fields(field_name, table_count, total_records, categories), a view of the
+  per-field totals
+
+Both are rebuilt only when the CSV's hash differs from the one they record
+(the database keeps it in a one-row "build" table).
+
+Usage (from the repository root):
+    python _scripts/build_field_usage.py
+    python _scripts/build_field_usage.py AETOXGR
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+
+from build_compact_navigator_data import source_hash, write_json
+
+DICTIONARY_CSV = 'fda_field_dictionary.csv'
+USAGE_JSON = 'field-usage.json'
+USAGE_DB = 'field-usage.db'
+
+INDEX_FORMAT = 'field-usage'
+INDEX_VERSION = 1
+
+
+def read_columns(path=DICTIONARY_CSV):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [{'file': row['file_name'], 'field': row['field_name'], 'position': int(row['position']),
+                 'table': row['table_short_name'], 'category': row['category'].strip(),
+                 'records': int(row['record_count'] or 0)}
+                for row in csv.DictReader(f)]
+
+
+def build_usage_index(columns, source):
+    """The field -> tables and table -> fields index"""
+    tables = {}
+    for column in columns:
+        table = tables.setdefault(column['file'], {
+            'name': column['table'], 'file': column['file'], 'category': column['category'],
+            'records': column['records'], 'fields': []})
+        table['fields'].append((column['position'], column['field']))
+    ordered = sorted(tables.values(), key=lambda table: (table['name'], table['file']))
+
+    fields = {}
+    for i, table in enumerate(ordered):
+        columns_in_order = sorted(table['fields'])
+        table['fields'] = [field for _, field in columns_in_order]
+        for position, field in columns_in_order:
+            usage = fields.setdefault(field, {'tables': [], 'positions': [], 'records': 0})
+            usage['tables'].append(i)
+            usage['positions'].append(position)
+            usage['records'] += table['records']
+    return {
+        'format': INDEX_FORMAT,
+        'version': INDEX_VERSION,
+        'source': source,
+        'tables': ordered,
+        'fields': {field: fields[field] for field in sorted(fields)},
+    }
+
+
+def write_usage_db(index, path=USAGE_DB):
+    """Write the index to SQLite (replacing any previous build)"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript("""
+            DROP VIEW IF EXISTS fields;
+            DROP TABLE IF EXISTS field_usage;
+            DROP TABLE IF EXISTS tables;
+            CREATE TABLE tables (
+                id INTEGER PRIMARY KEY,
+                file_name TEXT NOT NULL UNIQUE,
+                table_short_name TEXT NOT NULL,
+                category TEXT,
+                record_count INTEGER,
+                field_count INTEGER
+            );
+            CREATE TABLE field_usage (
+                field_name TEXT NOT NULL,
+                table_id INTEGER NOT NULL REFERENCES tables(id),
+                position INTEGER NOT NULL,
+                PRIMARY KEY (field_name, table_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX idx_field_usage_table ON field_usage(table_id, position);
+            CREATE VIEW fields AS
+                SELECT u.field_name, COUNT(*) AS table_count, SUM(t.record_count) AS total_records,
+                       GROUP_CONCAT(DISTINCT t.category) AS categories
+                FROM field_usage u JOIN tables t ON t.id = u.table_id
+                GROUP BY u.field_name;
+        """)
+        conn.executemany(
+            'INSERT INTO tables (id, file_name, table_short_name, category, record_count, field_count) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            ((i, table['file'], table['name'], table['category'], table['records'], len(table['fields']))
+             for i, table in enumerate(index['tables'])))
+        conn.executemany(
+            'INSERT INTO field_usage (field_name, table_id, position) VALUES (?, ?, ?)',
+            ((field, table, position) for field, usage in index['fields'].items()
+             for table, position in zip(usage['tables'], usage['positions'])))
+        conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        conn.execute("CREATE TABLE IF NOT EXISTS build (source TEXT NOT NULL)")
+        conn.execute("DELETE FROM build")
+        conn.execute("INSERT INTO build (source) VALUES (?)", (index['source'],))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def recorded_sources():
+    """The CSV hashes the current JSON and database were built from"""
+    sources = [None, None]
+    if os.path.exists(USAGE_JSON):
+        with open(USAGE_JSON, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == INDEX_VERSION:
+            sources[0] = data.get('source')
+    if os.path.exists(USAGE_DB):
+        conn = sqlite3.connect(USAGE_DB)
+        try:
+            if conn.execute('PRAGMA user_version').fetchone()[0] == INDEX_VERSION:
+                row = conn.execute('SELECT source FROM build').fetchone()
+                sources[1] = row[0] if row else None
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            conn.close()
+    return sources
+
+
+def print_usage(index, field):
+    usage = index['fields'].get(field)
+    if not usage:
+        print(f"{field}: not in any table")
+        return
+    print(f"{field}: {len(usage['tables'])} tables, {usage['records']:,} records")
+    for table, position in zip(usage['tables'], usage['positions']):
+        table = index['tables'][table]
+        print(f"  {table['name']:<32} column {position:>3}  {table['records']:>9,} records  {table['category']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the field usage index from fda_field_dictionary.csv")
+    parser.add_argument('fields', nargs='*', help="Show where these fields are used")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the CSV is unchanged")
+    args = parser.parse_args()
+
+    source = source_hash(DICTIONARY_CSV)
+    columns = read_columns()
+    index = build_usage_index(columns, source)
+    print(f"{len(columns)} columns in {len(index['tables'])} tables, {len(index['fields'])} distinct fields")
+
+    json_source, db_source = recorded_sources()
+    if args.force or json_source != source:
+        write_json(USAGE_JSON, index)
+        print(f"Wrote {USAGE_JSON}")
+    if args.force or db_source != source:
+        write_usage_db(index)
+        print(f"Wrote {USAGE_DB}")
+    if not args.force and json_source == db_source == source:
+        print("Up to date")
+
+    for field in args.fields:
+        print_usage(index, field.upper())
+
+
+if __name__ == "__main__":
+    main()
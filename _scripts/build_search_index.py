@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Build the navigator full-text search index for each tagged-files corpus.
+
+Titles, tags, people mentioned, filenames and document types are split into
+lowercase word tokens. Each token maps to the documents containing it, with a
+score summing the weights of the fields it appears in (FIELD_WEIGHTS). Tokens
+are sharded by their first character, so a page only fetches the shards for
+the words being typed and finds every token starting with a word by binary
+search over the sorted tokens.
+
+Output, for <corpus>.json, in the directory <corpus>.search/:
+- index.json: document count, source hash (matching the compact data file),
+  field weights, token count per shard, and the sorted distinct tags with
+  their document counts (the tag search dropdown's list)
+- <shard>.json: {"tokens": [sorted...], "postings": [[...], ...]} where each
+  posting list is flat [ordinal delta, score, ordinal delta, score, ...]
+  over ascending document ordinals; shards are "a".."z", "0".."9" and "_"
+  for tokens starting with any other character
+Each file also gets .gz (and .br, with brotli) variants.
+
+Usage (from the repository root):
+    python _scripts/build_search_index.py
+    python _scripts/build_search_index.py moderna-tagged-files.json
+"""
+
+import argparse
+import os
+import re
+import string
+from pathlib import Path
+
+from build_compact_navigator_data import source_hash, write_json
+from facet_counts import navigator_row
+from tagged_json import TaggedFilesReader
+
+INDEX_FORMAT = 'tagged-files-search'
+INDEX_VERSION = 1
+
+DEFAULT_CORPORA = [
+    'pd-bla-tagged-files.json',
+    'pfizer-eua-tagged-files.json',
+    'moderna-tagged-files.json',
+]
+
+FIELD_WEIGHTS = {
+    'title': 4,
+    'tags': 3,
+    'peopleMentioned': 3,
+    'documentType': 2,
+    'filename': 1,
+}
+
+# Letters and digits, as /[\p{L}\p{N}]+/gu in tokenize() on the pages
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+SHARD_CHARACTERS = set(string.ascii_lowercase + string.digits)
+OTHER_SHARD = '_'
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def shard_for(token):
+    return token[0] if token[0] in SHARD_CHARACTERS else OTHER_SHARD
+
+
+def js_sort_key(text):
+    """Array.prototype.sort() order (UTF-16 code units)"""
+    return text.encode('utf-16-be')
+
+
+def document_fields(doc):
+    """Searchable text per field; documentType as the pages show it"""
+    return {
+        'title': [doc.get('title') or ''],
+        'tags': doc.get('tags') or [],
+        'peopleMentioned': doc.get('peopleMentioned') or [],
+        'documentType': [navigator_row(doc)['documentType']],
+        'filename': [doc.get('filename') or ''],
+    }
+
+
+def build_search_index(documents):
+    """token -> {ordinal: score}, and tag -> document count"""
+    postings = {}
+    tag_counts = {}
+    for ordinal, doc in enumerate(documents):
+        scores = {}
+        for field, texts in document_fields(doc).items():
+            tokens = {token for text in texts for token in tokenize(text)}
+            for token in tokens:
+                scores[token] = scores.get(token, 0) + FIELD_WEIGHTS[field]
+        for token, score in scores.items():
+            postings.setdefault(token, {})[ordinal] = score
+        for tag in set(doc.get('tags') or []):
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+    return postings, tag_counts
+
+
+def encode_postings(scores):
+    """Flat [ordinal delta, score, ...] over ascending ordinals"""
+    flat = []
+    previous = 0
+    for ordinal in sorted(scores):
+        flat += [ordinal - previous, scores[ordinal]]
+        previous = ordinal
+    return flat
+
+
+def build_index_files(json_file):
+    """Build and write the search index directory for one corpus"""
+    with TaggedFilesReader(json_file) as reader:
+        documents = list(reader.documents())
+
+    postings, tag_counts = build_search_index(documents)
+    shards = {}
+    for token in sorted(postings, key=js_sort_key):
+        shards.setdefault(shard_for(token), []).append(token)
+
+    output_dir = Path(json_file).with_suffix('.search')
+    output_dir.mkdir(exist_ok=True)
+    # Shards that no longer have tokens must not be served stale
+    for stale in output_dir.glob('*.json*'):
+        stale.unlink()
+
+    written = []
+    for shard, tokens in sorted(shards.items()):
+        data = {'tokens': tokens, 'postings': [encode_postings(postings[token]) for token in tokens]}
+        written += write_json(output_dir / f"{shard}.json", data)
+
+    manifest = {
+        'format': INDEX_FORMAT,
+        'version': INDEX_VERSION,
+        'count': len(documents),
+        'source': source_hash(json_file),
+        'fields': FIELD_WEIGHTS,
+        'shards': {shard: len(tokens) for shard, tokens in sorted(shards.items())},
+        'tags': [[tag, tag_counts[tag]] for tag in sorted(tag_counts, key=js_sort_key)],
+    }
+    written += write_json(output_dir / 'index.json', manifest)
+
+    total = sum(os.path.getsize(path) for path in written if path.suffix == '.json')
+    compressed = sum(os.path.getsize(path) for path in written if path.suffix == '.gz')
+    print(f"\n{json_file} ({len(documents)} documents)")
+    print(f"  {len(postings)} tokens in {len(shards)} shards, {len(tag_counts)} distinct tags")
+    print(f"  {output_dir}/: {total:,} bytes ({compressed:,} gzipped)")
+    largest = max(shards, key=lambda shard: os.path.getsize(output_dir / f"{shard}.json"))
+    print(f"  Largest shard: {largest}.json ({os.path.getsize(output_dir / f'{largest}.json'):,} bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the navigator full-text search index")
+    parser.add_argument('corpora', nargs='*', default=DEFAULT_CORPORA, help="Corpus JSON files (default: all)")
+    args = parser.parse_args()
+
+    for json_file in args.corpora:
+        if not os.path.exists(json_file):
+            print(f"File not found: {json_file}")
+            continue
+        build_index_files(json_file)
+
+
+if __name__ == "__main__":
+    main()
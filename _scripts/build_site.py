@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Build the site's HTML pages from the templates in metadata/.
+
+metadata/site-config.json lists the pages:
+- "navigators": one entry per corpus. Each page is rendered whole from
+  metadata/navigator-template.html with the entry's title, headings, corpus
+  file, folder filter style ("buttons" or "select") and domain list. The
+  template branches on the corpus's facet profile (facet_counts.py) where
+  the Moderna page reads file types and domains differently. With "buttons",
+  the folder buttons are the corpus's folders, read from its JSON. The
+  script itself doesn't branch in the template: the page's corpus, profile,
+  folder filter style and citation source go into a one-line inline
+  window.NAVIGATOR config ahead of it, so every navigator shares one script.
+- "pages" and "metadataPages": hand-written pages. Only their nav menu is
+  rendered, between the <!-- site-nav --> and <!-- /site-nav --> lines.
+Every page's nav menu comes from metadata/nav-template.html. The File
+Navigator menu lists the navigators by label, and the Clinical Metadata menu
+lists the metadata pages, so adding a corpus means adding one "navigators"
+entry and running this script.
+
+Templates support {{ name }} and {{ name.key }}, {% if name %},
+{% if name == 'value' %} (or !=, or "not name"), {% elif %}, {% else %},
+{% endif %}, {% for item in name %} ... {% endfor %} and
+{% include 'file' %}. A line holding nothing but a {% %} tag is dropped
+from the output. Values are inserted as they are, without HTML escaping.
+
+Navigator pages don't carry their CSS and JS inline: site_assets.py minifies
+them into fingerprinted files under assets/ and the pages link to those, so
+they can be cached long-term. assets/manifest.json lists which page uses
+which file.
+
+Builds are incremental. .site-build.json records a hash of each page's
+inputs: the templates it uses, its config, and the corpus JSON (navigators)
+or the page outside its nav (hand-written pages). It also records a hash of
+the output written. A page is rebuilt only when its inputs have changed,
+its output was edited since or (navigators) one of its asset files is
+missing. Rendered navigator pages say where they come from, so edits go to
+the template and not to the generated page.
+
+Usage (from the repository root):
+    python _scripts/build_site.py
+    python _scripts/build_site.py --force
+    python _scripts/build_site.py --check
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from build_compact_navigator_data import source_hash
+from facet_counts import profile_for
+from site_assets import extract_assets, load_manifest, save_manifest, write_assets
+from tagged_json import iter_documents
+
+TEMPLATE_DIR = 'metadata'
+CONFIG_FILE = 'metadata/site-config.json'
+NAVIGATOR_TEMPLATE = 'navigator-template.html'
+NAV_TEMPLATE = 'nav-template.html'
+STATE_FILE = '.site-build.json'
+STATE_VERSION = 2
+
+NAV_START = '<!-- site-nav -->'
+NAV_END = '<!-- /site-nav -->'
+
+# Domain filter groups by code prefix, as the Moderna page groups them in the browser
+DOMAIN_GROUPS = [
+    ('ad', 'ADaM (Analysis) Datasets'),
+    ('', 'SDTM Domains'),
+    ('supp', 'Supplemental Qualifier Datasets'),
+]
+
+TOKEN_PATTERN = re.compile(r'{{\s*(.+?)\s*}}|{%\s*(.+?)\s*%}')
+# Tags alone on a line take the line's indentation and newline with them
+STANDALONE_TAG = re.compile(r'^[ \t]*({%[^%]*%})[ \t]*\n', re.MULTILINE)
+CONDITION_PATTERN = re.compile(r"(not\s+)?([\w.]+)(?:\s*(==|!=)\s*'([^']*)')?")
+
+_templates = {}
+
+
+def parse_template(text, name):
+    """Template text -> nodes: strings, ('var', name), ('if', [(condition, nodes)...], nodes),
+    ('for', item, name, nodes) and ('include', file)"""
+    text = STANDALONE_TAG.sub(r'\1', text)
+    root = []
+    stack = [(None, root)]
+    position = 0
+
+    def body():
+        return stack[-1][1]
+
+    for match in TOKEN_PATTERN.finditer(text):
+        if match.start() > position:
+            body().append(text[position:match.start()])
+        position = match.end()
+        if match.group(1):
+            body().append(('var', match.group(1)))
+            continue
+        words = match.group(2).split(None, 1)
+        keyword, argument = words[0], words[1] if len(words) > 1 else ''
+        if keyword == 'if':
+            node = ('if', [(argument, [])], [])
+            body().append(node)
+            stack.append((node, node[1][0][1]))
+        elif keyword in ('elif', 'else', 'endif'):
+            node = stack[-1][0]
+            if not node or node[0] != 'if':
+                raise ValueError(f"{name}: {keyword} without if")
+            stack.pop()
+            if keyword == 'elif':
+                node[1].append((argument, []))
+                stack.append((node, node[1][-1][1]))
+            elif keyword == 'else':
+                stack.append((node, node[2]))
+        elif keyword == 'for':
+            item, _, sequence = argument.partition(' in ')
+            node = ('for', item.strip(), sequence.strip(), [])
+            body().append(node)
+            stack.append((node, node[3]))
+        elif keyword == 'endfor':
+            if not stack[-1][0] or stack[-1][0][0] != 'for':
+                raise ValueError(f"{name}: endfor without for")
+            stack.pop()
+        elif keyword == 'include':
+            body().append(('include', argument.strip('\'"')))
+        else:
+            raise ValueError(f"{name}: unknown tag {{% {match.group(2)} %}}")
+    if len(stack) > 1:
+        raise ValueError(f"{name}: unclosed {stack[-1][0][0]}")
+    if position < len(text):
+        root.append(text[position:])
+    return root
+
+
+def load_template(name):
+    if name not in _templates:
+        with open(os.path.join(TEMPLATE_DIR, name), 'r', encoding='utf-8') as f:
+            _templates[name] = parse_template(f.read(), name)
+    return _templates[name]
+
+
+def template_files(name):
+    """A template and every template it includes"""
+    files = [name]
+
+    def walk(nodes):
+        for node in nodes:
+            if isinstance(node, str):
+                continue
+            if node[0] == 'include' and node[1] not in files:
+                files.append(node[1])
+                walk(load_template(node[1]))
+            elif node[0] == 'if':
+                for _, branch in node[1]:
+                    walk(branch)
+                walk(node[2])
+            elif node[0] == 'for':
+                walk(node[3])
+
+    walk(load_template(name))
+    return files
+
+
+def lookup(name, context):
+    value = context
+    for part in name.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            raise ValueError(f"Undefined template variable: {name}")
+        value = value[part]
+    return value
+
+
+def evaluate(condition, context):
+    match = CONDITION_PATTERN.fullmatch(condition)
+    if not match:
+        raise ValueError(f"Unsupported template condition: {condition}")
+    negate, name, operator, literal = match.groups()
+    value = lookup(name, context)
+    if operator == '==':
+        result = value == literal
+    elif operator == '!=':
+        result = value != literal
+    else:
+        result = bool(value)
+    return not result if negate else result
+
+
+def render(nodes, context):
+    output = []
+    for node in nodes:
+        if isinstance(node, str):
+            output.append(node)
+        elif node[0] == 'var':
+            output.append(str(lookup(node[1], context)))
+        elif node[0] == 'if':
+            branch = next((nodes for condition, nodes in node[1] if evaluate(condition, context)), node[2])
+            output.append(render(branch, context))
+        elif node[0] == 'for':
+            for item in lookup(node[2], context):
+                output.append(render(node[3], dict(context, **{node[1]: item})))
+        elif node[0] == 'include':
+            output.append(render(load_template(node[1]), context))
+    return ''.join(output)
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_config(path=CONFIG_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def menu_config(config):
+    """The parts of the config that every page's nav menu depends on"""
+    return {
+        'navigators': [[entry['page'], entry['menuLabel']] for entry in config['navigators']],
+        'metadataPages': config['metadataPages'],
+    }
+
+
+def relative_link(target, page):
+    return os.path.relpath(target, os.path.dirname(page) or '.').replace(os.sep, '/')
+
+
+def nav_context(page, config):
+    """Variables for nav-template.html on one page"""
+    metadata_pages = [entry['page'] for entry in config['metadataPages']]
+    navigators = sorted(config['navigators'], key=lambda entry: entry['menuLabel'])
+    return {
+        'page': page,
+        'root': relative_link('.', page) + '/' if os.path.dirname(page) else '',
+        'navigatorLinks': [{'href': relative_link(entry['page'], page), 'label': entry['menuLabel']}
+                           for entry in navigators],
+        'metadataActive': page in metadata_pages,
+        'metadataLinks': [{'href': relative_link(entry['page'], page), 'label': entry['label'],
+                           'active': entry['page'] == page}
+                          for entry in config['metadataPages']],
+    }
+
+
+def domain_prefix(code):
+    return 'ad' if code.startswith('ad') else 'supp' if code.startswith('supp') else ''
+
+
+def domain_groups(codes, labels):
+    """The domain filter's option groups, codes sorted within each; unlabelled codes
+    get the page's own fallback label"""
+    groups = {prefix: [] for prefix, _ in DOMAIN_GROUPS}
+    for code in sorted(codes):
+        groups[domain_prefix(code)].append({'code': code, 'description': labels.get(code, code.upper())})
+    return [{'label': label, 'domains': groups[prefix]} for prefix, label in DOMAIN_GROUPS if groups[prefix]]
+
+
+def corpus_folders(json_file):
+    return sorted({doc['folder'] for doc in iter_documents(json_file) if doc.get('folder')})
+
+
+def navigator_context(entry, config):
+    """Variables for navigator-template.html on one navigator page"""
+    labels = config['domainLabels']
+    context = dict(entry)
+    context.update(nav_context(entry['page'], config))
+    corpus_base = Path(entry['corpus']).stem
+    profile = profile_for(entry['corpus'])
+    context.update({
+        'corpusBase': corpus_base,
+        'profile': profile,
+        'canonical': f"{config['siteUrl']}/{entry['page']}",
+        'domainGroups': domain_groups(entry['domains'], labels),
+        'domainDefinitions': [{'code': code, 'description': description,
+                               'separator': ',' if i < len(labels) - 1 else ''}
+                              for i, (code, description) in enumerate(labels.items())],
+    })
+    # Everything the shared script needs to know about the page, as JSON for window.NAVIGATOR
+    page_config = {'profile': profile, 'corpusBase': corpus_base, 'folderFilter': entry['folderFilter'],
+                   'citationSource': entry['citationSource']}
+    context['navigatorConfig'] = json.dumps(page_config).replace('</', '<\\/')
+    if entry['folderFilter'] == 'buttons':
+        context['folders'] = corpus_folders(entry['corpus'])
+    return context
+
+
+def navigator_inputs(entry, config):
+    templates = template_files(NAVIGATOR_TEMPLATE)
+    return {
+        'templates': {name: file_hash(os.path.join(TEMPLATE_DIR, name)) for name in templates},
+        'entry': entry,
+        'site': [config['siteUrl'], config['domainLabels'], menu_config(config)],
+        'data': source_hash(entry['corpus']),
+    }
+
+
+def render_navigator(entry, config):
+    return render(load_template(NAVIGATOR_TEMPLATE), navigator_context(entry, config))
+
+
+def split_nav(text, page):
+    """A hand-written page as (before the nav, the nav, after the nav)"""
+    start = text.find(NAV_START)
+    end = text.find(NAV_END)
+    if start < 0 or end < start:
+        raise ValueError(f"{page}: no {NAV_START} ... {NAV_END} lines around the nav menu")
+    start = text.index('\n', start) + 1
+    end = text.rindex('\n', 0, end) + 1
+    return text[:start], text[start:end], text[end:]
+
+
+def page_inputs(page, text, config):
+    before, _, after = split_nav(text, page)
+    return {
+        'templates': {NAV_TEMPLATE: file_hash(os.path.join(TEMPLATE_DIR, NAV_TEMPLATE))},
+        'menu': menu_config(config),
+        'page': text_hash(before + after),
+    }
+
+
+def render_page(page, text, config):
+    before, _, after = split_nav(text, page)
+    return before + render(load_template(NAV_TEMPLATE), nav_context(page, config)) + after
+
+
+def read_text(path):
+    # newline='' keeps the pages' line endings as they are
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def load_state(path=STATE_FILE):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') == STATE_VERSION:
+            return state
+    return {'version': STATE_VERSION, 'pages': {}}
+
+
+def save_state(state, path=STATE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def assets_present(entry):
+    return bool(entry) and all(os.path.exists(asset['file']) for asset in entry.values())
+
+
+def build_site(config, state, manifest, force=False, check=False):
+    """Render the pages whose inputs changed; returns the pages whose output changed"""
+    changed = []
+    jobs = [(entry['page'], entry) for entry in config['navigators']]
+    jobs += [(page, None) for page in config['pages'] + [entry['page'] for entry in config['metadataPages']]]
+    for page, entry in jobs:
+        current = read_text(page) if os.path.exists(page) else None
+        if entry is not None:
+            inputs = navigator_inputs(entry, config)
+        elif current is None:
+            print(f"  {page}: not found")
+            continue
+        else:
+            inputs = page_inputs(page, current, config)
+        inputs_hash = text_hash(json.dumps(inputs, sort_keys=True))
+
+        recorded = state['pages'].get(page, {})
+        up_to_date = (current is not None and recorded.get('inputs') == inputs_hash
+                      and recorded.get('output') == text_hash(current))
+        if entry is not None:
+            up_to_date = up_to_date and assets_present(manifest['pages'].get(page))
+        if up_to_date and not force and not check:
+            continue
+
+        if entry is not None:
+            output, assets, files = extract_assets(page, render_navigator(entry, config))
+            stale = not assets_present(assets)
+            manifest['pages'][page] = assets
+        else:
+            output = render_page(page, current, config)
+            stale = False
+        if output != current or stale:
+            changed.append(page)
+            if check:
+                print(f"  {page}: out of date")
+                continue
+            if entry is not None:
+                write_assets(files)
+            with open(page, 'w', encoding='utf-8', newline='') as f:
+                f.write(output)
+            print(f"  {page}: rebuilt")
+        if not check:
+            state['pages'][page] = {'inputs': inputs_hash, 'output': text_hash(output)}
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the site pages from the templates in metadata/")
+    parser.add_argument('--force', action='store_true', help="Render every page, even if its inputs are unchanged")
+    parser.add_argument('--check', action='store_true',
+                        help="Render every page and report the ones that differ, without writing anything")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    config = load_config()
+    state = load_state()
+    manifest = load_manifest()
+    changed = build_site(config, state, manifest, force=args.force, check=args.check)
+
+    if args.check:
+        elapsed = time.perf_counter() - started
+        print(f"{len(changed)} pages out of date ({elapsed:.2f}s)")
+        sys.exit(1 if changed else 0)
+    removed = save_manifest(manifest, [entry['page'] for entry in config['navigators']])
+    for path in removed:
+        print(f"  {path}: removed")
+    save_state(state)
+    elapsed = time.perf_counter() - started
+    print(f"{len(changed)} pages rebuilt ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+Local HTTP query API over the tagged-files corpora, backed by SQLite.
+
+"build" loads the corpora into corpus-api.db:
+- documents: one row per document, with its corpus position (ordinal), the
+  columns it is sorted by and the full document as JSON
+- facets:    (document, facet, value) rows for every navigator filter facet
+             (facet_counts.py) plus tags. "counted" marks the values a
+             document is counted under and "matched" the filter values that
+             keep it; the two differ where the pages' rules do (a "-sas.pdf"
+             file counts as "sas" but matches the "pdf" filter too).
+             Partial indexes cover filtering and counting.
+- search:    an FTS5 table over title, tags and people mentioned
+- corpora:   each corpus's source hash (build_compact_navigator_data.py);
+             a corpus is reloaded only when its JSON has changed
+
+"serve" (building first if needed) answers, as JSON:
+    GET /corpora
+    GET /documents?corpus=<name>&<filters>&q=<words>&sort=<column>&order=asc|desc&page=1&pageSize=50
+    GET /facets?corpus=<name>&<filters>&q=<words>
+The corpus name is its file name without .json. Filters are folder, module,
+fileType, documentType, domain, vaccineCandidate, clinicalTrial (a value
+of "all" is ignored, as on the pages) and tag, which may be repeated; a
+document must match all of them. q keeps documents containing every word,
+the last one as a prefix, and sorts them by relevance (bm25, weighted as
+build_search_index.py weights the fields) unless sort is given.
+
+Every response carries an ETag derived from the database's corpus hashes
+and the normalized query. A request with a matching If-None-Match gets a 304
+without touching the database, and recent responses are kept in memory.
+Responses are gzipped for clients that accept it. The server is a single
+asyncio loop; queries run on a small thread pool, one read-only SQLite
+connection per thread.
+
+Usage (from the repository root):
+    python _scripts/corpus_api.py build
+    python _scripts/corpus_api.py serve --port 8765
+    python _scripts/load_test_api.py --url http://127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from build_compact_navigator_data import source_hash
+from build_search_index import FIELD_WEIGHTS, tokenize
+from facet_counts import TOP_TAG_COUNT, facet_rules, navigator_row, profile_for
+from tagged_json import iter_documents
+
+DATABASE_FILE = 'corpus-api.db'
+SCHEMA_VERSION = 1
+
+DEFAULT_CORPORA = [
+    'pd-bla-tagged-files.json',
+    'pfizer-eua-tagged-files.json',
+    'moderna-tagged-files.json',
+]
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+FILTER_FACETS = ['folder', 'module', 'fileType', 'documentType', 'domain', 'vaccineCandidate', 'clinicalTrial']
+SORT_COLUMNS = {
+    'filename': 'filename',
+    'title': 'title',
+    'date': 'date',
+    'documentType': 'document_type',
+    'folder': 'folder',
+    'ordinal': 'ordinal',
+}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Pages past this are clamped to it: far past any corpus, and keeps OFFSET within SQLite's 64-bit range
+MAX_PAGE = 1_000_000
+
+# Responses kept in memory, by ETag
+RESPONSE_CACHE_SIZE = 512
+# Bodies smaller than this are sent uncompressed
+GZIP_MIN_BYTES = 1024
+# Longest request head accepted
+MAX_HEADER_BYTES = 16 * 1024
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS corpora (
+        name TEXT PRIMARY KEY,
+        file TEXT NOT NULL,
+        source TEXT NOT NULL,
+        profile TEXT NOT NULL,
+        document_count INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY,
+        corpus TEXT NOT NULL,
+        ordinal INTEGER NOT NULL,
+        filename TEXT NOT NULL,
+        title TEXT,
+        date TEXT,
+        document_type TEXT,
+        folder TEXT,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS facets (
+        document_id INTEGER NOT NULL,
+        corpus TEXT NOT NULL,
+        facet TEXT NOT NULL,
+        value TEXT NOT NULL,
+        counted INTEGER NOT NULL,
+        matched INTEGER NOT NULL
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(title, tags, people);
+    CREATE INDEX IF NOT EXISTS idx_documents_corpus ON documents(corpus, ordinal);
+    CREATE INDEX IF NOT EXISTS idx_facets_filter ON facets(corpus, facet, value, document_id) WHERE matched;
+    CREATE INDEX IF NOT EXISTS idx_facets_count ON facets(document_id, facet, value) WHERE counted;
+"""
+
+
+def corpus_name(json_file):
+    return Path(json_file).stem
+
+
+def open_database(path=DATABASE_FILE):
+    conn = sqlite3.connect(path)
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version != SCHEMA_VERSION:
+        conn.executescript("""
+            DROP TABLE IF EXISTS corpora;
+            DROP TABLE IF EXISTS documents;
+            DROP TABLE IF EXISTS facets;
+            DROP TABLE IF EXISTS search;
+        """)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def facet_rows(rows, profile):
+    """(ordinal, facet, value, counted, matched) for every facet value of every row,
+    with the filter values found the same way as the bitmap index finds them"""
+    result = []
+    for facet, (keys, matches) in facet_rules(profile).items():
+        row_keys = [set(keys(row)) for row in rows]
+        values = {'none': None} if facet == 'module' else {}
+        for counted in row_keys:
+            values.update(dict.fromkeys(sorted(counted)))
+        for ordinal, row in enumerate(rows):
+            matched = {value for value in values if matches(row, value)}
+            for value in sorted(row_keys[ordinal] | matched):
+                result.append((ordinal, facet, value, value in row_keys[ordinal], value in matched))
+    for ordinal, row in enumerate(rows):
+        for tag in dict.fromkeys(row['tags']):
+            result.append((ordinal, 'tags', tag, True, True))
+    return result
+
+
+def load_corpus(conn, json_file):
+    """Replace one corpus's rows; returns its document count"""
+    name = corpus_name(json_file)
+    profile = profile_for(json_file)
+    documents = list(iter_documents(json_file))
+    rows = [navigator_row(doc) for doc in documents]
+
+    conn.execute('DELETE FROM search WHERE rowid IN (SELECT id FROM documents WHERE corpus = ?)', (name,))
+    conn.execute('DELETE FROM facets WHERE corpus = ?', (name,))
+    conn.execute('DELETE FROM documents WHERE corpus = ?', (name,))
+
+    ids = []
+    for ordinal, (doc, row) in enumerate(zip(documents, rows)):
+        cursor = conn.execute(
+            'INSERT INTO documents (corpus, ordinal, filename, title, date, document_type, folder, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (name, ordinal, doc['filename'], doc.get('title'), doc.get('date'), row['documentType'],
+             doc.get('folder'), json.dumps(doc, ensure_ascii=False, separators=(',', ':'))))
+        ids.append(cursor.lastrowid)
+        conn.execute('INSERT INTO search (rowid, title, tags, people) VALUES (?, ?, ?, ?)',
+                     (cursor.lastrowid, doc.get('title') or '', '\n'.join(doc.get('tags') or []),
+                      '\n'.join(doc.get('peopleMentioned') or [])))
+    conn.executemany(
+        'INSERT INTO facets (document_id, corpus, facet, value, counted, matched) VALUES (?, ?, ?, ?, ?, ?)',
+        ((ids[ordinal], name, facet, value, counted, matched)
+         for ordinal, facet, value, counted, matched in facet_rows(rows, profile)))
+    conn.execute('INSERT OR REPLACE INTO corpora (name, file, source, profile, document_count) VALUES (?, ?, ?, ?, ?)',
+                 (name, os.path.basename(json_file), source_hash(json_file), profile, len(documents)))
+    return len(documents)
+
+
+def build_database(corpora, path=DATABASE_FILE, force=False):
+    """Load the corpora whose JSON changed since the last build; returns the names loaded"""
+    conn = open_database(path)
+    loaded = []
+    try:
+        recorded = dict(conn.execute('SELECT name, source FROM corpora'))
+        for json_file in corpora:
+            if not os.path.exists(json_file):
+                print(f"  {json_file}: not found")
+                continue
+            name = corpus_name(json_file)
+            if not force and recorded.get(name) == source_hash(json_file):
+                continue
+            with conn:
+                count = load_corpus(conn, json_file)
+            loaded.append(name)
+            print(f"  {name}: {count} documents loaded")
+        conn.execute('PRAGMA optimize')
+    finally:
+        conn.close()
+    return loaded
+
+
+def database_version(conn):
+    """Hash of every loaded corpus's source: changes whenever any answer could"""
+    rows = conn.execute('SELECT name, source FROM corpora ORDER BY name').fetchall()
+    return hashlib.sha1(json.dumps(rows).encode('utf-8')).hexdigest()[:16]
+
+
+def fts_query(text):
+    """FTS5 query for the words of a search box: all of them, the last as a prefix"""
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens[:-1]] + [f'"{tokens[-1]}"*']
+    return ' AND '.join(terms)
+
+
+def single(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def positive_int(params, name, default, maximum=None):
+    value = single(params, name)
+    if value is None:
+        return default
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f"{name} must be a positive integer")
+    return min(int(value), maximum) if maximum else int(value)
+
+
+def filter_clause(params):
+    """SQL restricting d.id to the documents matching the filters and search, and its arguments"""
+    corpus = single(params, 'corpus')
+    if not corpus:
+        raise ValueError("corpus is required")
+    clauses = ['d.corpus = ?']
+    args = [corpus]
+    filters = [(facet, single(params, facet)) for facet in FILTER_FACETS]
+    filters += [('tags', tag) for tag in params.get('tag', [])]
+    for facet, value in filters:
+        if value is None or value == 'all':
+            continue
+        clauses.append('d.id IN (SELECT document_id FROM facets WHERE matched '
+                       'AND corpus = ? AND facet = ? AND value = ?)')
+        args += [corpus, facet, value]
+    query = fts_query(single(params, 'q', ''))
+    if query:
+        clauses.append('d.id IN (SELECT rowid FROM search WHERE search MATCH ?)')
+        args.append(query)
+    return ' AND '.join(clauses), args, query
+
+
+def check_corpus(conn, params):
+    corpus = single(params, 'corpus')
+    if corpus and not conn.execute('SELECT 1 FROM corpora WHERE name = ?', (corpus,)).fetchone():
+        raise LookupError(f"Unknown corpus: {corpus}")
+
+
+def list_corpora(conn, params):
+    return {
+        'version': database_version(conn),
+        'corpora': [{'name': name, 'file': file, 'source': source, 'profile': profile, 'documents': count}
+                    for name, file, source, profile, count in
+                    conn.execute('SELECT name, file, source, profile, document_count FROM corpora ORDER BY name')],
+    }
+
+
+def query_documents(conn, params):
+    """One page of the matching documents"""
+    check_corpus(conn, params)
+    where, args, search = filter_clause(params)
+    page = positive_int(params, 'page', 1, MAX_PAGE)
+    page_size = positive_int(params, 'pageSize', DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    sort = single(params, 'sort', 'relevance' if search else 'filename')
+    order = single(params, 'order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be asc or desc")
+
+    total = conn.execute(f'SELECT COUNT(*) FROM documents d WHERE {where}', args).fetchone()[0]
+    if sort == 'relevance':
+        if not search:
+            raise ValueError("sort=relevance needs q")
+        weights = ', '.join(str(FIELD_WEIGHTS[field]) for field in ('title', 'tags', 'peopleMentioned'))
+        # bm25() is lower for better matches
+        sql = (f'SELECT d.ordinal, d.data FROM documents d '
+               f'JOIN (SELECT rowid, bm25(search, {weights}) AS rank FROM search WHERE search MATCH ?) s '
+               f'ON s.rowid = d.id WHERE {where} '
+               f'ORDER BY s.rank {"DESC" if order == "desc" else "ASC"}, d.ordinal LIMIT ? OFFSET ?')
+        args = [search] + args
+    elif sort in SORT_COLUMNS:
+        sql = (f'SELECT d.ordinal, d.data FROM documents d WHERE {where} '
+               f'ORDER BY d.{SORT_COLUMNS[sort]} {order.upper()}, d.ordinal LIMIT ? OFFSET ?')
+    else:
+        raise ValueError(f"sort must be one of: relevance, {', '.join(SORT_COLUMNS)}")
+
+    rows = conn.execute(sql, args + [page_size, (page - 1) * page_size]).fetchall()
+    return {
+        'corpus': single(params, 'corpus'),
+        'total': total,
+        'page': page,
+        'pageSize': page_size,
+        'documents': [dict(json.loads(data), ordinal=ordinal) for ordinal, data in rows],
+    }
+
+
+def query_facets(conn, params):
+    """Counts per facet over the matching documents, largest first; the top tags only"""
+    check_corpus(conn, params)
+    where, args, _ = filter_clause(params)
+    total = conn.execute(f'SELECT COUNT(*) FROM documents d WHERE {where}', args).fetchone()[0]
+    counts = {facet: {} for facet in FILTER_FACETS + ['tags']}
+    rows = conn.execute(
+        f'SELECT f.facet, f.value, COUNT(*) AS n FROM facets f '
+        f'WHERE f.counted AND f.document_id IN (SELECT d.id FROM documents d WHERE {where}) '
+        f'GROUP BY f.facet, f.value ORDER BY f.facet, n DESC, f.value', args)
+    for facet, value, count in rows:
+        if facet != 'tags' or len(counts[facet]) < TOP_TAG_COUNT:
+            counts[facet][value] = count
+    return {'corpus': single(params, 'corpus'), 'total': total, 'counts': counts}
+
+
+ROUTES = {
+    '/corpora': list_corpora,
+    '/documents': query_documents,
+    '/facets': query_facets,
+}
+
+
+class ResponseCache:
+    """Least recently used encoded responses, by ETag"""
+
+    def __init__(self, size=RESPONSE_CACHE_SIZE):
+        self.size = size
+        self._items = OrderedDict()
+
+    def get(self, key):
+        if key in self._items:
+            self._items.move_to_end(key)
+            return self._items[key]
+        return None
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+
+class CorpusApiServer:
+    def __init__(self, db_path=DATABASE_FILE, workers=4):
+        self.db_path = db_path
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.cache = ResponseCache()
+        self._local = threading.local()
+        self._db_mtime = None
+        self._version = None
+
+    def connection(self):
+        """This worker thread's read-only connection"""
+        if not hasattr(self._local, 'conn'):
+            uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+            self._local.conn = sqlite3.connect(uri, uri=True)
+        return self._local.conn
+
+    def version(self):
+        """The database version, re-read (and the cache emptied) when the file changes"""
+        mtime = os.stat(self.db_path).st_mtime_ns
+        if mtime != self._db_mtime:
+            conn = sqlite3.connect(Path(self.db_path).resolve().as_uri() + '?mode=ro', uri=True)
+            try:
+                self._version = database_version(conn)
+            finally:
+                conn.close()
+            self._db_mtime = mtime
+            self.cache.clear()
+        return self._version
+
+    def run_query(self, handler, params):
+        started = time.perf_counter()
+        result = handler(self.connection(), params)
+        body = json.dumps(result, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return body, time.perf_counter() - started
+
+    async def respond(self, method, target, headers):
+        """(status, headers, body) for one request"""
+        if method not in ('GET', 'HEAD'):
+            return 405, {'Allow': 'GET, HEAD'}, error_body("Only GET and HEAD are supported")
+        url = urlsplit(target)
+        handler = ROUTES.get(url.path.rstrip('/') or '/')
+        if handler is None:
+            return 404, {}, error_body(f"Unknown path {url.path}; try {', '.join(ROUTES)}")
+        params = parse_qs(url.query)
+        normalized = urlencode(sorted((name, value) for name, values in params.items() for value in values))
+        etag = '"' + hashlib.sha1(f"{self.version()}\n{url.path}\n{normalized}".encode('utf-8')).hexdigest()[:20] + '"'
+        response_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return 304, response_headers, b''
+        cached = self.cache.get(etag)
+        if cached is None:
+            try:
+                body, elapsed = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self.run_query, handler, params)
+            except ValueError as e:
+                return 400, {}, error_body(str(e))
+            except LookupError as e:
+                return 404, {}, error_body(str(e.args[0]))
+            compressed = gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+            cached = (body, compressed)
+            self.cache.put(etag, cached)
+            response_headers['Server-Timing'] = f'db;dur={elapsed * 1000:.1f}'
+
+        body, compressed = cached
+        if compressed is not None and 'gzip' in headers.get('accept-encoding', ''):
+            body = compressed
+            response_headers['Content-Encoding'] = 'gzip'
+        return 200, response_headers, body
+
+    async def handle(self, reader, writer):
+        """Serve the requests on one connection, keeping it open when the client asks to"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                if headers.get('content-length', '0').isdigit() and int(headers.get('content-length', '0')):
+                    await reader.readexactly(int(headers['content-length']))
+
+                try:
+                    status, response_headers, body = await self.respond(method, target, headers)
+                except Exception as e:
+                    # e.g. a locked database during a rebuild: answer rather than drop the connection
+                    print(f"Error serving {target}: {type(e).__name__}: {e}")
+                    status, response_headers, body = 500, {}, error_body("Internal server error")
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close') or \
+                    headers.get('connection', '').lower() == 'keep-alive'
+                writer.write(response_head(status, response_headers, len(body), keep_alive))
+                if method != 'HEAD' and status != 304:
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        print(f"Serving {self.db_path} on http://{host}:{port}/ (Ctrl+C to stop)")
+        async with server:
+            await server.serve_forever()
+
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error'}
+
+
+def error_body(message):
+    return json.dumps({'error': message}).encode('utf-8')
+
+
+def response_head(status, headers, length, keep_alive):
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}"]
+    headers = dict(headers, **{
+        'Content-Type': 'application/json; charset=utf-8',
+        'Content-Length': str(length),
+        'Access-Control-Allow-Origin': '*',
+        'Vary': 'Accept-Encoding',
+        'Connection': 'keep-alive' if keep_alive else 'close',
+    })
+    if status == 304:
+        del headers['Content-Length']
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query API over the tagged-files corpora")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help=f"Load the corpora into {DATABASE_FILE}")
+    build.add_argument('corpora', nargs='*', default=DEFAULT_CORPORA, help="Corpus JSON files (default: all)")
+    build.add_argument('--force', action='store_true', help="Reload every corpus, even if unchanged")
+    serve = subparsers.add_parser('serve', help="Build if needed, then serve the API")
+    serve.add_argument('--host', default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    serve.add_argument('--workers', type=int, default=4, help="Query threads (default: 4)")
+    for subparser in (build, serve):
+        subparser.add_argument('--db', default=DATABASE_FILE, help=f"Database file (default: {DATABASE_FILE})")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    loaded = build_database(args.corpora if args.command == 'build' else DEFAULT_CORPORA, args.db,
+                            force=args.command == 'build' and args.force)
+    print(f"{len(loaded)} corpora loaded into {args.db} ({time.perf_counter() - started:.2f}s)")
+    if args.command == 'serve':
+        try:
+            asyncio.run(CorpusApiServer(args.db, args.workers).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            print("\nStopped")
+
+
+if __name__ == "__main__":
+    main()
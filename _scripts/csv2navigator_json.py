@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Convert the tagged-files CSVs into navigator JSON for every sponsor.
+
+One converter, driven by a per-corpus schema (SCHEMAS below), replaces the
+separate Pfizer BLA, Moderna and Pfizer EUA converters. Each schema lists the
+output fields in order with the rule that fills them; the rules are columnar
+pandas operations over the whole CSV rather than per-row Python.
+
+The schemas keep each corpus's existing conventions, so the differences are
+explicit instead of buried in separate scripts:
+- Pfizer BLA: year-only dates, title-cased document types, module left null
+- Moderna: module taken from the filename/tags, defaulting to M5; also writes
+  the navigator-format CSV (moderna-tagged-files.csv)
+- Pfizer EUA: source is already in navigator format (fields trimmed); adds the
+  metadata block
+
+The output is what the enrichment passes start from; run
+enrichment_pipeline.py afterwards to add trials, candidates and eCRF titles.
+
+Usage (from the repository root):
+    python _scripts/csv2navigator_json.py                 # all corpora
+    python _scripts/csv2navigator_json.py moderna --output-dir /tmp/out
+"""
+
+import argparse
+import csv
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tagged_json import TaggedFilesReader, TaggedFilesWriter
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Field spec: (output key, rule, source column, options)
+SCHEMAS = {
+    'pfizer-bla': {
+        'source': 'pd_bla_tagged_files_20250812_011628.csv',
+        'output': 'pd-bla-tagged-files.json',
+        'ensure_ascii': False,
+        'fields': [
+            ('filename', 'text', 'filename', {}),
+            ('title', 'text', 'title', {}),
+            ('date', 'year', 'date', {}),
+            ('googleDriveLink', 'text', 'google_drive_link', {}),
+            ('folder', 'text', 'folder', {}),
+            ('fileType', 'file_type', 'file_extension', {'fallback_to_filename': True}),
+            ('pageCount', 'integer', 'page_count', {}),
+            ('module', 'text_or_null', 'modules', {}),
+            ('documentType', 'title_case_or_null', 'document_type', {}),
+            ('peopleMentioned', 'list', 'people_mentioned', {}),
+            ('tags', 'list', 'tags', {}),
+            ('hasExemption', 'boolean', 'has_exemption', {}),
+            ('hasExclusion', 'boolean', 'has_exclusion', {}),
+            ('passwordProtected', 'boolean', 'password_protected', {}),
+            ('processed', 'boolean', 'processed', {'missing': 'true'}),
+            ('vaccineCandidate', 'constant', None, {'value': None}),
+            ('clinicalTrial', 'constant', None, {'value': None}),
+            ('hasCRF', 'boolean', 'has_crf', {'optional': True}),
+            ('hasProtocol', 'boolean', 'has_protocol', {'optional': True}),
+            ('contentHash', 'text_or_null', 'content_hash', {'optional': True}),
+            ('textSimhash', 'text_or_null', 'text_simhash', {'optional': True}),
+        ],
+    },
+    'moderna': {
+        'source': 'moderna_tagged_files.csv',
+        'output': 'moderna-tagged-files.json',
+        'ensure_ascii': False,
+        'fields': [
+            ('filename', 'text', 'filename', {}),
+            ('title', 'text', 'title', {}),
+            ('date', 'text', 'date', {}),
+            ('googleDriveLink', 'text', 'google_drive_link', {}),
+            ('folder', 'text', 'folder', {}),
+            ('fileType', 'file_type', 'file_extension', {}),
+            ('pageCount', 'integer', 'page_count', {}),
+            ('module', 'module', 'filename', {'tags_column': 'tags', 'default': 'M5'}),
+            ('documentType', 'text', 'document_type', {}),
+            ('peopleMentioned', 'list', 'people_mentioned', {'separators': r'[,;]'}),
+            ('tags', 'list', 'tags', {}),
+            ('hasExemption', 'constant', None, {'value': False}),
+            ('hasExclusion', 'constant', None, {'value': False}),
+            ('passwordProtected', 'boolean', 'password_protected', {'true_values': ['true']}),
+            ('processed', 'boolean', 'claude_parse_flag', {'true_values': ['1'], 'case_sensitive': True}),
+            ('vaccineCandidate', 'constant', None, {'value': 'mRNA-1273'}),
+            ('clinicalTrial', 'constant', None, {'value': 'COVE'}),  # Primary Moderna trial name
+            ('contentHash', 'text_or_null', 'content_hash', {'optional': True}),
+            ('textSimhash', 'text_or_null', 'text_simhash', {'optional': True}),
+        ],
+        # Navigator-format CSV, the same layout as pfizer-eua-tagged-files.csv
+        'navigator_csv': {
+            'output': 'moderna-tagged-files.csv',
+            'fields': [
+                ('filename', 'text', 'filename', {}),
+                ('title', 'text', 'title', {}),
+                ('date', 'text', 'date', {}),
+                ('google_drive_link', 'text', 'google_drive_link', {}),
+                ('folder', 'text', 'folder', {}),
+                ('file_type', 'file_type', 'file_extension', {}),
+                ('page_count', 'text', 'page_count', {}),
+                ('module', 'module', 'filename', {'tags_column': 'tags', 'default': 'M5'}),
+                ('document_type', 'text', 'document_type', {}),
+                ('people_mentioned', 'text', 'people_mentioned', {}),
+                ('tags', 'joined_list', 'tags', {}),
+                ('has_exemption', 'constant', None, {'value': False}),
+                ('has_exclusion', 'constant', None, {'value': False}),
+                ('password_protected', 'text', 'password_protected', {}),
+                ('processed', 'boolean', 'claude_parse_flag', {'true_values': ['1'], 'case_sensitive': True}),
+            ],
+        },
+    },
+    'pfizer-eua': {
+        'source': 'pfizer-eua-tagged-files.csv',
+        'output': 'pfizer-eua-tagged-files.json',
+        'ensure_ascii': True,
+        'metadata': True,
+        'strip_values': True,  # the EUA CSV was always read with every field trimmed
+        'fields': [
+            ('filename', 'text', 'filename', {}),
+            ('title', 'text', 'title', {}),
+            ('date', 'text', 'date', {}),
+            ('googleDriveLink', 'text', 'google_drive_link', {}),
+            ('folder', 'text', 'folder', {}),
+            ('fileType', 'text', 'file_type', {}),
+            ('pageCount', 'integer', 'page_count', {'leading_digits': True}),
+            ('module', 'text', 'module', {}),
+            ('documentType', 'text', 'document_type', {}),
+            ('peopleMentioned', 'list', 'people_mentioned', {}),
+            ('tags', 'list', 'tags', {}),
+            ('hasExemption', 'boolean', 'has_exemption', {'true_values': ['True'], 'case_sensitive': True}),
+            ('hasExclusion', 'boolean', 'has_exclusion', {'true_values': ['True'], 'case_sensitive': True}),
+            ('passwordProtected', 'boolean', 'password_protected', {'true_values': ['True'], 'case_sensitive': True}),
+            ('processed', 'boolean', 'processed', {'true_values': ['True'], 'case_sensitive': True}),
+            ('contentHash', 'text_or_null', 'content_hash', {'optional': True}),
+            ('textSimhash', 'text_or_null', 'text_simhash', {'optional': True}),
+        ],
+    },
+}
+
+MODULE_PATTERN = r'[_\s]M(\d+)[_\s]'
+
+
+def _column(df, column, options):
+    """Source column as strings ('' for blanks); a constant Series if the CSV lacks it"""
+    if column in df.columns:
+        return df[column]
+    return pd.Series(options.get('missing', ''), index=df.index, dtype=object)
+
+
+def _split_list(series, separators=','):
+    """Split delimited strings into lists of stripped, non-empty items (explode + regroup)"""
+    if series.empty:
+        # an empty CSV: np.split below would still return one (empty) part
+        return pd.Series([], index=series.index, dtype=object)
+    items = series.str.split(separators, regex=len(separators) > 1).explode().str.strip()
+    items = items[items.notna() & (items != '')]
+    # explode keeps row order, so each row's items are contiguous: cut them by count
+    positions = series.index.get_indexer(items.index)
+    bounds = np.cumsum(np.bincount(positions, minlength=len(series)))[:-1]
+    lists = [part.tolist() for part in np.split(items.to_numpy(dtype=object), bounds)]
+    return pd.Series(lists, index=series.index, dtype=object)
+
+
+def rule_text(df, column, options):
+    return _column(df, column, options)
+
+
+def rule_text_or_null(df, column, options):
+    values = _column(df, column, options)
+    return values.where(values != '', None)
+
+
+def rule_title_case_or_null(df, column, options):
+    values = _column(df, column, options)
+    return values.str.replace('-', ' ', regex=False).str.title().where(values != '', None)
+
+
+def rule_year(df, column, options):
+    """YYYY from YYYY[-MM[-DD]] dates; null for blank/'undated'; anything else as-is"""
+    values = _column(df, column, options)
+    year = values.str[:4]
+    values = values.where(~(year.str.len().eq(4) & year.str.isdigit()), year)
+    return values.where(~values.isin(['', 'undated']), None)
+
+
+def rule_file_type(df, column, options):
+    """Upper-cased extension without the dot; optionally taken from the filename when blank"""
+    values = _column(df, column, options).str.upper().str.removeprefix('.')
+    if options.get('fallback_to_filename'):
+        from_name = df['filename'].str.rsplit('.', n=1).str[-1].str.upper()
+        values = values.where(values != '', from_name.where(df['filename'].str.contains('.', regex=False), ''))
+    return values
+
+
+def rule_integer(df, column, options):
+    """Digits-only values as int, else 0 (leading_digits: parseInt-style prefix)"""
+    values = _column(df, column, options)
+    if options.get('leading_digits'):
+        digits = values.str.extract(r'^\s*([+-]?\d+)', expand=False)
+        return digits.fillna('0').astype(int)
+    return values.where(values.str.isdigit(), '0').astype(int)
+
+
+def rule_boolean(df, column, options):
+    values = _column(df, column, options)
+    if not options.get('case_sensitive'):
+        values = values.str.lower()
+    return values.isin(options.get('true_values', ['true', 'yes', '1']))
+
+
+def rule_list(df, column, options):
+    return _split_list(_column(df, column, options), options.get('separators', ','))
+
+
+def rule_joined_list(df, column, options):
+    return rule_list(df, column, options).str.join(', ')
+
+
+def rule_module(df, column, options):
+    """Module from an _M<n>_ filename part, else a tag that is exactly M<n>, else the default"""
+    modules = 'M' + _column(df, column, options).str.extract(MODULE_PATTERN, flags=re.IGNORECASE, expand=False)
+
+    tags = df[options['tags_column']].str.split(',').explode().str.strip()
+    tag_modules = tags[tags.str.fullmatch(r'M\d+', na=False)].groupby(level=0, sort=False).first()
+    modules = modules.fillna(tag_modules.reindex(df.index))
+    return modules.fillna(options['default'])
+
+
+def rule_constant(df, column, options):
+    return pd.Series([options['value']] * len(df), index=df.index, dtype=object)
+
+
+RULES = {
+    'text': rule_text,
+    'text_or_null': rule_text_or_null,
+    'title_case_or_null': rule_title_case_or_null,
+    'year': rule_year,
+    'file_type': rule_file_type,
+    'integer': rule_integer,
+    'boolean': rule_boolean,
+    'list': rule_list,
+    'joined_list': rule_joined_list,
+    'module': rule_module,
+    'constant': rule_constant,
+}
+
+
+def build_columns(df, fields):
+    """Apply each field rule to the whole frame; returns {output key: list of Python values}"""
+    columns = {}
+    for key, rule, column, options in fields:
+        if options.get('optional') and column not in df.columns:
+            continue
+        values = RULES[rule](df, column, options)
+        # tolist() gives plain Python ints/bools for json
+        columns[key] = values.astype(object).where(values.notna(), None).tolist()
+    return columns
+
+
+def iter_rows(columns):
+    keys = list(columns)
+    for values in zip(*columns.values()):
+        yield dict(zip(keys, values))
+
+
+def count_values(documents, key):
+    counts = {}
+    for doc in documents:
+        counts[doc[key]] = counts.get(doc[key], 0) + 1
+    return counts
+
+
+def build_metadata(documents, source, headers):
+    """Summary block the EUA navigator JSON has always carried"""
+    return {
+        'totalDocuments': len(documents),
+        'lastUpdated': date.today().isoformat(),
+        'sourceFile': source,
+        'columns': headers,
+        'statistics': {
+            'byModule': count_values(documents, 'module'),
+            'byFileType': count_values(documents, 'fileType'),
+            'byDocumentType': count_values(documents, 'documentType'),
+            'withExemptions': sum(1 for d in documents if d['hasExemption']),
+            'withExclusions': sum(1 for d in documents if d['hasExclusion']),
+            'passwordProtected': sum(1 for d in documents if d['passwordProtected']),
+            'processed': sum(1 for d in documents if d['processed']),
+        },
+    }
+
+
+def documents_missing_from_source(output_path, documents):
+    """Filenames in an existing output that the new conversion would drop"""
+    if not output_path.exists():
+        return []
+    converted = {doc['filename'] for doc in documents}
+    with TaggedFilesReader(output_path) as reader:
+        return [doc['filename'] for doc in reader.documents() if doc['filename'] not in converted]
+
+
+def convert_corpus(name, schema, output_dir, force=False):
+    """Convert one corpus CSV; returns the number of documents written (0 if skipped)"""
+    source = REPO_ROOT / schema['source']
+    if not source.exists():
+        print(f"{name}: source not found: {source}")
+        return 0
+
+    df = pd.read_csv(source, dtype=str, keep_default_na=False, encoding='utf-8')
+    if schema.get('strip_values'):
+        df = df.apply(lambda values: values.str.strip())
+    documents = list(iter_rows(build_columns(df, schema['fields'])))
+
+    output_path = output_dir / schema['output']
+    missing = documents_missing_from_source(output_path, documents)
+    if missing and not force:
+        print(f"{name}: {len(missing)} documents in {output_path.name} are not in {source.name} "
+              f"(e.g. {missing[0]}); not overwriting without --force")
+        return 0
+
+    with TaggedFilesWriter(output_path, ensure_ascii=schema['ensure_ascii']) as writer:
+        for doc in documents:
+            writer.write_document(doc)
+        if schema.get('metadata'):
+            writer.extras['metadata'] = build_metadata(documents, source.name, list(df.columns))
+    print(f"{name}: {len(documents)} documents -> {output_path}")
+
+    navigator_csv = schema.get('navigator_csv')
+    if navigator_csv:
+        csv_path = output_dir / navigator_csv['output']
+        columns = build_columns(df, navigator_csv['fields'])
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(columns))
+            writer.writeheader()
+            writer.writerows(iter_rows(columns))
+        print(f"{name}: navigator CSV -> {csv_path}")
+
+    return len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert tagged-files CSVs to navigator JSON")
+    parser.add_argument('corpora', nargs='*', default=list(SCHEMAS), help=f"Corpora (default: all of {', '.join(SCHEMAS)})")
+    parser.add_argument('--output-dir', type=Path, default=REPO_ROOT, help="Where to write (default: repository root)")
+    parser.add_argument('--force', action='store_true',
+                        help="Overwrite even if documents in the existing output are missing from the CSV")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.corpora if name not in SCHEMAS]
+    if unknown:
+        print(f"Unknown corpus: {', '.join(unknown)} (known: {', '.join(SCHEMAS)})")
+        sys.exit(1)
+
+    total = 0
+    for name in args.corpora:
+        total += convert_corpus(name, SCHEMAS[name], args.output_dir, args.force)
+    print(f"\nTotal documents converted: {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,323 +2,709 @@ from lxml import etree
 import csv
 import os
 import glob
-from collections import OrderedDict
+import hashlib
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
-def process_define_xml_files(xml_input_directory, output_directory, csv_filename, report_filename):
+# Define the CDISC namespaces. CRITICAL: Match these exactly to your XML file headers!
+ODM_NS = 'http://www.cdisc.org/ns/odm/v1.3'
+DEF_NS = 'http://www.cdisc.org/ns/def/v2.0'
+ns = {
+    'odm': ODM_NS,
+    'xlink': 'http://www.w3.org/1999/xlink',
+    'def': DEF_NS,
+    'arm': 'http://www.cdisc.org/ns/arm/v1.0'
+}
+
+def _tag(namespace, name):
+    return f"{{{namespace}}}{name}"
+
+STUDY_TAG = _tag(ODM_NS, 'Study')
+GLOBAL_VARIABLES_TAG = _tag(ODM_NS, 'GlobalVariables')
+METADATA_VERSION_TAG = _tag(ODM_NS, 'MetaDataVersion')
+ITEM_GROUP_DEF_TAG = _tag(ODM_NS, 'ItemGroupDef')
+ITEM_DEF_TAG = _tag(ODM_NS, 'ItemDef')
+CODE_LIST_TAG = _tag(ODM_NS, 'CodeList')
+METHOD_DEF_TAG = _tag(ODM_NS, 'MethodDef')
+WHERE_CLAUSE_DEF_TAG = _tag(DEF_NS, 'WhereClauseDef')
+
+def _int_or_none(value):
+    return int(value) if value else None
+
+def _release(elem):
+    """Free a consumed element and any already-processed siblings before it"""
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+def _parse_item_def(item_def_elem):
+    # Extract CodeListOID from CodeListRef child element
+    codelist_ref_elem = item_def_elem.find('odm:CodeListRef', namespaces=ns)
+    # Define-XML 2.0 gives the origin as a def:Origin child element's Type
+    origin_elem = item_def_elem.find('def:Origin', namespaces=ns)
+    return {
+        "OID": item_def_elem.get('OID'),
+        "Name": item_def_elem.get('Name'),
+        "DataType": item_def_elem.get('DataType'),
+        "Length": _int_or_none(item_def_elem.get('Length')),
+        "SASFieldName": item_def_elem.get('SASFieldName'),
+        "Origin": item_def_elem.get('Origin') or (origin_elem.get('Type') if origin_elem is not None else None),
+        "CommentOID": item_def_elem.get('CommentOID'),
+        "CodeListOID": codelist_ref_elem.get('CodeListOID') if codelist_ref_elem is not None else None,
+        "Description": item_def_elem.findtext('odm:Description/odm:TranslatedText', namespaces=ns),
+        "Roles": [role_elem.text for role_elem in item_def_elem.findall('def:Role', namespaces=ns)]
+    }
+
+def _parse_code_list(code_list_elem):
+    code_list_data = {
+        "OID": code_list_elem.get('OID'),
+        "Name": code_list_elem.get('Name'),
+        "DataType": code_list_elem.get('DataType'),
+        "CodedValues": []
+    }
+    for item in code_list_elem.findall('odm:CodeListItem', namespaces=ns):
+        code_list_data["CodedValues"].append({
+            'CodedValue': item.get('CodedValue'),
+            'Decode': item.findtext('odm:Decode/odm:TranslatedText', namespaces=ns)
+        })
+    # Lists of values without decodes
+    for item in code_list_elem.findall('odm:EnumeratedItem', namespaces=ns):
+        code_list_data["CodedValues"].append({'CodedValue': item.get('CodedValue'), 'Decode': None})
+    return code_list_data
+
+def _parse_method_def(method_def_elem):
+    expression_elem = method_def_elem.find('odm:FormalExpression', namespaces=ns)
+    return {
+        "OID": method_def_elem.get('OID'),
+        "Name": method_def_elem.get('Name'),
+        "Type": method_def_elem.get('Type'),
+        "Description": method_def_elem.findtext('odm:Description/odm:TranslatedText', namespaces=ns),
+        "ExpressionContext": expression_elem.get('Context') if expression_elem is not None else None,
+        "Expression": expression_elem.text if expression_elem is not None else None
+    }
+
+def _parse_where_clause_def(where_clause_elem):
+    range_checks = []
+    for range_check_elem in where_clause_elem.findall('odm:RangeCheck', namespaces=ns):
+        range_checks.append({
+            "ItemOID": range_check_elem.get(_tag(DEF_NS, 'ItemOID')),
+            "Comparator": range_check_elem.get('Comparator'),
+            "SoftHard": range_check_elem.get('SoftHard'),
+            "CheckValues": [cv.text for cv in range_check_elem.findall('odm:CheckValue', namespaces=ns)]
+        })
+    return {"OID": where_clause_elem.get('OID'), "RangeChecks": range_checks}
+
+def _parse_item_group_def(item_group_def_elem):
+    item_refs = []
+    for item_ref_elem in item_group_def_elem.findall('odm:ItemRef', namespaces=ns):
+        item_refs.append({
+            "ItemOID": item_ref_elem.get('ItemOID'),
+            "OrderNumber": _int_or_none(item_ref_elem.get('OrderNumber')),
+            "Mandatory": item_ref_elem.get('Mandatory') == 'Yes',
+            "KeySequence": _int_or_none(item_ref_elem.get('KeySequence')),
+            "MethodOID": item_ref_elem.get('MethodOID'),
+            "WhereClauseOID": item_ref_elem.get('WhereClauseOID')
+        })
+    item_refs.sort(key=lambda x: x['OrderNumber'] if x['OrderNumber'] is not None else float('inf'))
+    return {
+        "OID": item_group_def_elem.get('OID'),
+        "Name": item_group_def_elem.get('Name'),
+        "SASDatasetName": item_group_def_elem.get('SASDatasetName'),
+        "Description": item_group_def_elem.findtext('odm:Description/odm:TranslatedText', namespaces=ns),
+        "Purpose": item_group_def_elem.findtext('def:Purpose/def:TranslatedText', namespaces=ns),
+        "Structure": item_group_def_elem.findtext('def:Structure', namespaces=ns),
+        "Class": item_group_def_elem.findtext('def:Class', namespaces=ns),
+        "Source": item_group_def_elem.findtext('def:Source', namespaces=ns),
+        "ItemRefs": item_refs
+    }
+
+def parse_define_xml(xml_file_path):
+    """
+    Stream one Define-XML file with iterparse and return its metadata as plain dicts.
+
+    Each ItemGroupDef, ItemDef and CodeList is converted as soon as its end tag is
+    seen and then cleared (along with already-consumed siblings), so memory use
+    does not grow with the size of the file. Runs in a worker process.
+    """
+    result = {
+        "file": os.path.basename(xml_file_path),
+        "content_hash": None,
+        "file_size": os.path.getsize(xml_file_path),
+        "study": {"OID": "N/A", "Name": "N/A", "Description": "N/A", "ProtocolName": "N/A"},
+        "metadata_versions": [],
+        "error": None
+    }
+    current_mdv = None
+
+    try:
+        for event, elem in etree.iterparse(xml_file_path, events=('start', 'end'), huge_tree=True):
+            if event == 'start':
+                if elem.tag == STUDY_TAG:
+                    result["study"]["OID"] = elem.get("OID")
+                elif elem.tag == METADATA_VERSION_TAG:
+                    current_mdv = {
+                        "OID": elem.get('OID'),
+                        "Name": elem.get('Name'),
+                        "DefineVersion": elem.get(_tag(DEF_NS, 'DefineVersion')),
+                        "StandardName": elem.get(_tag(DEF_NS, 'StandardName')),
+                        "StandardVersion": elem.get(_tag(DEF_NS, 'StandardVersion')),
+                        "ItemDefs": {},
+                        "CodeLists": [],
+                        "ItemGroupDefs": [],
+                        "MethodDefs": [],
+                        "WhereClauseDefs": []
+                    }
+                continue
+
+            if elem.tag == GLOBAL_VARIABLES_TAG:
+                result["study"]["Name"] = elem.findtext('odm:StudyName', namespaces=ns)
+                result["study"]["Description"] = elem.findtext('odm:StudyDescription', namespaces=ns)
+                result["study"]["ProtocolName"] = elem.findtext('odm:ProtocolName', namespaces=ns)
+                _release(elem)
+            elif elem.tag == METADATA_VERSION_TAG:
+                result["metadata_versions"].append(current_mdv)
+                current_mdv = None
+                _release(elem)
+            elif current_mdv is not None and elem.getparent() is not None \
+                    and elem.getparent().tag == METADATA_VERSION_TAG:
+                if elem.tag == ITEM_DEF_TAG:
+                    item_def = _parse_item_def(elem)
+                    current_mdv["ItemDefs"][item_def["OID"]] = item_def
+                elif elem.tag == CODE_LIST_TAG:
+                    current_mdv["CodeLists"].append(_parse_code_list(elem))
+                elif elem.tag == ITEM_GROUP_DEF_TAG:
+                    current_mdv["ItemGroupDefs"].append(_parse_item_group_def(elem))
+                elif elem.tag == METHOD_DEF_TAG:
+                    current_mdv["MethodDefs"].append(_parse_method_def(elem))
+                elif elem.tag == WHERE_CLAUSE_DEF_TAG:
+                    current_mdv["WhereClauseDefs"].append(_parse_where_clause_def(elem))
+                # Anything else directly under MetaDataVersion (comments, value
+                # lists, leafs) is not needed for the metadata tables
+                _release(elem)
+    except etree.XMLSyntaxError as e:
+        result["error"] = f"Error parsing XML file '{xml_file_path}': {e}"
+    except Exception as e:
+        result["error"] = f"An unexpected error occurred while reading '{xml_file_path}': {e}"
+
+    return result
+
+# Normalized metadata catalog. Define-XML OIDs are only unique within one
+# define file, so every table is keyed by the study (metadata version) row,
+# and every study belongs to the define file it was parsed from. Files are
+# keyed by name: byte-identical copies under different names are cataloged
+# separately, as the report has always listed them. Deleting a define_files
+# row cascades to everything parsed from it.
+METADATA_SCHEMA = """
+CREATE TABLE IF NOT EXISTS define_files (
+    source_file TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    file_size INTEGER,
+    parsed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS studies (
+    study_id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    source_file TEXT NOT NULL REFERENCES define_files(source_file) ON DELETE CASCADE,
+    study_oid TEXT,
+    study_name TEXT,
+    study_description TEXT,
+    protocol_name TEXT,
+    mdv_oid TEXT,
+    mdv_name TEXT,
+    define_version TEXT,
+    standard_name TEXT,
+    standard_version TEXT,
+    UNIQUE (source_file, mdv_oid)
+);
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset_id INTEGER PRIMARY KEY,
+    study_id INTEGER NOT NULL REFERENCES studies(study_id) ON DELETE CASCADE,
+    dataset_oid TEXT NOT NULL,
+    name TEXT,
+    sas_name TEXT,
+    description TEXT,
+    purpose TEXT,
+    structure TEXT,
+    class TEXT,
+    source TEXT,
+    UNIQUE (study_id, dataset_oid)
+);
+CREATE TABLE IF NOT EXISTS variables (
+    dataset_id INTEGER NOT NULL REFERENCES datasets(dataset_id) ON DELETE CASCADE,
+    variable_oid TEXT NOT NULL,
+    order_number INTEGER,
+    name TEXT,
+    label TEXT,
+    data_type TEXT,
+    length INTEGER,
+    sas_field_name TEXT,
+    origin TEXT,
+    roles TEXT,
+    mandatory INTEGER,
+    key_sequence INTEGER,
+    method_oid TEXT,
+    where_clause_oid TEXT,
+    codelist_oid TEXT,
+    PRIMARY KEY (dataset_id, variable_oid)
+);
+CREATE TABLE IF NOT EXISTS codelists (
+    study_id INTEGER NOT NULL REFERENCES studies(study_id) ON DELETE CASCADE,
+    codelist_oid TEXT NOT NULL,
+    name TEXT,
+    data_type TEXT,
+    coded_values TEXT,
+    PRIMARY KEY (study_id, codelist_oid)
+);
+CREATE TABLE IF NOT EXISTS codelist_items (
+    study_id INTEGER NOT NULL,
+    codelist_oid TEXT NOT NULL,
+    item_order INTEGER NOT NULL,
+    coded_value TEXT,
+    decode TEXT,
+    PRIMARY KEY (study_id, codelist_oid, item_order),
+    FOREIGN KEY (study_id, codelist_oid) REFERENCES codelists(study_id, codelist_oid) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS methods (
+    study_id INTEGER NOT NULL REFERENCES studies(study_id) ON DELETE CASCADE,
+    method_oid TEXT NOT NULL,
+    name TEXT,
+    type TEXT,
+    description TEXT,
+    expression_context TEXT,
+    expression TEXT,
+    PRIMARY KEY (study_id, method_oid)
+);
+CREATE TABLE IF NOT EXISTS where_clauses (
+    study_id INTEGER NOT NULL REFERENCES studies(study_id) ON DELETE CASCADE,
+    where_clause_oid TEXT NOT NULL,
+    check_order INTEGER NOT NULL,
+    item_oid TEXT,
+    comparator TEXT,
+    soft_hard TEXT,
+    check_values TEXT,
+    PRIMARY KEY (study_id, where_clause_oid, check_order)
+);
+CREATE INDEX IF NOT EXISTS idx_studies_content_hash ON studies(content_hash);
+CREATE INDEX IF NOT EXISTS idx_datasets_study ON datasets(study_id);
+CREATE INDEX IF NOT EXISTS idx_datasets_name ON datasets(name);
+CREATE INDEX IF NOT EXISTS idx_variables_name_dataset ON variables(name, dataset_id);
+CREATE INDEX IF NOT EXISTS idx_variables_codelist ON variables(codelist_oid);
+CREATE INDEX IF NOT EXISTS idx_codelists_name ON codelists(name);
+CREATE INDEX IF NOT EXISTS idx_codelist_items_value ON codelist_items(coded_value);
+
+-- Flat one-row-per-variable layout of the original variables report
+CREATE VIEW IF NOT EXISTS variables_flat AS
+SELECT
+    s.source_file AS Source_File,
+    s.study_oid AS Study_OID,
+    s.study_name AS Study_Name,
+    s.study_description AS Study_Description,
+    s.protocol_name AS Protocol_Name,
+    s.mdv_oid AS Define_MetadataVersion_OID,
+    s.mdv_name AS Define_MetadataVersion_Name,
+    s.define_version AS Define_Version,
+    s.standard_name AS Standard_Name,
+    s.standard_version AS Standard_Version,
+    d.dataset_oid AS Dataset_OID,
+    d.name AS Dataset_Name,
+    d.sas_name AS Dataset_SAS_Name,
+    d.description AS Dataset_Description,
+    d.purpose AS Dataset_Purpose,
+    d.structure AS Dataset_Structure,
+    d.class AS Dataset_Class,
+    d.source AS Dataset_Source,
+    v.variable_oid AS Variable_OID,
+    v.name AS Variable_Name,
+    v.label AS Variable_Label,
+    v.data_type AS Variable_Data_Type,
+    v.length AS Variable_Length,
+    v.sas_field_name AS Variable_SAS_Field_Name,
+    v.origin AS Variable_Origin,
+    v.roles AS Variable_Roles,
+    CASE WHEN v.mandatory THEN 'True' ELSE 'False' END AS Variable_Mandatory,
+    v.key_sequence AS Variable_Key_Sequence,
+    v.method_oid AS Variable_Method_OID,
+    v.where_clause_oid AS Variable_WhereClause_OID,
+    v.codelist_oid AS CodeList_OID,
+    COALESCE(c.name, '') AS CodeList_Name,
+    COALESCE(c.data_type, '') AS CodeList_Data_Type,
+    COALESCE(c.coded_values, '') AS CodeList_Coded_Values
+FROM variables v
+JOIN datasets d ON d.dataset_id = v.dataset_id
+JOIN studies s ON s.study_id = d.study_id
+LEFT JOIN codelists c ON c.study_id = d.study_id AND c.codelist_oid = v.codelist_oid
+ORDER BY s.study_id, d.dataset_id, v.rowid;
+"""
+
+# Bumped whenever METADATA_SCHEMA changes incompatibly; older catalogs are rebuilt
+CATALOG_VERSION = 2
+
+METADATA_TABLES = ["define_files", "studies", "datasets", "variables", "codelists", "codelist_items", "methods", "where_clauses"]
+
+def build_metadata_tables(parsed_files, first_study_id=1, first_dataset_id=1):
+    """
+    Convert parsed Define-XML files into normalized table rows.
+
+    Returns {table name: list of row dicts} in METADATA_TABLES order. Codelist
+    coded-value strings are joined once per codelist rather than per variable.
+    Surrogate keys start at `first_study_id` / `first_dataset_id` so rows can be
+    appended to an existing catalog.
+    """
+    tables = {name: [] for name in METADATA_TABLES}
+    parsed_at = datetime.now().isoformat(timespec='seconds')
+
+    for parsed in parsed_files:
+        tables["define_files"].append({
+            "source_file": parsed["file"],
+            "content_hash": parsed["content_hash"],
+            "file_size": parsed["file_size"],
+            "parsed_at": parsed_at
+        })
+        study = parsed["study"]
+        for mdv in parsed["metadata_versions"]:
+            study_id = first_study_id + len(tables["studies"])
+            tables["studies"].append({
+                "study_id": study_id,
+                "content_hash": parsed["content_hash"],
+                "source_file": parsed["file"],
+                "study_oid": study["OID"],
+                "study_name": study["Name"],
+                "study_description": study["Description"],
+                "protocol_name": study["ProtocolName"],
+                "mdv_oid": mdv["OID"],
+                "mdv_name": mdv["Name"],
+                "define_version": mdv["DefineVersion"],
+                "standard_name": mdv["StandardName"],
+                "standard_version": mdv["StandardVersion"]
+            })
+
+            # Deduplicate by OID within the file (last definition wins)
+            codelists = {cl["OID"]: cl for cl in mdv["CodeLists"]}
+            for cl_oid, code_list in codelists.items():
+                tables["codelists"].append({
+                    "study_id": study_id,
+                    "codelist_oid": cl_oid,
+                    "name": code_list["Name"],
+                    "data_type": code_list["DataType"],
+                    # Semicolon + newline delimiter, as in the original report
+                    "coded_values": ";\n".join(f"{cv['CodedValue']}: {cv['Decode']}" if cv['Decode'] is not None
+                                               else cv['CodedValue'] for cv in code_list["CodedValues"])
+                })
+                for item_order, cv in enumerate(code_list["CodedValues"], start=1):
+                    tables["codelist_items"].append({
+                        "study_id": study_id,
+                        "codelist_oid": cl_oid,
+                        "item_order": item_order,
+                        "coded_value": cv["CodedValue"],
+                        "decode": cv["Decode"]
+                    })
+
+            for method in {m["OID"]: m for m in mdv["MethodDefs"]}.values():
+                tables["methods"].append({
+                    "study_id": study_id,
+                    "method_oid": method["OID"],
+                    "name": method["Name"],
+                    "type": method["Type"],
+                    "description": method["Description"],
+                    "expression_context": method["ExpressionContext"],
+                    "expression": method["Expression"]
+                })
+
+            for where_clause in {w["OID"]: w for w in mdv["WhereClauseDefs"]}.values():
+                for check_order, range_check in enumerate(where_clause["RangeChecks"], start=1):
+                    tables["where_clauses"].append({
+                        "study_id": study_id,
+                        "where_clause_oid": where_clause["OID"],
+                        "check_order": check_order,
+                        "item_oid": range_check["ItemOID"],
+                        "comparator": range_check["Comparator"],
+                        "soft_hard": range_check["SoftHard"],
+                        "check_values": ", ".join(v or "" for v in range_check["CheckValues"])
+                    })
+
+            seen_datasets = set()
+            for dataset in mdv["ItemGroupDefs"]:
+                if dataset["OID"] in seen_datasets:
+                    continue
+                seen_datasets.add(dataset["OID"])
+                dataset_id = first_dataset_id + len(tables["datasets"])
+                tables["datasets"].append({
+                    "dataset_id": dataset_id,
+                    "study_id": study_id,
+                    "dataset_oid": dataset["OID"],
+                    "name": dataset["Name"],
+                    "sas_name": dataset["SASDatasetName"],
+                    "description": dataset["Description"],
+                    "purpose": dataset["Purpose"],
+                    "structure": dataset["Structure"],
+                    "class": dataset["Class"],
+                    "source": dataset["Source"]
+                })
+
+                seen_variables = set()
+                for item_ref in dataset["ItemRefs"]:
+                    variable_oid = item_ref["ItemOID"]
+                    var_details = mdv["ItemDefs"].get(variable_oid)
+                    if not var_details:
+                        print(f"Warning: ItemRef '{variable_oid}' in dataset '{dataset['Name']}' has no matching ItemDef in {parsed['file']}. Skipping variable row.")
+                        continue
+                    if variable_oid in seen_variables:
+                        continue
+                    seen_variables.add(variable_oid)
+                    tables["variables"].append({
+                        "dataset_id": dataset_id,
+                        "variable_oid": variable_oid,
+                        "order_number": item_ref["OrderNumber"],
+                        "name": var_details["Name"],
+                        "label": var_details["Description"],
+                        "data_type": var_details["DataType"],
+                        "length": var_details["Length"],
+                        "sas_field_name": var_details["SASFieldName"],
+                        "origin": var_details["Origin"],
+                        "roles": ", ".join(var_details["Roles"]),
+                        "mandatory": int(item_ref["Mandatory"]),
+                        "key_sequence": item_ref["KeySequence"],
+                        "method_oid": item_ref["MethodOID"],
+                        "where_clause_oid": item_ref["WhereClauseOID"],
+                        "codelist_oid": var_details["CodeListOID"]
+                    })
+
+    return tables
+
+def file_content_hash(path):
+    """SHA-256 of a file's bytes; identifies a define file version in the catalog"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def open_metadata_catalog(db_path):
+    """Open (creating if needed) the persistent metadata catalog"""
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.close()
+        if "studies" in tables and version != CATALOG_VERSION:
+            # Database from an earlier layout (before the catalog was incremental,
+            # or keyed by content hash); rebuild it
+            os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(METADATA_SCHEMA)
+    conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+    return conn
+
+def upsert_metadata_catalog(conn, parsed_files, current_files):
+    """
+    Insert newly parsed define files into the catalog, replacing any earlier
+    version of the same source file, and drop the files no longer among
+    `current_files` (their rows are removed by cascade).
+    """
+    current_files = set(current_files)
+    stale = [row[0] for row in conn.execute("SELECT source_file FROM define_files")
+             if row[0] not in current_files]
+    for source_file in stale + [parsed["file"] for parsed in parsed_files]:
+        conn.execute("DELETE FROM define_files WHERE source_file = ?", (source_file,))
+
+    first_study_id = conn.execute("SELECT COALESCE(MAX(study_id), 0) + 1 FROM studies").fetchone()[0]
+    first_dataset_id = conn.execute("SELECT COALESCE(MAX(dataset_id), 0) + 1 FROM datasets").fetchone()[0]
+    tables = build_metadata_tables(parsed_files, first_study_id, first_dataset_id)
+
+    for table_name in METADATA_TABLES:
+        rows = tables[table_name]
+        if not rows:
+            continue
+        columns = list(rows[0].keys())
+        conn.executemany(
+            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [tuple(row[c] for c in columns) for row in rows]
+        )
+    conn.commit()
+
+def read_metadata_tables(conn):
+    """Read every catalog table back as {table name: list of row dicts}"""
+    tables = {}
+    for table_name in METADATA_TABLES:
+        cursor = conn.execute(f"SELECT * FROM {table_name}")
+        columns = [column[0] for column in cursor.description]
+        tables[table_name] = [dict(zip(columns, row)) for row in cursor]
+    return tables
+
+def find_variables_using_codelist(db_path, codelist):
+    """All variables (across studies) whose CodeList OID or name is `codelist`"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("""
+            SELECT s.source_file, s.study_oid, d.name, v.name, v.label, c.codelist_oid, c.name
+            FROM codelists c
+            JOIN datasets d ON d.study_id = c.study_id
+            JOIN variables v ON v.dataset_id = d.dataset_id AND v.codelist_oid = c.codelist_oid
+            JOIN studies s ON s.study_id = c.study_id
+            WHERE c.codelist_oid = ? OR c.name = ?
+            ORDER BY s.source_file, d.name, v.name
+        """, (codelist, codelist)).fetchall()
+    finally:
+        conn.close()
+
+def find_datasets_with_variables(db_path, variable_names):
+    """All datasets (across studies) that contain every variable in `variable_names`"""
+    variable_names = sorted(set(variable_names))
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"""
+            SELECT s.source_file, s.study_oid, d.name, d.description
+            FROM variables v
+            JOIN datasets d ON d.dataset_id = v.dataset_id
+            JOIN studies s ON s.study_id = d.study_id
+            WHERE v.name IN ({', '.join('?' * len(variable_names))})
+            GROUP BY d.dataset_id
+            HAVING COUNT(DISTINCT v.name) = ?
+            ORDER BY s.source_file, d.name
+        """, (*variable_names, len(variable_names))).fetchall()
+    finally:
+        conn.close()
+
+def write_metadata_parquet(tables, output_directory):
+    """Write one Parquet file per normalized table (requires pandas + pyarrow)"""
+    try:
+        import pandas as pd
+        for table_name in METADATA_TABLES:
+            pd.DataFrame(tables[table_name]).to_parquet(
+                os.path.join(output_directory, f"{table_name}.parquet"), index=False)
+    except ImportError:
+        print("pandas/pyarrow not installed; skipping Parquet output")
+        return False
+    return True
+
+def write_flat_csv(db_path, csv_path):
+    """Export the variables_flat view as the one-row-per-variable CSV"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute("SELECT * FROM variables_flat")
+        with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL)
+            writer.writerow([column[0] for column in cursor.description])
+            writer.writerows(cursor)
+    finally:
+        conn.close()
+
+def process_define_xml_files(xml_input_directory, output_directory, csv_filename, report_filename,
+                             max_workers=None, db_filename="define_metadata.db", parquet=True):
     """
-    Parses all Define-XML files in a directory, extracts variable and codelist metadata,
-    and consolidates it into a single CSV file and a summary report.
+    Parses Define-XML files in a directory into a persistent, normalized metadata
+    catalog (SQLite) and exports it as Parquet tables and a summary report.
+
+    The catalog keys each define file by its content hash: only new or changed
+    files are parsed (in parallel, in a process pool) and upserted, so adding one
+    define.xml does not re-parse the others. See find_variables_using_codelist and
+    find_datasets_with_variables for indexed cross-study lookups.
 
     Args:
         xml_input_directory (str): Path to the directory containing Define-XML files.
-        output_directory (str): Path to the directory where output CSV and report will be saved.
-        csv_filename (str): Name of the output CSV file.
+        output_directory (str): Path to the directory where outputs will be saved.
+        csv_filename (str): Name of the optional flat variables CSV (generated from the
+            variables_flat view); pass None to skip it.
         report_filename (str): Name of the output summary report file.
+        max_workers (int): Number of worker processes (defaults to the CPU count).
+        db_filename (str): Name of the SQLite catalog, kept between runs.
+        parquet (bool): Also write one Parquet file per table.
     """
     print("Beginning processing of Define-XML files.")
 
     # Ensure output directory exists
     os.makedirs(output_directory, exist_ok=True)
 
-    # Define the CDISC namespaces. CRITICAL: Match these exactly to your XML file headers!
-    ns = {
-        'odm': 'http://www.cdisc.org/ns/odm/v1.3',
-        'xlink': 'http://www.w3.org/1999/xlink',
-        'def': 'http://www.cdisc.org/ns/def/v2.0',
-        'arm': 'http://www.cdisc.org/ns/arm/v1.0'
-    }
-
-    # Data structures for consolidation
-    all_variable_rows = [] # This will hold all the OrderedDicts for CSV rows
-    master_codelists = {}  # OID -> {Name, DataType, CodedValues: [...]} for quick lookup
-    
-    # For summary reporting
-    unique_study_oids = set()
-    unique_dataset_oids = set()
-    unique_variable_oids = set()
-    unique_codelist_oids_for_report = set() # To count unique codelists for the report
-    standards_summary = {}
+    # Get a sorted list of all XML files in the input directory
+    xml_files = sorted(glob.glob(os.path.join(xml_input_directory, "*.xml")))
 
-    # Define CSV column headers (order matters for DictWriter)
-    # THIS IS THE csv_fieldnames VARIABLE DEFINITION
-    csv_fieldnames = [
-        "Source_File",
-        "Study_OID",
-        "Study_Name",
-        "Study_Description",
-        "Protocol_Name",
-        "Define_MetadataVersion_OID",
-        "Define_MetadataVersion_Name",
-        "Define_Version",
-        "Standard_Name",
-        "Standard_Version",
-        "Dataset_OID",
-        "Dataset_Name",
-        "Dataset_SAS_Name",
-        "Dataset_Description",
-        "Dataset_Purpose",
-        "Dataset_Structure",
-        "Dataset_Class",
-        "Dataset_Source",
-        "Variable_OID",
-        "Variable_Name",
-        "Variable_Label",
-        "Variable_Data_Type",
-        "Variable_Length",
-        "Variable_SAS_Field_Name",
-        "Variable_Origin",
-        "Variable_Roles",
-        "Variable_Mandatory",
-        "Variable_Key_Sequence",
-        "Variable_Method_OID",
-        "Variable_WhereClause_OID",
-        "CodeList_OID",
-        "CodeList_Name",
-        "CodeList_Data_Type",
-        "CodeList_Coded_Values" # This will contain the semicolon-newline delimited values
-    ]
-    # END OF csv_fieldnames DEFINITION
+    if not xml_files:
+        print(f"No XML files found by the script in '{xml_input_directory}'. Please place your Define-XML files there or check the file pattern.")
+        return
 
-    # Get a list of all XML files in the input directory
-    xml_files = glob.glob(os.path.join(xml_input_directory, "*.xml"))
+    print(f"Found {len(xml_files)} XML files in '{xml_input_directory}'.")
 
-    # --- DEBUGGING LINES START ---
-    print("\n--- Python's View of Files in Input Directory ---")
-    print(f"Listing all items in '{xml_input_directory}':")
+    output_db_path = os.path.join(output_directory, db_filename)
     try:
-        for item in os.listdir(xml_input_directory):
-            print(f"  - '{item}'") # Print with quotes to reveal leading/trailing spaces
-    except FileNotFoundError:
-        print(f"  Error: Directory '{xml_input_directory}' not found.")
-    except Exception as e:
-        print(f"  An error occurred while listing directory contents: {e}")
-
-    print(f"Files matched by glob.glob('{os.path.join(xml_input_directory, '*.xml')}'):")
-    if not xml_files:
-        print("  No XML files found by glob.glob in the specified directory using the pattern.")
-    else:
-        for f in xml_files:
-            print(f"  - '{os.path.basename(f)}'") # Print with quotes for clarity
-    print("--- End Python's View ---")
-    # --- DEBUGGING LINES END ---
-
-    if not xml_files:
-        print(f"No XML files found by the script in '{xml_input_directory}'. Please place your Define-XML files there or check the file pattern.")
+        conn = open_metadata_catalog(output_db_path)
+    except sqlite3.Error as e:
+        print(f"Error opening metadata catalog {output_db_path}: {e}")
         return
 
-    print(f"Found {len(xml_files)} XML files in '{xml_input_directory}'. Starting metadata extraction...")
+    try:
+        # --- Only parse files whose content is not already in the catalog ---
+        cataloged = dict(conn.execute("SELECT source_file, content_hash FROM define_files"))
+        content_hashes = {path: file_content_hash(path) for path in xml_files}
+        changed_files = [path for path in xml_files
+                         if cataloged.get(os.path.basename(path)) != content_hashes[path]]
+        print(f"{len(xml_files) - len(changed_files)} files unchanged; parsing {len(changed_files)} new or changed files...")
+
+        # --- Parse files in parallel; executor.map preserves the sorted input order ---
+        parsed_files = []
+        if changed_files:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                for path, parsed in zip(changed_files, executor.map(parse_define_xml, changed_files)):
+                    print(f"--- Extracted metadata from: {parsed['file']} ---")
+                    parsed["content_hash"] = content_hashes[path]
+                    if parsed["error"]:
+                        print(parsed["error"])
+                        continue # Skip to next file
+                    parsed_files.append(parsed)
+
+        upsert_metadata_catalog(conn, parsed_files, [os.path.basename(path) for path in xml_files])
+        print(f"\nMetadata catalog up to date: {output_db_path}")
+
+        tables = read_metadata_tables(conn)
+    except sqlite3.Error as e:
+        print(f"Error updating metadata catalog {output_db_path}: {e}")
+        return
+    finally:
+        conn.close()
 
-    # --- Process each XML file ---
-    for xml_file_path in xml_files:
-        current_file_name = os.path.basename(xml_file_path)
-        print(f"\n--- Extracting metadata from: {current_file_name} ---")
+    if parquet and write_metadata_parquet(tables, output_directory):
+        print(f"Successfully wrote Parquet tables to: {output_directory}")
 
+    if csv_filename:
+        output_csv_path = os.path.join(output_directory, csv_filename)
         try:
-            tree = etree.parse(xml_file_path)
-            root = tree.getroot()
-        except etree.XMLSyntaxError as e:
-            print(f"Error parsing XML file '{xml_file_path}': {e}")
-            continue # Skip to next file
-        except Exception as e:
-            print(f"An unexpected error occurred while reading '{xml_file_path}': {e}")
-            continue # Skip to next file
-
-        # Extract Study GlobalVariables
-        study_oid = "N/A"
-        study_name = "N/A"
-        study_description = "N/A"
-        protocol_name = "N/A"
-
-        study_elem = root.find('odm:Study', namespaces=ns)
-        if study_elem is not None:
-            study_oid = study_elem.get("OID")
-            gv_elem = study_elem.find('odm:GlobalVariables', namespaces=ns)
-            if gv_elem is not None:
-                study_name = gv_elem.findtext('odm:StudyName', namespaces=ns)
-                study_description = gv_elem.findtext('odm:StudyDescription', namespaces=ns)
-                protocol_name = gv_elem.findtext('odm:ProtocolName', namespaces=ns)
-        
-        if study_oid != "N/A":
-            unique_study_oids.add(study_oid)
-
-        # Process MetaDataVersion(s) (typically one in Define-XML)
-        for mdv_elem in root.xpath('odm:Study/odm:MetaDataVersion', namespaces=ns):
-            mdv_oid = mdv_elem.get('OID')
-            mdv_name = mdv_elem.get('Name')
-            define_version = mdv_elem.get('{http://www.cdisc.org/ns/def/v2.0}DefineVersion')
-            standard_name = mdv_elem.get('{http://www.cdisc.org/ns/def/v2.0}StandardName')
-            standard_version = mdv_elem.get('{http://www.cdisc.org/ns/def/v2.0}StandardVersion')
-
-            # Update standards summary
-            if standard_name:
-                if standard_name not in standards_summary:
-                    standards_summary[standard_name] = {}
-                standards_summary[standard_name][standard_version] = \
-                    standards_summary[standard_name].get(standard_version, 0) + 1
-
-            # --- COLLECT ITEMDEFS (VARIABLES) FIRST for easy lookup ---
-            current_file_variables = {} # OID -> {Name, DataType, Description, CodeListOID, etc.}
-            for item_def_elem in mdv_elem.xpath('odm:ItemDef', namespaces=ns):
-                oid = item_def_elem.get('OID')
-                # Extract CodeListOID from CodeListRef child element
-                codelist_ref_elem = item_def_elem.find('odm:CodeListRef', namespaces=ns)
-                codelist_oid_from_ref = codelist_ref_elem.get('CodeListOID') if codelist_ref_elem is not None else None
-
-                item_def = {
-                    "OID": oid,
-                    "Name": item_def_elem.get('Name'),
-                    "DataType": item_def_elem.get('DataType'),
-                    "Length": int(item_def_elem.get('Length')) if item_def_elem.get('Length') else None,
-                    "SASFieldName": item_def_elem.get('SASFieldName'),
-                    "Origin": item_def_elem.get('Origin'),
-                    "CommentOID": item_def_elem.get('CommentOID'),
-                    "CodeListOID": codelist_oid_from_ref, # Use the extracted codelist_oid
-                    "Description": item_def_elem.findtext('odm:Description/odm:TranslatedText', namespaces=ns),
-                    "Roles": [role_elem.text for role_elem in item_def_elem.xpath('def:Role', namespaces=ns)]
-                }
-                current_file_variables[oid] = item_def
-
-            # --- COLLECT CODELISTS AND ADD TO MASTER LIST ---
-            codelist_elements_found_by_xpath = mdv_elem.xpath('odm:CodeList', namespaces=ns)
-            print(f"  DEBUG: In file '{current_file_name}', MetaDataVersion '{mdv_oid}'")
-            print(f"  DEBUG:   XPath 'odm:CodeList' found {len(codelist_elements_found_by_xpath)} CodeList elements.")
-
-            for code_list_elem in codelist_elements_found_by_xpath:
-                cl_oid = code_list_elem.get('OID')
-                code_list_data = {
-                    "OID": cl_oid,
-                    "Name": code_list_elem.get('Name'),
-                    "DataType": code_list_elem.get('DataType'),
-                    "CodedValues": []
-                }
-                for item in code_list_elem.xpath('odm:CodeListItem', namespaces=ns):
-                    coded_value = item.get('CodedValue')
-                    decode_elem = item.find('odm:Decode/odm:TranslatedText', namespaces=ns)
-                    decode = decode_elem.text if decode_elem is not None else None
-                    code_list_data["CodedValues"].append({'CodedValue': coded_value, 'Decode': decode})
-                
-                # Add/Update in master_codelists (deduplicates by OID)
-                master_codelists[cl_oid] = code_list_data
-                unique_codelist_oids_for_report.add(cl_oid) # For final report count
-
-            # --- PROCESS ITEMGROUPDEFS (DATASETS) AND THEIR VARIABLES ---
-            for item_group_def_elem in mdv_elem.xpath('odm:ItemGroupDef', namespaces=ns):
-                dataset_oid = item_group_def_elem.get('OID')
-                dataset_name = item_group_def_elem.get('Name')
-                dataset_sas_name = item_group_def_elem.get('SASDatasetName')
-                dataset_description = item_group_def_elem.findtext('odm:Description/odm:TranslatedText', namespaces=ns)
-                dataset_purpose = item_group_def_elem.findtext('def:Purpose/def:TranslatedText', namespaces=ns)
-                dataset_structure = item_group_def_elem.findtext('def:Structure', namespaces=ns)
-                dataset_class = item_group_def_elem.findtext('def:Class', namespaces=ns)
-                dataset_source = item_group_def_elem.findtext('def:Source', namespaces=ns)
-                
-                unique_dataset_oids.add(dataset_oid)
-
-                item_refs = []
-                for item_ref_elem in item_group_def_elem.xpath('odm:ItemRef', namespaces=ns):
-                    item_refs.append({
-                        "ItemOID": item_ref_elem.get('ItemOID'),
-                        "OrderNumber": int(item_ref_elem.get('OrderNumber')) if item_ref_elem.get('OrderNumber') else None,
-                        "Mandatory": item_ref_elem.get('Mandatory') == 'Yes',
-                        "KeySequence": int(item_ref_elem.get('KeySequence')) if item_ref_elem.get('KeySequence') else None,
-                        "MethodOID": item_ref_elem.get('MethodOID'),
-                        "WhereClauseOID": item_ref_elem.get('WhereClauseOID')
-                    })
-                item_refs.sort(key=lambda x: x['OrderNumber'] if x['OrderNumber'] is not None else float('inf'))
+            write_flat_csv(output_db_path, output_csv_path)
+            print(f"Successfully wrote flat variables CSV to: {output_csv_path}")
+        except IOError as e:
+            print(f"Error writing CSV file {output_csv_path}: {e}")
 
-                # Create a CSV row for each variable in this dataset
-                for var_item_ref in item_refs:
-                    variable_oid = var_item_ref.get("ItemOID")
-                    var_details = current_file_variables.get(variable_oid, {}) # Get full details from collected variables
-                    
-                    if not var_details:
-                        print(f"Warning: ItemRef '{variable_oid}' in dataset '{dataset_name}' has no matching ItemDef in this file. Skipping variable row.")
-                        continue
+    # --- Generate Summary Report ---
+    standards_summary = {}
+    for study in tables["studies"]:
+        if study["standard_name"]:
+            versions = standards_summary.setdefault(study["standard_name"], {})
+            versions[study["standard_version"]] = versions.get(study["standard_version"], 0) + 1
 
-                    unique_variable_oids.add(variable_oid)
-
-                    # Populate codelist fields for this variable's row
-                    codelist_oid = var_details.get("CodeListOID", None)
-                    codelist_name = ""
-                    codelist_data_type = ""
-                    codelist_coded_values_str = ""
-
-                    if codelist_oid and codelist_oid in master_codelists:
-                        codelist_info = master_codelists[codelist_oid] # Get from the master list
-                        codelist_name = codelist_info.get("Name", "")
-                        codelist_data_type = codelist_info.get("DataType", "")
-                        
-                        coded_value_pairs = []
-                        for cv in codelist_info.get("CodedValues", []):
-                            coded_value_pairs.append(f"{cv.get('CodedValue', '')}: {cv.get('Decode', '')}")
-                        codelist_coded_values_str = ";\n".join(coded_value_pairs) # Semicolon + newline delimiter
-
-
-                    row = OrderedDict([
-                        ("Source_File", current_file_name),
-                        ("Study_OID", study_oid),
-                        ("Study_Name", study_name),
-                        ("Study_Description", study_description),
-                        ("Protocol_Name", protocol_name),
-                        ("Define_MetadataVersion_OID", mdv_oid),
-                        ("Define_MetadataVersion_Name", mdv_name),
-                        ("Define_Version", define_version),
-                        ("Standard_Name", standard_name),
-                        ("Standard_Version", standard_version),
-                        ("Dataset_OID", dataset_oid),
-                        ("Dataset_Name", dataset_name),
-                        ("Dataset_SAS_Name", dataset_sas_name),
-                        ("Dataset_Description", dataset_description),
-                        ("Dataset_Purpose", dataset_purpose),
-                        ("Dataset_Structure", dataset_structure),
-                        ("Dataset_Class", dataset_class),
-                        ("Dataset_Source", dataset_source),
-                        ("Variable_OID", variable_oid),
-                        ("Variable_Name", var_details.get("Name", "N/A")),
-                        ("Variable_Label", var_details.get("Description", "")),
-                        ("Variable_Data_Type", var_details.get("DataType", "N/A")),
-                        ("Variable_Length", var_details.get("Length", None)),
-                        ("Variable_SAS_Field_Name", var_details.get("SASFieldName", "")),
-                        ("Variable_Origin", var_details.get("Origin", "")),
-                        ("Variable_Roles", ", ".join(var_details.get("Roles", []))),
-                        ("Variable_Mandatory", var_item_ref.get("Mandatory", False)),
-                        ("Variable_Key_Sequence", var_item_ref.get("KeySequence", None)),
-                        ("Variable_Method_OID", var_item_ref.get("MethodOID", None)),
-                        ("Variable_WhereClause_OID", var_item_ref.get("WhereClauseOID", None)),
-                        ("CodeList_OID", codelist_oid),
-                        ("CodeList_Name", codelist_name),
-                        ("CodeList_Data_Type", codelist_data_type),
-                        ("CodeList_Coded_Values", codelist_coded_values_str)
-                    ])
-                    all_variable_rows.append(row)
-
-    # --- Write the single CSV File ---
-    output_csv_path = os.path.join(output_directory, csv_filename)
-    try:
-        with open(output_csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=csv_fieldnames, quoting=csv.QUOTE_MINIMAL)
-            writer.writeheader()
-            writer.writerows(all_variable_rows)
-        print(f"\nSuccessfully wrote consolidated variables CSV to: {output_csv_path}")
-    except IOError as e:
-        print(f"Error writing CSV file {output_csv_path}: {e}")
-    except Exception as e:
-        print(f"An unexpected error occurred during CSV write: {e}")
+    unique_study_oids = {s["study_oid"] for s in tables["studies"] if s["study_oid"] != "N/A"}
+    unique_dataset_oids = {d["dataset_oid"] for d in tables["datasets"]}
+    unique_variable_oids = {v["variable_oid"] for v in tables["variables"]}
+    unique_codelist_oids = {c["codelist_oid"] for c in tables["codelists"]}
 
-    # --- Generate Summary Report ---
     output_report_path = os.path.join(output_directory, report_filename)
     report_content = [
         f"--- Metadata Consolidation Report ---",
         f"Generated On: {datetime.now().isoformat(timespec='seconds')}",
         f"Source XML Directory: {xml_input_directory}",
-        f"Total Define-XML Files Processed: {len(xml_files)}",
+        f"Total Define-XML Files Found: {len(xml_files)}",
+        f"Define-XML Files Parsed This Run: {len(parsed_files)}",
+        f"Define-XML Files In Catalog: {len(tables['define_files'])}",
         f"Total Unique Studies Found: {len(unique_study_oids)}",
         f"Total Unique Datasets Found: {len(unique_dataset_oids)}",
         f"Total Unique Variables Found: {len(unique_variable_oids)}",
-        f"Total Unique Codelists Found: {len(unique_codelist_oids_for_report)}",
-        f"\nStandards Summary (Standard Name: Version: Count):"
+        f"Total Unique Codelists Found: {len(unique_codelist_oids)}",
+        f"\nTable Row Counts:"
     ]
+    for table_name in METADATA_TABLES:
+        report_content.append(f"  - {table_name}: {len(tables[table_name])}")
+    report_content.append(f"\nStandards Summary (Standard Name: Version: Count):")
     for std_name, versions in standards_summary.items():
         for version, count in versions.items():
             report_content.append(f"  - {std_name}: {version} ({count} occurrences)")
@@ -345,7 +731,7 @@ if __name__ == "__main__":
     # This will NOT overwrite previous 'output_metadata_json' contents.
     output_directory = "define_output_csv" # Updated directory name
     
-    # Name of the output CSV file
+    # Name of the optional flat CSV generated from the normalized tables (None to skip)
     csv_output_filename = "all_variables_report.csv"
     # Name of the output summary report file
     text_report_filename = "summary_report.txt"
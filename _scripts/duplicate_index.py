@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Content-hash duplicate index across the tagged-files corpora.
+
+The same file is often released more than once, in the EUA and BLA
+productions or in both eua-051925 and eua-063025, under a different name
+each time. Every copy has been downloaded, extracted and tagged separately
+and is listed as its own row. This script groups the copies by content hash:
+the file's MD5, which is what Google Drive reports as md5Checksum, so a hash
+computed from a local download and Drive's checksum are interchangeable.
+
+A document's hash comes from, in order:
+- its contentHash field (written by the tagger for newly tagged files)
+- content-hashes.json, the cache of Drive file ID -> MD5 this script keeps
+- --files DIR: local copies of the files, hashed and matched by filename
+  (by folder too, when several documents share a filename)
+- --drive: Drive's md5Checksum for the documents still without one (needs
+  google-api-python-client and the tagger's token.pickle)
+Google Docs-native files have no Drive checksum and stay unhashed unless a
+local copy is given.
+
+Output, duplicate-index.json: every hash with two or more copies, and the
+copies in corpus order (CORPORA) then document order; the first is the copy
+whose tags the tagger reuses (tag-eua-files.py) for files already tagged.
+
+--annotate also writes the links into the corpora: each copy gets its
+contentHash and "duplicates" (the other copies, as {corpus, folder,
+filename, googleDriveLink}), and every copy but the first "duplicateOf" (the
+first copy). Rebuild the navigator data files afterwards.
+
+Usage (from the repository root):
+    python _scripts/duplicate_index.py
+    python _scripts/duplicate_index.py --files ~/Downloads/productions
+    python _scripts/duplicate_index.py --drive --annotate
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter
+from pathlib import Path
+
+from tagged_json import TaggedFilesReader, TaggedFilesWriter, iter_documents
+
+INDEX_FORMAT = 'tagged-files-duplicates'
+INDEX_VERSION = 1
+
+# Corpora in the order their copies count as first; ensure_ascii as each file is written
+CORPORA = {
+    'pfizer-eua-tagged-files.json': True,
+    'pd-bla-tagged-files.json': False,
+    'moderna-tagged-files.json': False,
+}
+
+HASH_CACHE = 'content-hashes.json'
+INDEX_FILE = 'duplicate-index.json'
+
+# Files per Drive batch request (the API allows up to 100)
+DRIVE_BATCH_SIZE = 100
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def drive_file_id(doc):
+    """The Drive file ID in a document's googleDriveLink, or None"""
+    link = doc.get('googleDriveLink') or ''
+    parts = link.split('/d/', 1)
+    if len(parts) < 2:
+        return None
+    return parts[1].split('/', 1)[0].split('?', 1)[0] or None
+
+
+def file_md5(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_hash_cache(path=HASH_CACHE):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_hash_cache(hashes, path=HASH_CACHE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(hashes.items())), f, indent=2)
+
+
+def document_hash(doc, hashes):
+    return doc.get('contentHash') or hashes.get(drive_file_id(doc))
+
+
+def load_corpora(corpora):
+    """(corpus, document) pairs in the order copies are ranked"""
+    pairs = []
+    for json_file in corpora:
+        if not os.path.exists(json_file):
+            print(f"File not found: {json_file}")
+            continue
+        pairs.extend((json_file, doc) for doc in iter_documents(json_file))
+    return pairs
+
+
+def local_copies(docs, files_dir):
+    """(path, documents) for each file under files_dir named like one of docs; a
+    filename shared by several documents only matches those whose folder is in the path"""
+    by_filename = {}
+    for doc in docs:
+        by_filename.setdefault(doc['filename'], []).append(doc)
+    for root, _, filenames in os.walk(files_dir):
+        folders = set(Path(root).parts)
+        for filename in filenames:
+            matches = by_filename.get(filename, [])
+            if len(matches) > 1:
+                matches = [doc for doc in matches if doc.get('folder') in folders]
+            if matches:
+                yield os.path.join(root, filename), matches
+
+
+def hash_local_files(pairs, hashes, files_dir):
+    """Hash local copies of unhashed documents; returns how many were added"""
+    unhashed = [doc for _, doc in pairs if not document_hash(doc, hashes) and drive_file_id(doc)]
+    added = 0
+    for path, docs in local_copies(unhashed, files_dir):
+        checksum = file_md5(path)
+        for doc in docs:
+            hashes[drive_file_id(doc)] = checksum
+            added += 1
+    return added
+
+
+def drive_service():
+    """Drive API client from the tagger's saved token, or None"""
+    try:
+        import pickle
+        from google.auth.transport.requests import Request
+        from googleapiclient.discovery import build
+    except ImportError:
+        print("google-api-python-client not installed; skipping Drive checksums")
+        return None
+    if not os.path.exists('token.pickle'):
+        print("No token.pickle (run the tagger once to authorize Drive); skipping Drive checksums")
+        return None
+    with open('token.pickle', 'rb') as token:
+        creds = pickle.load(token)
+    if not creds.valid and creds.expired and creds.refresh_token:
+        creds.refresh(Request())
+    return build('drive', 'v3', credentials=creds)
+
+
+def fetch_drive_checksums(pairs, hashes):
+    """Ask Drive for the md5Checksum of unhashed documents, batched; returns how many were added"""
+    file_ids = sorted({drive_file_id(doc) for _, doc in pairs
+                       if drive_file_id(doc) and not document_hash(doc, hashes)})
+    if not file_ids:
+        return 0
+    service = drive_service()
+    if service is None:
+        return 0
+
+    added = 0
+
+    def collect(request_id, response, exception):
+        nonlocal added
+        if exception is None and response.get('md5Checksum'):
+            hashes[response['id']] = response['md5Checksum']
+            added += 1
+
+    print(f"Fetching Drive checksums for {len(file_ids)} files...")
+    for start in range(0, len(file_ids), DRIVE_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=collect)
+        for file_id in file_ids[start:start + DRIVE_BATCH_SIZE]:
+            batch.add(service.files().get(fileId=file_id, fields='id, md5Checksum'))
+        batch.execute()
+    return added
+
+
+def copy_reference(json_file, doc):
+    return {
+        'corpus': Path(json_file).stem,
+        'folder': doc.get('folder'),
+        'filename': doc['filename'],
+        'googleDriveLink': doc.get('googleDriveLink'),
+    }
+
+
+def build_duplicate_index(pairs, hashes):
+    """The index: hash -> copies, for hashes with more than one copy"""
+    groups = {}
+    hashed = 0
+    for json_file, doc in pairs:
+        checksum = document_hash(doc, hashes)
+        if checksum:
+            hashed += 1
+            groups.setdefault(checksum, []).append(copy_reference(json_file, doc))
+    return {
+        'format': INDEX_FORMAT,
+        'version': INDEX_VERSION,
+        'corpora': sorted({Path(json_file).stem for json_file, _ in pairs}),
+        'documents': len(pairs),
+        'hashed': hashed,
+        'groups': {checksum: copies for checksum, copies in groups.items() if len(copies) > 1},
+    }
+
+
+def load_known_documents(corpora=CORPORA, hash_cache=HASH_CACHE):
+    """Content hash -> the first tagged copy's document, for reusing its tags"""
+    hashes = load_hash_cache(hash_cache)
+    known = {}
+    for _, doc in load_corpora(corpora):
+        checksum = document_hash(doc, hashes)
+        if checksum and doc.get('processed') and checksum not in known:
+            known[checksum] = doc
+    return known
+
+
+def annotate_corpora(index, hashes):
+    """Write contentHash, duplicates and duplicateOf into the corpus files"""
+    for json_file, ensure_ascii in CORPORA.items():
+        if not os.path.exists(json_file):
+            continue
+        corpus = Path(json_file).stem
+        changed = 0
+        with TaggedFilesReader(json_file) as reader, TaggedFilesWriter(json_file, ensure_ascii) as writer:
+            for doc in reader.documents():
+                before = dict(doc)
+                checksum = document_hash(doc, hashes)
+                copies = index['groups'].get(checksum, [])
+                doc.pop('duplicates', None)
+                doc.pop('duplicateOf', None)
+                if checksum:
+                    doc['contentHash'] = checksum
+                if copies:
+                    this = (corpus, doc['filename'], doc.get('folder'))
+                    doc['duplicates'] = [copy for copy in copies
+                                         if (copy['corpus'], copy['filename'], copy['folder']) != this]
+                    first = copies[0]
+                    if (first['corpus'], first['filename'], first['folder']) != this:
+                        doc['duplicateOf'] = first
+                changed += doc != before
+                writer.write_document(doc)
+            writer.extras.update(reader.extras)
+            if not changed:
+                writer.discard()
+        print(f"  {json_file}: {changed} documents updated")
+
+
+def print_summary(index):
+    groups = index['groups']
+    redundant = sum(len(copies) - 1 for copies in groups.values())
+    print(f"\n{index['hashed']} of {index['documents']} documents hashed")
+    print(f"Files with more than one copy: {len(groups)} ({redundant} redundant copies)")
+    pairs = Counter()
+    for copies in groups.values():
+        first = copies[0]
+        for copy in copies[1:]:
+            pairs[(f"{first['corpus']}/{first['folder']}", f"{copy['corpus']}/{copy['folder']}")] += 1
+    for (first, other), count in pairs.most_common(10):
+        print(f"  {count:>5}  {other}  duplicates  {first}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicate files across the tagged-files corpora by content hash")
+    parser.add_argument('--files', metavar='DIR', help="Hash local copies of the files under DIR")
+    parser.add_argument('--drive', action='store_true', help="Fetch md5Checksum from Google Drive for unhashed files")
+    parser.add_argument('--annotate', action='store_true', help="Write the duplicate links into the corpus files")
+    parser.add_argument('--output', default=INDEX_FILE, help=f"Index file (default: {INDEX_FILE})")
+    args = parser.parse_args()
+
+    pairs = load_corpora(CORPORA)
+    hashes = load_hash_cache()
+    added = 0
+    if args.files:
+        added += hash_local_files(pairs, hashes, args.files)
+    if args.drive:
+        added += fetch_drive_checksums(pairs, hashes)
+    if added:
+        save_hash_cache(hashes)
+        print(f"Added {added} hashes to {HASH_CACHE}")
+
+    index = build_duplicate_index(pairs, hashes)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    print_summary(index)
+    print(f"\nIndex written to {args.output}")
+
+    if not index['hashed']:
+        print("No document has a hash yet: use --files and/or --drive")
+    if args.annotate:
+        print("\nAnnotating corpora...")
+        annotate_corpora(index, hashes)
+        print("Rebuild the navigator data: build_compact_navigator_data.py and build_search_index.py")
+
+
+if __name__ == "__main__":
+    main()
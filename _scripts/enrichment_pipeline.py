@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Run the tagged-files enrichment scripts as ordered passes over each corpus.
+
+Each corpus JSON is streamed once: every document gets the registered passes
+for its corpus applied in order and is written straight to a temp file that
+replaces the original atomically at the end (see tagged_json.py), so memory
+does not grow with the corpus. Passes that recompute corpus statistics keep
+only the few fields they need per document. Timing and the number of
+documents changed are reported for every pass.
+
+Every enriched document carries an enrichmentFingerprint: a hash of its
+fields plus the rule versions of the corpus passes, taken after enrichment.
+Documents whose fingerprint still matches are skipped, so re-tagging a few
+files (or re-running with no changes) only touches those records. Bumping a
+script's RULE_VERSION reprocesses every document of the corpora using it.
+
+Usage (from the repository root):
+    python _scripts/enrichment_pipeline.py                 # all corpora
+    python _scripts/enrichment_pipeline.py pd-bla-tagged-files.json
+    python _scripts/enrichment_pipeline.py --dry-run       # report only, don't write
+    python _scripts/enrichment_pipeline.py --full          # ignore fingerprints
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# The one-off EUA scripts live in _conversion_scripts/; append it so the
+# _scripts/ copies (e.g. update_crf_files.py) take precedence
+sys.path.append(str(Path(__file__).resolve().parent.parent / '_conversion_scripts'))
+
+import entity_extractor
+import populate_clinical_trials
+import populate_vaccine_candidates
+import proper_case_document_types
+import split_vaccine_trial_fields
+import update_crf_files
+import update_data_files_to_dataset
+from tagged_json import TaggedFilesReader, TaggedFilesWriter
+
+FINGERPRINT_FIELD = 'enrichmentFingerprint'
+
+# name -> (per-document function, optional whole-corpus function run afterwards,
+#          rule version, document fields the whole-corpus function reads)
+PASSES = {}
+
+def register_pass(name, apply_document, finalize=None, version='1', finalize_fields=()):
+    """
+    Register an enrichment pass; apply_document mutates one document in place.
+    finalize(data) sees data['documents'] reduced to finalize_fields.
+    """
+    PASSES[name] = (apply_document, finalize, str(version), tuple(finalize_fields))
+
+def _extractor_version(module):
+    """Rule version of a pass built on the shared entity extractor"""
+    return f"{module.RULE_VERSION}+{entity_extractor.RULE_VERSION}"
+
+register_pass('populate_clinical_trials', populate_clinical_trials.enrich_document,
+              version=_extractor_version(populate_clinical_trials))
+register_pass('populate_vaccine_candidates', populate_vaccine_candidates.enrich_document,
+              version=_extractor_version(populate_vaccine_candidates))
+register_pass('proper_case_document_types', proper_case_document_types.proper_case_document_type,
+              version=proper_case_document_types.RULE_VERSION)
+register_pass('update_data_files_to_dataset', update_data_files_to_dataset.set_dataset_document_type,
+              update_data_files_to_dataset.update_document_type_statistics,
+              version=update_data_files_to_dataset.RULE_VERSION, finalize_fields=['documentType'])
+register_pass('split_vaccine_trial_fields', split_vaccine_trial_fields.split_document_fields,
+              split_vaccine_trial_fields.update_statistics,
+              version=_extractor_version(split_vaccine_trial_fields),
+              finalize_fields=['vaccineCandidate', 'clinicalTrial'])
+register_pass('update_crf_files', update_crf_files.update_crf_document,
+              version=_extractor_version(update_crf_files))
+
+# Passes per corpus, in the order the standalone scripts were run.
+# ensure_ascii matches how each file has been written so far.
+CORPORA = {
+    'pd-bla-tagged-files.json': {
+        'passes': ['populate_clinical_trials', 'populate_vaccine_candidates', 'update_crf_files'],
+        'ensure_ascii': False,
+    },
+    'pfizer-eua-tagged-files.json': {
+        'passes': ['proper_case_document_types', 'update_data_files_to_dataset',
+                   'split_vaccine_trial_fields', 'update_crf_files'],
+        'ensure_ascii': True,
+    },
+    'moderna-tagged-files.json': {
+        'passes': ['update_crf_files'],
+        'ensure_ascii': False,
+    },
+}
+
+def pass_signature(passes):
+    """Names and rule versions of a corpus's passes, in order"""
+    return ';'.join(f"{name}@{PASSES[name][2]}" for name in passes)
+
+def document_fingerprint(doc, signature):
+    """Hash of a document's fields (except the fingerprint itself) and the pass signature"""
+    fields = {k: v for k, v in doc.items() if k != FINGERPRINT_FIELD}
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False) + '\n' + signature
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+def apply_passes(doc, passes, changed, timings):
+    """Apply each pass to one document, counting changes and time per pass"""
+    for name in passes:
+        apply_document = PASSES[name][0]
+        start = time.perf_counter()
+        before = copy.deepcopy(doc)
+        apply_document(doc)
+        if doc != before:
+            changed[name] += 1
+        timings[name] += time.perf_counter() - start
+
+def run_finalizers(extras, summaries, passes, timings):
+    """Run the whole-corpus functions; returns the names of passes that changed the extras"""
+    data = dict(extras)
+    data['documents'] = summaries
+    corpus_changed = set()
+    for name in passes:
+        finalize = PASSES[name][1]
+        if not finalize:
+            continue
+        start = time.perf_counter()
+        before = {k: copy.deepcopy(v) for k, v in data.items() if k != 'documents'}
+        finalize(data)
+        if before != {k: v for k, v in data.items() if k != 'documents'}:
+            corpus_changed.add(name)
+        timings[name] += time.perf_counter() - start
+    return {k: v for k, v in data.items() if k != 'documents'}, corpus_changed
+
+def run_corpus(json_file, passes, ensure_ascii=False, dry_run=False, full=False):
+    """Stream a corpus once, enrich stale documents, and replace the file if anything changed"""
+    print(f"\n{json_file}")
+    print("-" * 50)
+
+    signature = pass_signature(passes)
+    finalize_fields = [field for name in passes for field in PASSES[name][3]]
+    changed = Counter()
+    timings = Counter()
+    summaries = []
+    total = stale = 0
+    refingerprinted = False
+
+    start = time.perf_counter()
+    with TaggedFilesReader(json_file) as reader, TaggedFilesWriter(json_file, ensure_ascii) as writer:
+        for doc in reader.documents():
+            total += 1
+            if full or doc.get(FINGERPRINT_FIELD) != document_fingerprint(doc, signature):
+                stale += 1
+                apply_passes(doc, passes, changed, timings)
+
+                # Fingerprint the enriched state so the next run can skip this document
+                fingerprint = document_fingerprint(doc, signature)
+                if doc.get(FINGERPRINT_FIELD) != fingerprint:
+                    doc[FINGERPRINT_FIELD] = fingerprint
+                    refingerprinted = True
+
+            if finalize_fields:
+                summaries.append({field: doc[field] for field in finalize_fields if field in doc})
+            writer.write_document(doc)
+
+        extras, corpus_changed = run_finalizers(reader.extras, summaries, passes, timings)
+        writer.extras.update(extras)
+
+        print(f"  {'stream':<32} {time.perf_counter() - start:7.3f}s  {total} documents")
+        print(f"  {'fingerprints':<32} {'':7}   {stale} to enrich, {total - stale} unchanged")
+        for name in passes:
+            note = " (+ statistics)" if name in corpus_changed else ""
+            print(f"  {name:<32} {timings[name]:7.3f}s  {changed[name]} changed{note}")
+
+        any_changes = refingerprinted or sum(changed.values()) > 0 or corpus_changed
+        if not any_changes:
+            writer.discard()
+            print("  No changes; file left untouched")
+        elif dry_run:
+            writer.discard()
+            print("  Dry run; not writing")
+        else:
+            print(f"  Writing {json_file}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run enrichment passes over tagged-files JSON corpora")
+    parser.add_argument('corpora', nargs='*', default=list(CORPORA), help="Corpus JSON files (default: all)")
+    parser.add_argument('--dry-run', action='store_true', help="Report changes without writing")
+    parser.add_argument('--full', action='store_true', help="Enrich every document, ignoring fingerprints")
+    args = parser.parse_args()
+
+    for json_file in args.corpora:
+        if json_file not in CORPORA:
+            print(f"Unknown corpus: {json_file} (known: {', '.join(CORPORA)})")
+            continue
+        if not os.path.exists(json_file):
+            print(f"File not found: {json_file}")
+            continue
+        config = CORPORA[json_file]
+        run_corpus(json_file, config['passes'], config['ensure_ascii'], args.dry_run, args.full)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+One-scan entity extractor shared by the tagged-files enrichment scripts.
+
+All entity patterns (vaccine candidates, clinical trial IDs including
+BNT162-01, and CRF site/subject numbers) are compiled into a single
+case-insensitive alternation (the CRF filename patterns stay case-sensitive,
+as they always were). Each text field is scanned once; the only entity that can
+contain another is a Pfizer CRF filename with its trial ID
+("CRF_c4591001-1001-10011234.pdf"), so that match emits both.
+
+Each script applies its own rules on top of the emitted entities:
+- populate_vaccine_candidates.py: vaccine candidates from tags/title/filename
+- populate_clinical_trials.py: c4591XXX trial IDs from the filename
+- split_vaccine_trial_fields.py: candidates and trial for the EUA corpus
+- update_crf_files.py: CRF site and subject numbers
+"""
+
+import re
+from collections import namedtuple
+
+# Part of the fingerprint of every pass that uses this extractor
+RULE_VERSION = 1
+
+# kind:  'vaccine', 'trial', 'site' or 'subject'
+# value: normalized value (canonical candidate name, lowercase trial ID, digits)
+# rule:  which pattern produced it, for script-specific rules
+# text:  the exact matched text (original case)
+Entity = namedtuple('Entity', ['kind', 'value', 'rule', 'text'])
+
+# Alternatives share literal prefixes so the regex engine can skip quickly
+# between candidate positions. The "c" of b3c is only looked at, not consumed,
+# since it can start a following entity ("BNT162b3C4591001").
+_ENTITY_PATTERN = re.compile(r'''
+      (?-i:CRF(?:
+          (?P<crf_moderna>_mrna-(?P<moderna_site>\d+)-p\d+-us(?P<moderna_subject>\d+)\.pdf)
+        | (?P<crf_pfizer>_c4591001-(?P<pfizer_site>\d{4})-(?P<pfizer_subject>\d{4}\d+)\.pdf)
+        | (?P<crf_site>s-for-site-(?P<special_site>\d+)\.pdf)
+      ))
+    | bnt162(?:
+          (?P<bnt162b3c>b3(?=c))
+        | (?P<bnt162b3>b3)
+        | (?P<bnt162b2>b2)
+        | (?P<bnt162b1>b1)
+        | (?P<bnt162a1>a1)
+        | (?P<bnt162c2>c2)
+        | (?P<bnt162_01>-01)
+      )
+    | (?P<comirnaty>comirnaty)
+    | (?P<c4591>c4591\d{3})
+''', re.IGNORECASE | re.VERBOSE)
+
+# Characters between the start of a Pfizer CRF match and its trial ID
+_PFIZER_CRF_TRIAL_OFFSET = len('CRF_')
+
+VACCINE_RULES = {
+    'bnt162b3c': 'BNT162b3c',
+    'bnt162b3': 'BNT162b3',
+    'bnt162b2': 'BNT162b2',
+    'comirnaty': 'BNT162b2',  # brand name of BNT162b2
+    'bnt162b1': 'BNT162b1',
+    'bnt162a1': 'BNT162a1',
+    'bnt162c2': 'BNT162c2',
+}
+
+def extract_entities(text):
+    """Scan text once and return every Entity found, in order of position"""
+    entities = []
+    if not text:
+        return entities
+
+    for match in _ENTITY_PATTERN.finditer(text):
+        # lastgroup is the outermost named group that closed last, i.e. the alternative
+        rule = match.lastgroup
+        matched = match.group(0)
+        if rule == 'bnt162b3c':
+            matched = text[match.start():match.end() + 1]
+
+        if rule in VACCINE_RULES:
+            entities.append(Entity('vaccine', VACCINE_RULES[rule], rule, matched))
+        elif rule == 'c4591':
+            entities.append(Entity('trial', matched.lower(), rule, matched))
+        elif rule == 'bnt162_01':
+            entities.append(Entity('trial', 'BNT162-01', rule, matched))
+        elif rule == 'crf_moderna':
+            entities.append(Entity('site', match.group('moderna_site'), rule, matched))
+            entities.append(Entity('subject', match.group('moderna_subject'), rule, matched))
+        elif rule == 'crf_pfizer':
+            entities.append(Entity('site', match.group('pfizer_site'), rule, matched))
+            entities.append(Entity('subject', match.group('pfizer_subject'), rule, matched))
+            # The match consumed the trial ID it contains; emit it as well
+            trial = matched[_PFIZER_CRF_TRIAL_OFFSET:_PFIZER_CRF_TRIAL_OFFSET + len('c4591001')]
+            entities.append(Entity('trial', trial, 'c4591', trial))
+        elif rule == 'crf_site':
+            entities.append(Entity('site', match.group('special_site'), rule, matched))
+
+    return entities
+
+def extract_document_entities(doc):
+    """
+    Scan a document's text fields once each.
+
+    Returns {'filename': [...], 'title': [...], 'tags': [...]} so scripts can
+    apply field-specific rules.
+    """
+    return {
+        'filename': extract_entities(doc.get('filename') or ''),
+        'title': extract_entities(doc.get('title') or ''),
+        'tags': [entity for tag in doc.get('tags') or [] for entity in extract_entities(tag)],
+    }
+
+def first_entity(entities, kind, rules=None):
+    """First entity of a kind (optionally restricted to some rules), or None"""
+    for entity in entities:
+        if entity.kind == kind and (rules is None or entity.rule in rules):
+            return entity
+    return None
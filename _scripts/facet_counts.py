@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Precomputed facet counts for the navigator pages.
+
+The navigator pages recount every filter facet (folder, module, file type,
+document type, domain, vaccine candidate, clinical trial) over the filtered
+documents on each click. This module computes those counts once at build time:
+- "counts": every facet over the whole corpus (the page's initial state)
+- "cross":  for each single active filter value (or single selected tag, for
+            the most used tags), every facet over the documents it matches
+
+The page uses these whenever at most one filter is active, and only scans the
+(already filtered) documents for combinations of filters or for filter values
+matching fewer than MIN_CROSS_DOCUMENTS documents.
+
+The rules below mirror the counting and filter code in the pages
+(updateFilterCountsFromFilteredData / processData), including where the two
+disagree (a "-sas.pdf" file counts as "sas" but also matches the "pdf"
+filter). The Moderna page derives file types and domains differently, hence
+the per-corpus profiles.
+
+build_compact_navigator_data.py ships the result in the compact data file.
+
+Usage (from the repository root):
+    python _scripts/facet_counts.py
+    python _scripts/facet_counts.py moderna-tagged-files.json
+"""
+
+import argparse
+import os
+import re
+from collections import Counter
+
+from tagged_json import iter_documents
+
+FACETS_VERSION = 1
+
+DEFAULT_CORPORA = [
+    'pd-bla-tagged-files.json',
+    'pfizer-eua-tagged-files.json',
+    'moderna-tagged-files.json',
+]
+
+# Which page's file type / domain rules apply to each corpus
+CORPUS_PROFILES = {
+    'pd-bla-tagged-files.json': 'pfizer',
+    'pfizer-eua-tagged-files.json': 'pfizer',
+    'moderna-tagged-files.json': 'moderna',
+}
+
+# Selected tags with precomputed counts (by number of documents)
+TOP_TAG_COUNT = 100
+
+# Smaller filter states are left to the page: counting a few dozen rows is instant
+MIN_CROSS_DOCUMENTS = 25
+
+SLIPSHEET_TYPES = {'slip sheet', 'slipsheet', 'foia redaction slip sheet'}
+
+_EXTENSION = re.compile(r'\.[^/.]+\Z')
+_DOMAIN = {
+    'pfizer': re.compile(r'^(ad[a-z]+|supp[a-z]+|[a-z]{2,})\Z'),
+    'moderna': re.compile(r'^(ad[a-z0-9]+|supp[a-z]+|[a-z]{2,})\Z'),
+}
+
+
+def navigator_row(doc):
+    """The fields of a page's csvData row that the filters look at"""
+    doc_type = doc.get('documentType') or 'Unknown'
+    if doc_type.lower() in SLIPSHEET_TYPES:
+        doc_type = 'FOIA Redaction Slipsheet'
+    tags = ', '.join(doc.get('tags') or []).split(', ')
+    return {
+        'filename': doc['filename'],
+        'folder': doc.get('folder'),
+        'module': doc.get('module'),
+        'documentType': doc_type,
+        'vaccineCandidate': doc.get('vaccineCandidate'),
+        'clinicalTrial': doc.get('clinicalTrial'),
+        'file_type': doc.get('fileType'),
+        'tags': [tag for tag in tags if tag.strip()],
+    }
+
+
+def file_extension(filename):
+    """getFileExtension()"""
+    parts = filename.split('.')
+    return parts[-1].lower() if len(parts) > 1 else 'other'
+
+
+def extract_domain(filename, profile):
+    """extractDomain(): the dataset domain at the end of a filename, or None"""
+    lower = filename.lower()
+    if lower.endswith('-sas.pdf'):
+        return 'sas'
+    if profile == 'moderna' and not lower.endswith('.xpt'):
+        return None
+    parts = _EXTENSION.sub('', filename, count=1).split('_' if profile == 'moderna' else '-')
+    if len(parts) > 1 and _DOMAIN[profile].match(parts[-1].lower()):
+        return parts[-1].lower()
+    return None
+
+
+def file_type_keys(row, profile):
+    """The file type button(s) a row is counted under"""
+    filename = row['filename']
+    if profile == 'moderna':
+        file_type = row['file_type'].lower() if row['file_type'] else None
+        if file_type:
+            return ['excel' if file_type in ('xls', 'xlsx') else file_type]
+        if filename.lower().endswith('-sas.pdf'):
+            return ['sas']
+        ext = file_extension(filename)
+        return [ext] if ext else []
+
+    ext = file_extension(filename)
+    if filename.lower().endswith('-sas.pdf'):
+        return ['sas']
+    if ext in ('doc', 'docx'):
+        return ['word']
+    return [ext]
+
+
+def file_type_matches(row, value, profile):
+    """Whether the file type filter set to value keeps a row"""
+    filename = row['filename']
+    ext = file_extension(filename)
+    if profile == 'moderna':
+        file_type = row['file_type'].lower() if row['file_type'] else None
+        if file_type:
+            return file_type in ('xls', 'xlsx') if value == 'excel' else file_type == value
+        if value == 'sas':
+            return filename.lower().endswith('-sas.pdf')
+        if value == 'excel':
+            return ext in ('xls', 'xlsx')
+        return ext == value
+
+    if value == 'sas':
+        return filename.lower().endswith('-sas.pdf')
+    if value == 'word':
+        return ext in ('doc', 'docx')
+    return ext == value
+
+
+def vaccine_keys(row):
+    candidates = row['vaccineCandidate']
+    if isinstance(candidates, list):
+        return candidates
+    return [candidates] if candidates else ['None']
+
+
+def vaccine_matches(row, value):
+    candidates = row['vaccineCandidate']
+    if isinstance(candidates, list):
+        return value in candidates
+    return candidates == value if candidates else value == 'None'
+
+
+def facet_rules(profile):
+    """facet -> (keys a row is counted under, whether the filter set to a value keeps a row)"""
+    def domain_keys(row):
+        domain = extract_domain(row['filename'], profile)
+        return [domain] if domain else []
+
+    return {
+        'folder': (lambda row: [row['folder'] or 'none'],
+                   lambda row, value: row['folder'] == value),
+        'module': (lambda row: [row['module'] or 'none'],
+                   lambda row, value: (not row['module'] if value == 'none'
+                                       else (row['module'] or '').strip() == value)),
+        'documentType': (lambda row: [row['documentType']],
+                         lambda row, value: row['documentType'] == value),
+        'vaccineCandidate': (vaccine_keys, vaccine_matches),
+        'clinicalTrial': (lambda row: [row['clinicalTrial'] or 'None'],
+                          lambda row, value: (row['clinicalTrial'] or 'None') == value),
+        'fileType': (lambda row: file_type_keys(row, profile),
+                     lambda row, value: file_type_matches(row, value, profile)),
+        'domain': (domain_keys,
+                   lambda row, value: extract_domain(row['filename'], profile) == value),
+    }
+
+
+def count_facets(keyed_rows, total):
+    """Counts per facet, keys in order of first appearance (as the pages count them)"""
+    counts = {'total': total}
+    for facet in keyed_rows[0][1] if keyed_rows else ():
+        counts[facet] = {'none': 0} if facet == 'module' else {}
+    for _, keys in keyed_rows:
+        for facet, values in keys.items():
+            facet_counts = counts[facet]
+            for value in values:
+                facet_counts[value] = facet_counts.get(value, 0) + 1
+    return counts
+
+
+def build_facets(documents, profile):
+    """The facets block for one corpus"""
+    rules = facet_rules(profile)
+    rows = [navigator_row(doc) for doc in documents]
+    keyed_rows = [(row, {facet: keys(row) for facet, (keys, _) in rules.items()}) for row in rows]
+
+    counts = count_facets(keyed_rows, len(rows))
+
+    cross = {}
+    for facet, (_, matches) in rules.items():
+        values = [value for value in counts[facet] if counts[facet][value] or value == 'none']
+        cross[facet] = {}
+        for value in values:
+            selected = [item for item in keyed_rows if matches(item[0], value)]
+            if len(selected) >= MIN_CROSS_DOCUMENTS:
+                cross[facet][value] = count_facets(selected, len(selected))
+
+    tag_documents = Counter(tag for row in rows for tag in set(row['tags']))
+    top_tags = sorted(tag_documents.items(), key=lambda item: (-item[1], item[0]))[:TOP_TAG_COUNT]
+    cross['tags'] = {}
+    for tag, _ in top_tags:
+        selected = [item for item in keyed_rows if tag in item[0]['tags']]
+        if len(selected) >= MIN_CROSS_DOCUMENTS:
+            cross['tags'][tag] = count_facets(selected, len(selected))
+
+    return {
+        'version': FACETS_VERSION,
+        'profile': profile,
+        'counts': counts,
+        'topTags': [[tag, count] for tag, count in top_tags],
+        'cross': cross,
+    }
+
+
+def profile_for(json_file):
+    return CORPUS_PROFILES.get(os.path.basename(json_file), 'pfizer')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the precomputed navigator facet counts")
+    parser.add_argument('corpora', nargs='*', default=DEFAULT_CORPORA, help="Corpus JSON files (default: all)")
+    args = parser.parse_args()
+
+    for json_file in args.corpora:
+        if not os.path.exists(json_file):
+            print(f"File not found: {json_file}")
+            continue
+        facets = build_facets(list(iter_documents(json_file)), profile_for(json_file))
+        print(f"\n{json_file} ({facets['counts']['total']} documents, {facets['profile']} rules)")
+        for facet, values in facets['counts'].items():
+            if facet == 'total':
+                continue
+            top = sorted(values.items(), key=lambda item: -item[1])[:5]
+            print(f"  {facet:<18} {len(values):>4} values; top: " +
+                  ', '.join(f"{value} ({count})" for value, count in top))
+        states = sum(len(rows) for rows in facets['cross'].values())
+        print(f"  Single-filter states precomputed: {states} (incl. {len(facets['cross']['tags'])} tags)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Load test for the corpus query API (corpus_api.py).
+
+The request mix is what the navigator pages do most, for every corpus the
+server has loaded: the unfiltered first page and facet counts, a folder,
+file type, document type or top tag filter (documents and facets), a
+search for a word from the top tags, the next pages, and a sort by title.
+The filter values come from the server's own unfiltered facet counts.
+
+Each of --concurrency clients keeps one HTTP/1.1 connection open and sends
+requests from the mix in turn until --requests have been sent in total.
+With --revalidate, a client repeating a URL sends back the ETag it got, as
+a browser would, and the server should answer 304.
+
+Reports requests per second, and per kind of request the count, status
+codes and latency percentiles.
+
+Usage (from the repository root, with the server running):
+    python _scripts/load_test_api.py
+    python _scripts/load_test_api.py --url http://127.0.0.1:8765 --concurrency 32 --requests 5000 --revalidate
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from corpus_api import DEFAULT_HOST, DEFAULT_PORT
+
+# Filter values per facet taken from the unfiltered counts
+VALUES_PER_FACET = 5
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.etags = {}
+
+    async def get(self, path, revalidate=False):
+        """(status, body) of a GET, reconnecting if the server closed the connection"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        headers = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Accept-Encoding: identity"]
+        if revalidate and path in self.etags:
+            headers.append(f"If-None-Match: {self.etags[path]}")
+        self.writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1'))
+        await self.writer.drain()
+
+        head = (await self.reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        status = int(head[0].split(' ')[1])
+        response_headers = {}
+        for line in head[1:]:
+            name, _, value = line.partition(':')
+            if name:
+                response_headers[name.strip().lower()] = value.strip()
+        length = int(response_headers.get('content-length', 0))
+        body = await self.reader.readexactly(length) if length else b''
+        if 'etag' in response_headers:
+            self.etags[path] = response_headers['etag']
+        if response_headers.get('connection') == 'close':
+            await self.close()
+        return status, body
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+def url(path, **params):
+    return f"{path}?{urlencode(params, doseq=True)}" if params else path
+
+
+def top_values(counts, facet, limit=VALUES_PER_FACET):
+    return [value for value in counts.get(facet, {}) if value != 'none'][:limit]
+
+
+async def request_mix(client):
+    """(kind, path) pairs covering the common navigator queries on every corpus"""
+    _, body = await client.get('/corpora')
+    mix = []
+    for corpus in json.loads(body)['corpora']:
+        name = corpus['name']
+        _, body = await client.get(url('/facets', corpus=name))
+        counts = json.loads(body)['counts']
+        mix += [('first page', url('/documents', corpus=name)),
+                ('facets', url('/facets', corpus=name)),
+                ('next page', url('/documents', corpus=name, page=2)),
+                ('sort', url('/documents', corpus=name, sort='title', order='desc'))]
+        for facet in ('folder', 'fileType', 'documentType'):
+            for value in top_values(counts, facet):
+                mix += [('filter', url('/documents', corpus=name, **{facet: value})),
+                        ('filter facets', url('/facets', corpus=name, **{facet: value}))]
+        tags = top_values(counts, 'tags')
+        for tag in tags:
+            mix += [('tag', url('/documents', corpus=name, tag=tag)),
+                    ('tag facets', url('/facets', corpus=name, tag=tag))]
+        mix.append(('tags', url('/documents', corpus=name, tag=tags[:2])))
+        for tag in tags:
+            word = tag.split()[0].lower()
+            mix += [('search', url('/documents', corpus=name, q=word)),
+                    ('search prefix', url('/documents', corpus=name, q=word[:3]))]
+    return mix
+
+
+async def worker(client, mix, offset, remaining, revalidate, results):
+    position = offset
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        kind, path = mix[position % len(mix)]
+        position += 1
+        started = time.perf_counter()
+        try:
+            status, _ = await client.get(path, revalidate)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await client.close()
+            status = 'error'
+        results[kind].append((status, time.perf_counter() - started))
+    await client.close()
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+def print_report(results, elapsed):
+    total = sum(len(timings) for timings in results.values())
+    print(f"\n{total} requests in {elapsed:.2f}s: {total / elapsed:.0f} requests/s\n")
+    print(f"{'Request':<15} {'Count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  Status")
+    statuses = Counter()
+    for kind, timings in sorted(results.items()):
+        latencies = sorted(seconds * 1000 for _, seconds in timings)
+        codes = Counter(status for status, _ in timings)
+        statuses.update(codes)
+        print(f"{kind:<15} {len(timings):>6} {percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.95):>8.2f} "
+              f"{percentile(latencies, 0.99):>8.2f} {latencies[-1]:>8.2f}  " +
+              ', '.join(f"{status}: {count}" for status, count in sorted(codes.items(), key=str)))
+    print("\nStatus codes: " + ', '.join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)))
+
+
+async def run(base_url, concurrency, requests, revalidate):
+    parts = urlsplit(base_url)
+    host, port = parts.hostname or DEFAULT_HOST, parts.port or DEFAULT_PORT
+    setup = Client(host, port)
+    mix = await request_mix(setup)
+    await setup.close()
+    print(f"{len(mix)} distinct requests; {concurrency} connections, {requests} requests"
+          f"{' with ETag revalidation' if revalidate else ''}")
+
+    results = defaultdict(list)
+    remaining = [requests]
+    started = time.perf_counter()
+    # Clients start at different points of the mix, so they don't all send the same request
+    await asyncio.gather(*(worker(Client(host, port), mix, i * len(mix) // concurrency, remaining, revalidate, results)
+                           for i in range(concurrency)))
+    print_report(results, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the corpus query API with the navigator's common queries")
+    parser.add_argument('--url', default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", help="Server address")
+    parser.add_argument('--concurrency', type=int, default=16, help="Connections (default: 16)")
+    parser.add_argument('--requests', type=int, default=2000, help="Requests in total (default: 2000)")
+    parser.add_argument('--revalidate', action='store_true', help="Send If-None-Match for repeated URLs")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args.url, args.concurrency, args.requests, args.revalidate))
+    except ConnectionRefusedError:
+        print(f"No server at {args.url}: start it with python _scripts/corpus_api.py serve")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Folder/module shards of the navigator data, for loading pages lazily.
+
+Each corpus is split into one shard per (folder, module) pair. A shard is a
+compact columnar file (build_compact_navigator_data.encode_corpus) of its
+documents, plus "ordinals": a bitmap (bitmap_index.encode_bitmap) of the
+documents' positions in the whole corpus, so the page can reassemble them in
+corpus order and keep using the bitmap and search indexes.
+
+The manifest is what the page renders first:
+- "count", "source": as in the compact data file
+- "facets": the whole-corpus filter counts (facet_counts.py), which fill the
+  filter buttons and dropdowns before any shard is fetched; the much larger
+  single-filter "cross" counts go in facets.json, fetched after first paint
+- "values": for each facet, the filter values the summaries refer to
+- "shards": per shard its file, folder, module, document count and a facet
+  summary: for each facet, the indexes (into "values") of the filter values
+  that keep at least one of its documents
+
+The page fetches a shard only if, for every active filter, the summary says
+it holds a matching document (or the value is not in the summary at all).
+A state that needs every shard before any has been fetched, which includes
+the first view with no filter set, loads the compact data file instead, so
+opening the page costs the manifest and one file rather than every shard.
+
+Output, for <corpus>.json, in the directory <corpus>.shards/: manifest.json,
+facets.json ({"source", "facets"}) and 000.json, 001.json, ... in folder/module order. build_shards() plans
+them; build_compact_navigator_data.py encodes, verifies and writes them with
+the same .gz/.br variants as the compact file.
+"""
+
+from bitmap_index import decode_bitmap
+from facet_counts import facet_rules, navigator_row
+
+MANIFEST_FORMAT = 'tagged-files-shards'
+MANIFEST_VERSION = 1
+
+
+def shard_key(doc):
+    return (doc.get('folder') or '', doc.get('module') or '')
+
+
+def filter_values(rows, rules):
+    """facet -> every filter value the page can select, in first-appearance order"""
+    values = {}
+    for facet, (keys, _) in rules.items():
+        seen = {'none': None} if facet == 'module' else {}
+        for row in rows:
+            seen.update(dict.fromkeys(keys(row)))
+        values[facet] = list(seen)
+    return values
+
+
+def build_shards(documents, profile, source, facets):
+    """The manifest, and the ordinals of each shard's documents in manifest order"""
+    rules = facet_rules(profile)
+    rows = [navigator_row(doc) for doc in documents]
+    values = filter_values(rows, rules)
+
+    groups = {}
+    for ordinal, doc in enumerate(documents):
+        groups.setdefault(shard_key(doc), []).append(ordinal)
+
+    shards = []
+    shard_ordinals = []
+    for number, ((folder, module), ordinals) in enumerate(sorted(groups.items())):
+        summary = {}
+        for facet, (_, matches) in rules.items():
+            summary[facet] = [i for i, value in enumerate(values[facet])
+                              if any(matches(rows[ordinal], value) for ordinal in ordinals)]
+        shards.append({
+            'file': f"{number:03d}.json",
+            'folder': folder or None,
+            'module': module or None,
+            'count': len(ordinals),
+            'matches': summary,
+        })
+        shard_ordinals.append(ordinals)
+
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'version': MANIFEST_VERSION,
+        'count': len(documents),
+        'source': source,
+        'facets': dict(facets, cross={}),
+        'values': values,
+        'shards': shards,
+    }
+    return manifest, shard_ordinals
+
+
+def verify_shards(manifest, shards, documents, profile):
+    """Check decoded shards, as (encoded ordinals, documents) pairs, against the corpus"""
+    rules = facet_rules(profile)
+    reassembled = [None] * len(documents)
+    for entry, (encoded, shard_documents) in zip(manifest['shards'], shards):
+        ordinals = decode_bitmap(encoded)
+        if len(ordinals) != entry['count'] or len(shard_documents) != entry['count']:
+            raise ValueError(f"Shard {entry['file']} count does not match its documents")
+        for ordinal, doc in zip(ordinals, shard_documents):
+            reassembled[ordinal] = doc
+        rows = [navigator_row(doc) for doc in shard_documents]
+        for facet, (_, matches) in rules.items():
+            expected = [i for i, value in enumerate(manifest['values'][facet])
+                        if any(matches(row, value) for row in rows)]
+            if entry['matches'][facet] != expected:
+                raise ValueError(f"Shard {entry['file']} {facet} summary does not match its documents")
+    if reassembled != documents:
+        raise ValueError("Shards do not reassemble the corpus")
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+SimHash near-duplicate index over the documents' extracted text.
+
+The FOIA releases contain re-Bates-numbered and lightly redacted versions of
+the same reports, which duplicate_index.py's exact content hashes miss. Here
+each document's extracted text gets a 64-bit SimHash: every run of
+SHINGLE_SIZE words votes on each bit, so versions with a few words changed
+end up a few bits apart. Only letters count as words, so Bates numbers,
+dates and page stamps don't change the fingerprint.
+
+Finding pairs is banded: the 64 bits are cut into BLOCKS blocks (of 5 or 6
+bits). Two fingerprints at most MAX_DISTANCE bits apart differ in at most
+that many blocks, so they agree exactly on some BLOCKS - MAX_DISTANCE of
+them. Every document is bucketed under each such combination of blocks (66
+bands of 2 blocks here), and only documents sharing a bucket are compared.
+The buckets stay small (10 to 12-bit keys), so finding all pairs is roughly
+linear over all corpora.
+
+A document's fingerprint comes from, in order:
+- its textSimhash field (written by the tagger, which already extracts the
+  text, for newly tagged files)
+- text-simhashes.json, the cache of Drive file ID -> fingerprint kept here
+- --files DIR: local copies, matched by filename as in duplicate_index.py,
+  with text extracted the way the tagger does (first 7 PDF pages, first 50
+  DOCX paragraphs, XML text; needs PyPDF2 / python-docx)
+FOIA redaction slip sheets are left out: they are all near-identical.
+
+Output, near-duplicates.json: for each Drive file ID with neighbors, the
+other versions ({corpus, folder, filename, googleDriveLink, distance}),
+nearest first. The navigator pages list them as "Other versions"; the
+tagger reuses a tagged version's tags (load_known_versions).
+
+Usage (from the repository root):
+    python _scripts/near_duplicates.py
+    python _scripts/near_duplicates.py --files ~/Downloads/productions
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from itertools import combinations
+from pathlib import Path
+
+from duplicate_index import CORPORA, drive_file_id, load_corpora, local_copies
+from facet_counts import navigator_row
+
+INDEX_FORMAT = 'tagged-files-near-duplicates'
+INDEX_VERSION = 1
+
+SIMHASH_BITS = 64
+BLOCKS = 12
+# Measured on 800-word texts with words removed: within 10 bits are 99.7% of copies
+# with 5 words redacted, 98% with 10 and 88% with 20 (74% and 45% at 6 bits for 10
+# and 20); other than versions of one text, none came closer than 11 bits, and most
+# unrelated texts are 20+ apart
+MAX_DISTANCE = 10
+SHINGLE_SIZE = 3
+
+# Fewer distinct shingles than this is too little text to compare
+MIN_SHINGLES = 8
+
+# Buckets this large are boilerplate, not versions of one document
+MAX_BUCKET = 500
+
+# Extraction limits, as in tag-eua-files.py
+PDF_PAGES = 7
+DOCX_PARAGRAPHS = 50
+TEXT_CHARS = 5000
+
+FINGERPRINT_CACHE = 'text-simhashes.json'
+NEIGHBORS_FILE = 'near-duplicates.json'
+
+WORD_PATTERN = re.compile(r'[^\W\d_]+')
+# (shift, mask) of each block; the first SIMHASH_BITS % BLOCKS blocks get the spare bits
+_BLOCK_WIDTHS = [SIMHASH_BITS // BLOCKS + (block < SIMHASH_BITS % BLOCKS) for block in range(BLOCKS)]
+_BLOCKS = [(sum(_BLOCK_WIDTHS[:block]), (1 << width) - 1) for block, width in enumerate(_BLOCK_WIDTHS)]
+_BANDS = list(combinations(range(BLOCKS), BLOCKS - MAX_DISTANCE))
+
+
+def text_simhash(text):
+    """64-bit SimHash of a text as 16 hex digits, or None for too little text"""
+    words = WORD_PATTERN.findall(text.lower()) if text else []
+    shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    votes = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            votes[bit] += 1 if value >> bit & 1 else -1
+    fingerprint = sum(1 << bit for bit, vote in enumerate(votes) if vote > 0)
+    return f"{fingerprint:016x}"
+
+
+def distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+class NearDuplicateIndex:
+    """Fingerprints bucketed by band, for finding those within MAX_DISTANCE bits"""
+
+    def __init__(self):
+        self.max_distance = MAX_DISTANCE
+        self.items = []
+        self.buckets = [{} for _ in _BANDS]
+
+    @staticmethod
+    def _bands(fingerprint):
+        value = int(fingerprint, 16)
+        blocks = [(value >> shift) & mask for shift, mask in _BLOCKS]
+        return [tuple(blocks[block] for block in band) for band in _BANDS]
+
+    def add(self, fingerprint, item):
+        position = len(self.items)
+        self.items.append((fingerprint, item))
+        for band, key in enumerate(self._bands(fingerprint)):
+            self.buckets[band].setdefault(key, []).append(position)
+
+    def nearest(self, fingerprint):
+        """(distance, item) of the closest fingerprint within max_distance, or None"""
+        best = None
+        for band, key in enumerate(self._bands(fingerprint)):
+            for position in self.buckets[band].get(key, ()):
+                other, item = self.items[position]
+                gap = distance(fingerprint, other)
+                if gap <= self.max_distance and (best is None or gap < best[0]):
+                    best = (gap, item)
+        return best
+
+    def pairs(self):
+        """(distance, position a, position b) for every pair within max_distance"""
+        seen = set()
+        for buckets in self.buckets:
+            for positions in buckets.values():
+                if len(positions) < 2 or len(positions) > MAX_BUCKET:
+                    continue
+                for i, a in enumerate(positions):
+                    for b in positions[i + 1:]:
+                        if (a, b) in seen:
+                            continue
+                        seen.add((a, b))
+                        gap = distance(self.items[a][0], self.items[b][0])
+                        if gap <= self.max_distance:
+                            yield gap, a, b
+
+
+_missing_modules = set()
+
+
+def extract_text(path):
+    """The text the tagger would extract from a file, or None if it can't be read here"""
+    extension = Path(path).suffix.lower()
+    try:
+        if extension == '.pdf':
+            import PyPDF2
+            with open(path, 'rb') as f:
+                reader = PyPDF2.PdfReader(f)
+                pages = reader.pages[:PDF_PAGES]
+                return ''.join(page.extract_text() + '\n' for page in pages)[:TEXT_CHARS]
+        if extension in ('.docx', '.doc'):
+            from docx import Document
+            paragraphs = Document(path).paragraphs[:DOCX_PARAGRAPHS]
+            return '\n'.join(p.text for p in paragraphs if p.text.strip())[:TEXT_CHARS]
+        if extension in ('.xml', '.xpt', '.xsl', '.jmp'):
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                return ' '.join(re.sub('<[^<]+?>', ' ', f.read()).split())[:TEXT_CHARS]
+    except ImportError as e:
+        if e.name not in _missing_modules:
+            _missing_modules.add(e.name)
+            print(f"  {e.name} not installed; skipping files that need it")
+    except Exception as e:
+        print(f"  Could not read {Path(path).name}: {e}")
+    return None
+
+
+def is_slipsheet(doc):
+    return navigator_row(doc)['documentType'] == 'FOIA Redaction Slipsheet'
+
+
+def document_fingerprint(doc, fingerprints):
+    return doc.get('textSimhash') or fingerprints.get(drive_file_id(doc))
+
+
+def load_fingerprint_cache(path=FINGERPRINT_CACHE):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_fingerprint_cache(fingerprints, path=FINGERPRINT_CACHE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(fingerprints.items())), f, indent=2)
+
+
+def fingerprint_local_files(pairs, fingerprints, files_dir):
+    """Fingerprint local copies of documents without one; returns how many were added"""
+    missing = [doc for _, doc in pairs
+               if drive_file_id(doc) and not is_slipsheet(doc) and not document_fingerprint(doc, fingerprints)]
+    added = 0
+    for path, docs in local_copies(missing, files_dir):
+        fingerprint = text_simhash(extract_text(path))
+        if fingerprint:
+            for doc in docs:
+                fingerprints[drive_file_id(doc)] = fingerprint
+                added += 1
+    return added
+
+
+def build_neighbors(pairs, fingerprints):
+    """The neighbors file for all corpora"""
+    index = NearDuplicateIndex()
+    for json_file, doc in pairs:
+        fingerprint = document_fingerprint(doc, fingerprints)
+        if fingerprint and drive_file_id(doc) and not is_slipsheet(doc):
+            index.add(fingerprint, (json_file, doc))
+
+    neighbors = {}
+    count = 0
+    for gap, a, b in index.pairs():
+        count += 1
+        for this, other in ((a, b), (b, a)):
+            json_file, doc = index.items[other][1]
+            neighbors.setdefault(drive_file_id(index.items[this][1][1]), []).append((gap, other, {
+                'corpus': Path(json_file).stem,
+                'folder': doc.get('folder'),
+                'filename': doc['filename'],
+                'googleDriveLink': doc.get('googleDriveLink'),
+                'distance': gap,
+            }))
+
+    return {
+        'format': INDEX_FORMAT,
+        'version': INDEX_VERSION,
+        'bits': SIMHASH_BITS,
+        'blocks': BLOCKS,
+        'maxDistance': MAX_DISTANCE,
+        'documents': len(pairs),
+        'fingerprinted': len(index.items),
+        'pairs': count,
+        # Nearest first, then in corpus order
+        'neighbors': {file_id: [entry for _, _, entry in sorted(entries, key=lambda e: e[:2])]
+                      for file_id, entries in sorted(neighbors.items())},
+    }
+
+
+def load_known_versions(corpora=CORPORA, fingerprint_cache=FINGERPRINT_CACHE):
+    """(fingerprint, document) for every tagged document with a fingerprint, for the tagger"""
+    fingerprints = load_fingerprint_cache(fingerprint_cache)
+    known = []
+    for _, doc in load_corpora(corpora):
+        fingerprint = document_fingerprint(doc, fingerprints)
+        if fingerprint and doc.get('processed') and not is_slipsheet(doc):
+            known.append((fingerprint, doc))
+    return known
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate documents across the corpora by SimHash")
+    parser.add_argument('--files', metavar='DIR', help="Fingerprint local copies of the files under DIR")
+    parser.add_argument('--output', default=NEIGHBORS_FILE, help=f"Neighbors file (default: {NEIGHBORS_FILE})")
+    args = parser.parse_args()
+
+    pairs = load_corpora(CORPORA)
+    fingerprints = load_fingerprint_cache()
+    if args.files:
+        added = fingerprint_local_files(pairs, fingerprints, args.files)
+        if added:
+            save_fingerprint_cache(fingerprints)
+            print(f"Added {added} fingerprints to {FINGERPRINT_CACHE}")
+
+    result = build_neighbors(pairs, fingerprints)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{result['fingerprinted']} of {result['documents']} documents fingerprinted")
+    print(f"Near-duplicate pairs (within {MAX_DISTANCE} bits): {result['pairs']}")
+    print(f"Documents with other versions: {len(result['neighbors'])}")
+    print(f"Neighbors written to {args.output}")
+    if not result['fingerprinted']:
+        print("No document has a fingerprint yet: use --files, or re-tag to record them")
+
+
+if __name__ == "__main__":
+    main()
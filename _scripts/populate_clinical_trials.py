@@ -4,59 +4,63 @@ Script to populate clinicalTrial values in pd-bla-tagged-files.json
 Extracts clinical trial IDs from filenames using pattern c4591XXX
 """
 
-import json
-import re
 from pathlib import Path
 
+from entity_extractor import extract_entities, first_entity
+from tagged_json import TaggedFilesReader, TaggedFilesWriter
+
+# Version of the trial ID rule (see fingerprints in enrichment_pipeline.py)
+RULE_VERSION = 1
+
 def extract_clinical_trial_id(filename):
     """
     Extract clinical trial ID from filename.
     Looks for pattern c4591XXX where XXX is 3 digits.
     """
-    # Pattern to match c4591 followed by 3 digits
-    pattern = r'c4591(\d{3})'
-    match = re.search(pattern, filename, re.IGNORECASE)
+    # First c4591 followed by 3 digits; the extractor lowercases the ID
+    trial = first_entity(extract_entities(filename), 'trial', ('c4591',))
     
-    if match:
+    if trial:
         # Return the full trial ID
-        return f"c4591{match.group(1)}"
+        return trial.value
     
     return None
 
+def enrich_document(doc):
+    """Apply this script's clinical trial update to one document"""
+    trial_id = extract_clinical_trial_id(doc.get('filename', ''))
+    if trial_id:
+        doc['clinicalTrial'] = trial_id
+
 def main():
     # Path to the JSON file
     json_file = Path("pd-bla-tagged-files.json")
     
-    # Read the JSON file
-    print(f"Reading {json_file}...")
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Stream documents through and write them back atomically
+    print(f"Processing {json_file}...")
     
     # Statistics
-    total_docs = len(data['documents'])
+    total_docs = 0
     updated_count = 0
     trial_counts = {}
     
-    print(f"Processing {total_docs} documents...")
-    
-    # Process each document
-    for doc in data['documents']:
-        filename = doc.get('filename', '')
-        
-        # Extract clinical trial ID
-        trial_id = extract_clinical_trial_id(filename)
-        
-        if trial_id:
-            doc['clinicalTrial'] = trial_id
-            updated_count += 1
+    with TaggedFilesReader(json_file) as reader, TaggedFilesWriter(json_file) as writer:
+        for doc in reader.documents():
+            total_docs += 1
+            filename = doc.get('filename', '')
             
-            # Track counts for statistics
-            trial_counts[trial_id] = trial_counts.get(trial_id, 0) + 1
-    
-    # Save the updated JSON
-    print(f"\nSaving updated data to {json_file}...")
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+            # Extract clinical trial ID
+            trial_id = extract_clinical_trial_id(filename)
+            
+            if trial_id:
+                doc['clinicalTrial'] = trial_id
+                updated_count += 1
+                
+                # Track counts for statistics
+                trial_counts[trial_id] = trial_counts.get(trial_id, 0) + 1
+            
+            writer.write_document(doc)
+        writer.extras.update(reader.extras)
     
     # Print statistics
     print(f"\n✅ Update complete!")
@@ -7,56 +7,35 @@ Script to populate vaccineCandidate values and update clinical trials in pd-bla-
 - Stores multiple candidates as array when present
 """
 
-import json
-import re
 from pathlib import Path
 
-def extract_vaccine_candidates(doc):
+from entity_extractor import extract_document_entities, first_entity
+from tagged_json import TaggedFilesReader, TaggedFilesWriter
+
+# Increment after changing the candidate or BNT162-01 rules
+RULE_VERSION = 1
+
+def extract_vaccine_candidates(doc, entities=None):
     """
     Extract vaccine candidates from document tags, title, and filename.
     Returns a single string if one candidate, array if multiple, or None if none.
     """
-    candidates = set()
-    
-    # Define the vaccine candidates we're looking for
-    # Order matters for b3 vs b3c - check b3c first!
-    vaccine_patterns = [
-        ('BNT162b3c', r'bnt162b3c'),
-        ('BNT162b3', r'bnt162b3(?!c)'),  # b3 NOT followed by c
-        ('BNT162b2', r'(?:bnt162b2|comirnaty)'),
-        ('BNT162b1', r'bnt162b1'),
-        ('BNT162a1', r'bnt162a1'),
-        ('BNT162c2', r'bnt162c2'),
-    ]
+    if entities is None:
+        entities = extract_document_entities(doc)
     
-    # Check tags
-    tags = doc.get('tags', [])
-    for tag in tags:
-        tag_lower = tag.lower()
-        for vaccine, pattern in vaccine_patterns:
-            if re.search(pattern, tag_lower):
-                candidates.add(vaccine)
+    # Tags and title (COMIRNATY is already mapped to BNT162b2 by the extractor)
+    candidates = {e.value for e in entities['tags'] + entities['title'] if e.kind == 'vaccine'}
     
-    # Check title
-    title = doc.get('title', '')
-    if title:
-        title_lower = title.lower()
-        for vaccine, pattern in vaccine_patterns:
-            if re.search(pattern, title_lower):
-                candidates.add(vaccine)
-    
-    # Check filename
-    filename = doc.get('filename', '')
-    if filename:
-        filename_lower = filename.lower()
-        # Be careful not to confuse BNT162-01 trial with vaccine candidates
-        # Only look for vaccine variants (letter + number combinations)
-        for vaccine, pattern in vaccine_patterns:
-            # Skip if it's part of BNT162-01 trial name
-            if vaccine == 'BNT162b1' and re.search(r'bnt162-01', filename_lower):
-                continue
-            if re.search(pattern, filename_lower):
-                candidates.add(vaccine)
+    # Filename: be careful not to confuse BNT162-01 trial with vaccine candidates
+    filename_entities = entities['filename']
+    has_bnt162_01 = first_entity(filename_entities, 'trial', ('bnt162_01',)) is not None
+    for entity in filename_entities:
+        if entity.kind != 'vaccine':
+            continue
+        # Skip if it's part of BNT162-01 trial name
+        if entity.value == 'BNT162b1' and has_bnt162_01:
+            continue
+        candidates.add(entity.value)
     
     # Return results
     if not candidates:
@@ -67,15 +46,16 @@ def extract_vaccine_candidates(doc):
         # Return as sorted array for consistency
         return sorted(list(candidates))
 
-def update_clinical_trial_bnt162_01(doc):
+def update_clinical_trial_bnt162_01(doc, entities=None):
     """
     Update clinical trial field to include BNT162-01 if present in filename.
     Returns True if updated.
     """
-    filename = doc.get('filename', '')
+    if entities is None:
+        entities = extract_document_entities(doc)
     
     # Check for BNT162-01 trial identifier
-    if re.search(r'bnt162-01', filename, re.IGNORECASE):
+    if first_entity(entities['filename'], 'trial', ('bnt162_01',)):
         # Don't overwrite existing clinical trial, just update if it's null
         if doc.get('clinicalTrial') is None:
             doc['clinicalTrial'] = 'BNT162-01'
@@ -83,48 +63,53 @@ def update_clinical_trial_bnt162_01(doc):
     
     return False
 
+def enrich_document(doc):
+    """Apply this script's vaccine candidate and BNT162-01 updates to one document"""
+    entities = extract_document_entities(doc)
+    vaccines = extract_vaccine_candidates(doc, entities)
+    if vaccines:
+        doc['vaccineCandidate'] = vaccines
+    update_clinical_trial_bnt162_01(doc, entities)
+
 def main():
     # Path to the JSON file
     json_file = Path("pd-bla-tagged-files.json")
     
-    # Read the JSON file
-    print(f"Reading {json_file}...")
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Stream documents through and write them back atomically
+    print(f"Processing {json_file}...")
     
     # Statistics
-    total_docs = len(data['documents'])
+    total_docs = 0
     vaccine_updated_count = 0
     trial_updated_count = 0
     vaccine_counts = {}
     multi_vaccine_count = 0
     
-    print(f"Processing {total_docs} documents...")
-    
-    # Process each document
-    for doc in data['documents']:
-        # Update vaccine candidate(s)
-        vaccines = extract_vaccine_candidates(doc)
-        if vaccines:
-            doc['vaccineCandidate'] = vaccines
-            vaccine_updated_count += 1
+    with TaggedFilesReader(json_file) as reader, TaggedFilesWriter(json_file) as writer:
+        for doc in reader.documents():
+            total_docs += 1
+            entities = extract_document_entities(doc)
             
-            # Track statistics
-            if isinstance(vaccines, list):
-                multi_vaccine_count += 1
-                for v in vaccines:
-                    vaccine_counts[v] = vaccine_counts.get(v, 0) + 1
-            else:
-                vaccine_counts[vaccines] = vaccine_counts.get(vaccines, 0) + 1
-        
-        # Update clinical trial for BNT162-01
-        if update_clinical_trial_bnt162_01(doc):
-            trial_updated_count += 1
-    
-    # Save the updated JSON
-    print(f"\nSaving updated data to {json_file}...")
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+            # Update vaccine candidate(s)
+            vaccines = extract_vaccine_candidates(doc, entities)
+            if vaccines:
+                doc['vaccineCandidate'] = vaccines
+                vaccine_updated_count += 1
+                
+                # Track statistics
+                if isinstance(vaccines, list):
+                    multi_vaccine_count += 1
+                    for v in vaccines:
+                        vaccine_counts[v] = vaccine_counts.get(v, 0) + 1
+                else:
+                    vaccine_counts[vaccines] = vaccine_counts.get(vaccines, 0) + 1
+            
+            # Update clinical trial for BNT162-01
+            if update_clinical_trial_bnt162_01(doc, entities):
+                trial_updated_count += 1
+            
+            writer.write_document(doc)
+        writer.extras.update(reader.extras)
     
     # Print statistics
     print(f"\n✅ Update complete!")
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Move the navigator pages' inline CSS and JS into fingerprinted asset files.
+
+build_site.py renders each navigator page with its stylesheet and script
+inline, then hands the page to extract_assets(), which:
+- minifies the <style> block and the inline <script> block into
+  assets/navigator.<content hash>.css and .js,
+- replaces the blocks with <link> and <script src> tags pointing at those
+  files.
+write_assets() then writes the files, with .gz (and, if the brotli package
+is installed, .br) variants next to them.
+A file's name changes whenever its content does, so a server or CDN can
+cache assets/ for as long as it likes: a page never refers to an old
+version. Pages whose rendered CSS or JS comes out the same share one file.
+
+assets/manifest.json maps each page to the assets it uses, with their sizes
+before and after minification. Asset files no longer listed there are
+deleted at the end of a build.
+
+The minifiers only drop comments and whitespace. The JS one keeps a newline
+wherever automatic semicolon insertion could depend on it, and leaves
+strings, template literals and regular expressions untouched.
+
+Usage (from the repository root), to minify a file on its own:
+    python _scripts/site_assets.py metadata/some-script.js
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from build_compact_navigator_data import write_compressed
+
+ASSET_DIR = 'assets'
+MANIFEST_FILE = 'assets/manifest.json'
+MANIFEST_VERSION = 1
+ASSET_PREFIX = 'navigator'
+HASH_LENGTH = 10
+
+STYLE_BLOCK = re.compile(r'^([ \t]*)<style>\n(.*?)</style>\n', re.MULTILINE | re.DOTALL)
+SCRIPT_BLOCK = re.compile(r'^([ \t]*)<script>\n(.*?)\n[ \t]*</script>\n', re.MULTILINE | re.DOTALL)
+ASSET_FILE = re.compile(ASSET_PREFIX + r'\.[0-9a-f]{%d}\.(css|js)(\.gz|\.br)?$' % HASH_LENGTH)
+
+# A "/" after one of these starts a regular expression rather than a division
+REGEX_AFTER_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_AFTER_WORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                     'void', 'throw', 'instanceof', 'yield', 'await'}
+# No statement can end on one of these, so a newline after it is never needed
+JOIN_AFTER_CHARS = set('{(,;')
+JS_TOKEN = re.compile(r'[\w$]+|.', re.DOTALL)
+
+
+def _is_word_char(char):
+    return char.isalnum() or char in '_$' or ord(char) > 127
+
+
+def _needs_space(before, after):
+    """Whether two code characters separated by whitespace must stay apart"""
+    if _is_word_char(before) and _is_word_char(after):
+        return True
+    # a + +b, a - -b, and anything touching a slash (division, regex or comment)
+    return (before in '+-' and after in '+-') or '/' in (before, after)
+
+
+def _skip_string(text, i):
+    """Index just past the quoted string starting at text[i]"""
+    quote = text[i]
+    i += 1
+    while i < len(text) and text[i] != quote:
+        i += 2 if text[i] == '\\' else 1
+    return i + 1
+
+
+def _skip_regex(text, i):
+    """Index just past the regular expression literal (and its flags) starting at text[i]"""
+    i += 1
+    in_class = False
+    while i < len(text):
+        char = text[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            break
+        elif char == '\n':
+            raise ValueError("Unterminated regular expression")
+        i += 1
+    i += 1
+    while i < len(text) and _is_word_char(text[i]):
+        i += 1
+    return i
+
+
+def minify_js(text):
+    """Strip comments and non-essential whitespace from a script"""
+    out = []
+    # One entry per open template literal: the brace depth its current ${ } started at
+    templates = []
+    depth = 0
+    pending_space = False
+    pending_newline = False
+    i = 0
+
+    def last_char():
+        return out[-1][-1] if out else ''
+
+    def last_word():
+        match = re.search(r'[\w$]+$', out[-1]) if out else None
+        return match.group(0) if match else ''
+
+    def emit(chunk):
+        nonlocal pending_space, pending_newline
+        if out:
+            before = last_char()
+            if pending_newline and before not in JOIN_AFTER_CHARS:
+                out.append('\n')
+            elif (pending_space or pending_newline) and _needs_space(before, chunk[0]):
+                out.append(' ')
+        pending_space = pending_newline = False
+        out.append(chunk)
+
+    def skip_template(i):
+        """From inside a template literal, the index just past its end or its next ${"""
+        start = i
+        while i < len(text):
+            if text[i] == '\\':
+                i += 2
+            elif text[i] == '`':
+                templates.pop()
+                out.append(text[start:i + 1])
+                return i + 1
+            elif text.startswith('${', i):
+                out.append(text[start:i + 2])
+                templates[-1] = depth
+                return i + 2
+            else:
+                i += 1
+        raise ValueError("Unterminated template literal")
+
+    while i < len(text):
+        char = text[i]
+        if char in ' \t\r':
+            pending_space = True
+            i += 1
+        elif char == '\n':
+            pending_newline = True
+            i += 1
+        elif text.startswith('//', i):
+            end = text.find('\n', i)
+            i = len(text) if end < 0 else end
+        elif text.startswith('/*', i):
+            end = text.index('*/', i + 2) + 2
+            if '\n' in text[i:end]:
+                pending_newline = True
+            else:
+                pending_space = True
+            i = end
+        elif char in '\'"':
+            end = _skip_string(text, i)
+            emit(text[i:end])
+            i = end
+        elif char == '`':
+            emit('`')
+            templates.append(None)
+            i = skip_template(i + 1)
+        elif char == '/' and (not out or last_char() in REGEX_AFTER_CHARS or last_word() in REGEX_AFTER_WORDS):
+            end = _skip_regex(text, i)
+            emit(text[i:end])
+            i = end
+        elif char == '{':
+            emit(char)
+            depth += 1
+            i += 1
+        elif char == '}':
+            if templates and templates[-1] == depth:
+                # the end of a ${ } inside a template literal: back to the literal text
+                emit(char)
+                i = skip_template(i + 1)
+            else:
+                emit(char)
+                depth -= 1
+                i += 1
+        else:
+            match = JS_TOKEN.match(text, i)
+            emit(match.group(0))
+            i = match.end()
+    return ''.join(out)
+
+
+def minify_css(text):
+    """Strip comments and non-essential whitespace from a stylesheet"""
+    out = []
+    strings = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if text.startswith('/*', i):
+            i = text.index('*/', i + 2) + 2
+            out.append(' ')
+        elif char in '\'"':
+            # Strings are set aside so that the whitespace rules below can't touch them
+            end = _skip_string(text, i)
+            strings.append(text[i:end])
+            out.append(f"\0{len(strings) - 1}\0")
+            i = end
+        elif char.isspace():
+            out.append(' ')
+            i += 1
+        else:
+            out.append(char)
+            i += 1
+    css = re.sub(r' {2,}', ' ', ''.join(out))
+    # Spaces are safe to drop around these, and after a colon; not before one,
+    # where "a :hover" and "a:hover" are different selectors
+    css = re.sub(r' ?([{};,>]) ?', r'\1', css)
+    css = css.replace(': ', ':').replace(';}', '}')
+    return re.sub(r'\0(\d+)\0', lambda match: strings[int(match.group(1))], css).strip()
+
+
+def asset_name(payload, extension):
+    digest = hashlib.sha1(payload).hexdigest()[:HASH_LENGTH]
+    return f"{ASSET_DIR}/{ASSET_PREFIX}.{digest}.{extension}"
+
+
+def write_assets(files):
+    """Write the asset files (path -> payload) that don't exist yet, with their compressed variants"""
+    for path, payload in files.items():
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(payload)
+            write_compressed(path, payload)
+
+
+def extract_assets(page, html):
+    """Take a rendered page's inline <style> and <script> blocks out into asset files;
+    returns (the page's HTML, its manifest entry, the asset files as path -> payload)"""
+    root = os.path.relpath('.', os.path.dirname(page) or '.').replace(os.sep, '/')
+    prefix = '' if root == '.' else root + '/'
+    entry = {}
+    files = {}
+
+    def replace(pattern, extension, minify, tag):
+        nonlocal html
+        matches = list(pattern.finditer(html))
+        if len(matches) != 1:
+            raise ValueError(f"{page}: expected one inline {extension} block, found {len(matches)}")
+        match = matches[0]
+        source = match.group(2)
+        payload = minify(source).encode('utf-8')
+        path = asset_name(payload, extension)
+        files[path] = payload
+        entry[extension] = {'file': path, 'bytes': len(payload), 'sourceBytes': len(source.encode('utf-8'))}
+        html = html[:match.start()] + match.group(1) + tag.format(prefix + path) + '\n' + html[match.end():]
+
+    replace(STYLE_BLOCK, 'css', minify_css, '<link rel="stylesheet" href="{}">')
+    replace(SCRIPT_BLOCK, 'js', minify_js, '<script src="{}"></script>')
+    return html, entry, files
+
+
+def load_manifest(path=MANIFEST_FILE):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    return {'version': MANIFEST_VERSION, 'pages': {}}
+
+
+def save_manifest(manifest, pages, path=MANIFEST_FILE):
+    """Keep the entries of the given pages, write the manifest and delete unused asset files"""
+    manifest['pages'] = {page: manifest['pages'][page] for page in sorted(pages) if page in manifest['pages']}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+    used = {Path(asset['file']).name for entry in manifest['pages'].values() for asset in entry.values()}
+    removed = []
+    for file in sorted(Path(ASSET_DIR).iterdir()):
+        match = ASSET_FILE.match(file.name)
+        if match and file.name[:len(file.name) - len(match.group(2) or '')] not in used:
+            file.unlink()
+            removed.append(file)
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify a stylesheet or script the way build_site.py does")
+    parser.add_argument('file', help="A .css or .js file")
+    args = parser.parse_args()
+
+    with open(args.file, 'r', encoding='utf-8') as f:
+        source = f.read()
+    minified = minify_css(source) if args.file.endswith('.css') else minify_js(source)
+    print(minified)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,15 +19,27 @@ from googleapiclient.http import MediaIoBaseDownload
 import io
 import pickle
 import tempfile
+from duplicate_index import load_known_documents
+from near_duplicates import NearDuplicateIndex, load_known_versions, text_simhash
 
 class GoogleDriveFileTagger:
-    def __init__(self, claude_api_key: str):
-        """Initialize the auto-tagger with API keys"""
+    def __init__(self, claude_api_key: str, known_documents: Optional[Dict[str, Dict]] = None,
+                 known_versions: Optional[List[Tuple[str, Dict]]] = None):
+        """Initialize the auto-tagger with API keys and the already tagged documents, by content hash
+        and by text fingerprint"""
         self.claude = anthropic.Anthropic(api_key=claude_api_key)
         self.supported_extensions = {'.pdf', '.jpg', '.jpeg', '.png', '.docx', '.doc', '.xml', '.xpt', '.xsl', '.jmp'}
         self.module_patterns = ['M1', 'M2', 'M3', 'M4', 'M5', 'M6']
         self.temp_dir = tempfile.mkdtemp()
         
+        # Results by Drive md5Checksum: copies of a file already tagged reuse its tags
+        self.known_results = {checksum: self.result_from_document(doc)
+                              for checksum, doc in (known_documents or {}).items()}
+        # Results by text SimHash: near-identical versions (re-Bates-numbered, lightly redacted) too
+        self.versions = NearDuplicateIndex()
+        for fingerprint, doc in known_versions or []:
+            self.versions.add(fingerprint, self.result_from_document(doc))
+        
         # Google Drive setup
         self.SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
         self.service = self.authenticate_google_drive()
@@ -65,7 +77,7 @@ class GoogleDriveFileTagger:
             response = self.service.files().list(
                 q=f"'{folder_id}' in parents",
                 spaces='drive',
-                fields='nextPageToken, files(id, name, mimeType, webViewLink)',
+                fields='nextPageToken, files(id, name, mimeType, webViewLink, md5Checksum)',
                 pageToken=page_token
             ).execute()
             
@@ -216,6 +228,53 @@ class GoogleDriveFileTagger:
                 module_tags.append(module)
         return module_tags
     
+    @staticmethod
+    def result_from_document(doc: Dict) -> Dict:
+        """A result row from a tagged-files JSON document"""
+        return {
+            'filename': doc['filename'],
+            'title': doc.get('title'),
+            'date': doc.get('date'),
+            'google_drive_link': doc.get('googleDriveLink'),
+            'folder': doc.get('folder'),
+            'file_type': doc.get('fileType'),
+            'page_count': doc.get('pageCount', 0),
+            'module': doc.get('module') or '',
+            'document_type': doc.get('documentType'),
+            'people_mentioned': ', '.join(doc.get('peopleMentioned') or []),
+            'tags': list(doc.get('tags') or []),
+            'has_exemption': bool(doc.get('hasExemption')),
+            'has_exclusion': bool(doc.get('hasExclusion')),
+            'password_protected': bool(doc.get('passwordProtected')),
+            'processed': True,
+            'content_hash': doc.get('contentHash', ''),
+            'text_simhash': doc.get('textSimhash', ''),
+        }
+    
+    def reuse_duplicate(self, known: Dict, file: Dict, display_name: str, content: Optional[str] = None) -> Dict:
+        """Result for a copy of an already tagged file: its tags, with this copy's name, link and modules,
+        and this copy's exemption/exclusion flags when its content was extracted"""
+        module_tags = self.check_module_tags(file['name'])
+        own_tags = set(self.module_patterns)
+        if content is not None:
+            own_tags |= {'Exemption', 'Exclusion'}
+        tags = [tag for tag in known['tags'] if tag not in own_tags]
+        result = dict(known)
+        result.update({
+            'filename': file['name'],
+            'google_drive_link': file['webViewLink'],
+            'folder': display_name,
+            'module': module_tags[0] if module_tags else '',
+            'content_hash': file.get('md5Checksum', ''),
+        })
+        if content is not None:
+            result['has_exemption'] = self.check_exemption_tag(content)
+            result['has_exclusion'] = self.check_exclusion(content)
+            tags += ['Exemption'] if result['has_exemption'] else []
+            tags += ['Exclusion'] if result['has_exclusion'] else []
+        result['tags'] = list(set(tags + module_tags))
+        return result
+    
     def check_exemption_tag(self, content: str) -> bool:
         """Check if content contains exemption keywords"""
         exemption_keywords = ['exempt', 'exemption']
@@ -443,12 +502,20 @@ Return ONLY a JSON object. Example:
         # supported_files = supported_files[:7]
         # print(f"TEST MODE: Processing only {len(supported_files)} files")
         
+        reused = reused_versions = 0
         for file in tqdm(supported_files):
             try:
                 filename = file['name']
                 file_id = file['id']
                 google_drive_link = file['webViewLink']
                 
+                # Same content as a file already tagged: reuse its tags instead of downloading it
+                checksum = file.get('md5Checksum')
+                if checksum in self.known_results:
+                    results.append(self.reuse_duplicate(self.known_results[checksum], file, display_name))
+                    reused += 1
+                    continue
+                
                 # Download file temporarily
                 temp_path = self.download_file_temporarily(file_id, filename, file['mimeType'])
                 
@@ -456,6 +523,22 @@ Return ONLY a JSON object. Example:
                     # Extract content
                     content, file_type, page_count = self.extract_file_content(temp_path)
                     
+                    # Fingerprint the text without the filename/pages header lines
+                    fingerprint = text_simhash(content.split('\n', 2)[-1])
+                    nearest = self.versions.nearest(fingerprint) if fingerprint else None
+                    if nearest:
+                        # Another version of a document already tagged: reuse its tags
+                        result = self.reuse_duplicate(nearest[1], file, display_name, content)
+                        result.update({
+                            'file_type': file_type.upper().replace('.', '') if file_type else 'UNKNOWN',
+                            'page_count': page_count,
+                            'text_simhash': fingerprint,
+                        })
+                        results.append(result)
+                        reused_versions += 1
+                        os.remove(temp_path)
+                        continue
+                    
                     # Generate AI tags, title, date, and metadata
                     ai_tags, document_title, document_date, document_type, people_mentioned, password_protected = \
                         self.generate_tags_and_title_with_claude(content, filename, file_type)
@@ -504,9 +587,15 @@ Return ONLY a JSON object. Example:
                         'has_exemption': has_exemption,
                         'has_exclusion': has_exclusion,
                         'password_protected': password_protected,
-                        'processed': True
+                        'processed': True,
+                        'content_hash': checksum or '',
+                        'text_simhash': fingerprint or ''
                     }
                     results.append(result)
+                    if checksum:
+                        self.known_results[checksum] = result
+                    if fingerprint:
+                        self.versions.add(fingerprint, result)
                     
                     # Clean up temp file
                     os.remove(temp_path)
@@ -533,9 +622,15 @@ Return ONLY a JSON object. Example:
                     'has_exemption': False,
                     'has_exclusion': False,
                     'password_protected': False,
-                    'processed': False
+                    'processed': False,
+                    'content_hash': file.get('md5Checksum', ''),
+                    'text_simhash': ''
                 })
         
+        if reused:
+            print(f"Reused tags for {reused} files already tagged elsewhere (same content hash)")
+        if reused_versions:
+            print(f"Reused tags for {reused_versions} other versions of tagged documents (similar text)")
         return results
     
     def save_to_csv(self, results_dict: Dict[str, List[Dict]], output_file: str = "google_drive_tagged_files.csv"):
@@ -665,7 +760,9 @@ Return ONLY a JSON object. Example:
 if __name__ == "__main__":
     # Initialize the tagger
     tagger = GoogleDriveFileTagger(
-        claude_api_key="" // Put your Claude API key here. 
+        claude_api_key="",  # Put your Claude API key here.
+        known_documents=load_known_documents(),
+        known_versions=load_known_versions()
     )
     
     # Define your Google Drive folders
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Streaming reader and writer for the tagged-files JSON corpora.
+
+The corpora are a single object, {"documents": [...], ...}, optionally with
+small extra keys such as "metadata" and "statistics" (pfizer-eua). Reading
+yields one document at a time from a buffered file, so memory stays constant
+regardless of corpus size. Writing emits each document as it is produced into
+a temp file in the same directory, renamed over the target only on success.
+
+Output is byte-identical to json.dump(data, f, indent=2) with the documents
+key first, which is how every script has written these files.
+
+    with TaggedFilesReader('pd-bla-tagged-files.json') as reader, \\
+         TaggedFilesWriter('pd-bla-tagged-files.json') as writer:
+        for doc in reader.documents():
+            enrich(doc)
+            writer.write_document(doc)
+        writer.extras.update(reader.extras)
+"""
+
+import json
+import os
+import stat
+import tempfile
+from pathlib import Path
+
+DOCUMENTS_KEY = 'documents'
+
+# Bytes read from disk at a time; a value longer than this just takes several reads
+READ_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = ' \t\n\r'
+
+
+class TaggedFilesReader:
+    """
+    Iterate over the documents of a tagged-files JSON corpus.
+
+    Top-level keys other than "documents" are collected in .extras as they
+    are passed; keys after the documents array are only available once
+    documents() has been exhausted.
+    """
+
+    def __init__(self, path, chunk_size=READ_CHUNK_SIZE):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.extras = {}
+        self._file = None
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def __enter__(self):
+        self._file = open(self.path, 'r', encoding='utf-8')
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _fill(self):
+        """Read another chunk; returns False at end of file"""
+        if self._eof:
+            return False
+        chunk = self._file.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop what has been consumed so the buffer stays small
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Next non-whitespace character (not consumed), or '' at end of file"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, chars):
+        char = self._peek()
+        if not char or char not in chars:
+            raise ValueError(f"{self.path}: expected one of {chars!r} at offset {self._pos}, got {char!r}")
+        self._pos += 1
+        return char
+
+    def _value(self):
+        """Decode the next complete JSON value, reading more input as needed"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def documents(self):
+        """Yield each document in file order"""
+        if self._file is None:
+            self.__enter__()
+
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == DOCUMENTS_KEY:
+                self._expect('[')
+                if self._peek() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(',]') == ']':
+                            break
+            else:
+                self.extras[key] = self._value()
+
+            if self._expect(',}') == '}':
+                return
+
+
+def _file_mode(path):
+    """The permission bits of an existing file, or those open() would give a new one"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+class TaggedFilesWriter:
+    """
+    Write a tagged-files JSON corpus one document at a time.
+
+    Keys set in .extras are written after the documents array, in insertion
+    order. The file is replaced atomically when the context exits cleanly;
+    on an exception, or after discard(), the original file is left untouched.
+    """
+
+    def __init__(self, path, ensure_ascii=False, indent=2):
+        self.path = Path(path)
+        self.ensure_ascii = ensure_ascii
+        self.indent = indent
+        self.extras = {}
+        self.count = 0
+        self._file = None
+        self._temp_path = None
+
+    def __enter__(self):
+        fd, self._temp_path = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix='.tmp',
+                                               dir=self.path.parent)
+        self._file = os.fdopen(fd, 'w', encoding='utf-8')
+        pad = ' ' * self.indent
+        self._file.write(f'{{\n{pad}{json.dumps(DOCUMENTS_KEY)}: [')
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None and self._file is not None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+    def _dumps(self, value, depth):
+        """Serialize a value nested depth levels deep, as json.dump(indent=...) would"""
+        text = json.dumps(value, indent=self.indent, ensure_ascii=self.ensure_ascii)
+        return text.replace('\n', '\n' + ' ' * (self.indent * depth))
+
+    def write_document(self, doc):
+        pad = ' ' * (self.indent * 2)
+        separator = ',' if self.count else ''
+        self._file.write(f'{separator}\n{pad}{self._dumps(doc, 2)}')
+        self.count += 1
+
+    def close(self):
+        """Finish the file and rename it over the target"""
+        pad = ' ' * self.indent
+        if self.count:
+            self._file.write(f'\n{pad}]')
+        else:
+            self._file.write(']')
+        for key, value in self.extras.items():
+            self._file.write(f',\n{pad}{json.dumps(key)}: {self._dumps(value, 1)}')
+        self._file.write('\n}')
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        # mkstemp creates the file as 0600; give it the permissions the target has (or would get)
+        os.chmod(self._temp_path, _file_mode(self.path))
+        os.replace(self._temp_path, self.path)
+        self._temp_path = None
+
+    def discard(self):
+        """Drop everything written so far; the target file is not touched"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._temp_path and os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+        self._temp_path = None
+
+
+def iter_documents(path):
+    """Yield the documents of a corpus one at a time"""
+    with TaggedFilesReader(path) as reader:
+        yield from reader.documents()
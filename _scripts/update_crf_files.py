@@ -4,36 +4,29 @@ Update CRF files in JSON documents to use Electronic Case Report Form (eCRF) for
 with proper site and subject extraction
 """
 
-import json
-import re
 import sys
 
-def extract_moderna_info(filename):
-    """Extract site and subject from Moderna CRF filename"""
-    # Pattern: 125752_SXX_M5_CRF_mrna-1273-p301-usXXXXXXX.pdf
-    match = re.search(r'CRF_mrna-(\d+)-p\d+-us(\d+)\.pdf', filename)
-    if match:
-        site = match.group(1)  # Always "1273" for mrna-1273
-        subject = match.group(2)
-        return site, subject
-    return None, None
+from entity_extractor import extract_entities, first_entity
+from tagged_json import TaggedFilesReader, TaggedFilesWriter
+
+# Increment after changing the title or tag rewrites
+RULE_VERSION = 1
 
-def extract_pfizer_info(filename):
-    """Extract site and subject from Pfizer CRF filename"""
-    # Pattern: PREFIX_CRF_c4591001-SITE-SITESUBJECT.pdf
-    match = re.search(r'CRF_c4591001-(\d{4})-(\d{4})(\d+)\.pdf', filename)
-    if match:
-        site = match.group(1)
-        # The subject is the combination after the site
-        subject = match.group(2) + match.group(3)
-        return site, subject
+def extract_crf_site_subject(entities, rule):
+    """Site and subject from the first CRF filename match of the given rule"""
+    # Moderna: 125752_SXX_M5_CRF_mrna-1273-p301-usXXXXXXX.pdf (site is always "1273")
+    # Pfizer:  PREFIX_CRF_c4591001-SITE-SITESUBJECT.pdf (subject includes the site)
+    site = first_entity(entities, 'site', (rule,))
+    subject = first_entity(entities, 'subject', (rule,))
+    if site and subject:
+        return site.value, subject.value
     return None, None
 
-def extract_special_site(filename):
+def extract_special_site(entities):
     """Extract site from special CRF filenames like CRFs-for-site-XXXX.pdf"""
-    match = re.search(r'CRFs-for-site-(\d+)\.pdf', filename)
-    if match:
-        return match.group(1)
+    site = first_entity(entities, 'site', ('crf_site',))
+    if site:
+        return site.value
     return None
 
 def update_crf_document(doc):
@@ -49,8 +42,11 @@ def update_crf_document(doc):
         # Update documentType
         doc['documentType'] = 'Electronic Case Report Form (eCRF)'
         
+        # Scan the filename once for all CRF patterns
+        entities = extract_entities(filename)
+        
         # Check for special case files
-        special_site = extract_special_site(filename)
+        special_site = extract_special_site(entities)
         if special_site:
             doc['title'] = f'Electronic Case Report Forms (Site: {special_site})'
         else:
@@ -60,10 +56,10 @@ def update_crf_document(doc):
             
             # Check if it's a Moderna file
             if 'mrna-1273' in filename:
-                site, subject = extract_moderna_info(filename)
+                site, subject = extract_crf_site_subject(entities, 'crf_moderna')
             # Check if it's a Pfizer file
             elif 'c4591001' in filename:
-                site, subject = extract_pfizer_info(filename)
+                site, subject = extract_crf_site_subject(entities, 'crf_pfizer')
             
             # Update title if we found site and subject
             if site and subject:
@@ -100,33 +96,30 @@ def update_crf_document(doc):
     
     return doc
 
-def update_json_file(filepath):
+def update_json_file(filepath, ensure_ascii=False):
     """Update all CRF documents in a JSON file"""
     print(f"Processing {filepath}...")
     
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
         # Track statistics
         updated_count = 0
-        total_count = len(data['documents'])
-        
-        # Update each document
-        for i, doc in enumerate(data['documents']):
-            original_title = doc.get('title', '')
-            updated_doc = update_crf_document(doc)
-            if updated_doc.get('title', '') != original_title or \
-               updated_doc.get('documentType', '') == 'Electronic Case Report Form (eCRF)':
-                updated_count += 1
-                # Show a few examples
-                if updated_count <= 3:
-                    print(f"  Example: {doc.get('filename', '')}")
-                    print(f"    New title: {updated_doc.get('title', '')}")
+        total_count = 0
         
-        # Write back to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Stream each document through and write back atomically
+        with TaggedFilesReader(filepath) as reader, TaggedFilesWriter(filepath, ensure_ascii) as writer:
+            for doc in reader.documents():
+                total_count += 1
+                original_title = doc.get('title', '')
+                updated_doc = update_crf_document(doc)
+                if updated_doc.get('title', '') != original_title or \
+                   updated_doc.get('documentType', '') == 'Electronic Case Report Form (eCRF)':
+                    updated_count += 1
+                    # Show a few examples
+                    if updated_count <= 3:
+                        print(f"  Example: {doc.get('filename', '')}")
+                        print(f"    New title: {updated_doc.get('title', '')}")
+                writer.write_document(updated_doc)
+            writer.extras.update(reader.extras)
         
         print(f"  Updated {updated_count} of {total_count} documents")
         return updated_count
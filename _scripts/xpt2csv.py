@@ -1,11 +1,170 @@
 import pandas as pd
+import mmap
 import os
+import sqlite3
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from tqdm import tqdm
 from datetime import datetime
+import json
 
-def convert_xpt_to_csv(source_dir=".", output_dir="xpt_converted"):
-    """Convert all XPT files to CSV format from subdirectories"""
+from column_profile import DatasetProfiler
+
+# SAS transport (XPORT v5) files are a sequence of 80-byte "card" records
+XPT_CARD_SIZE = 80
+XPT_LIBRARY_HEADER = b"HEADER RECORD*******LIBRARY HEADER RECORD!!!!!!!"
+XPT_MEMBER_HEADER = b"HEADER RECORD*******MEMBER  HEADER RECORD!!!!!!!"
+XPT_NAMESTR_HEADER = b"HEADER RECORD*******NAMESTR HEADER RECORD!!!!!!!"
+XPT_OBS_HEADER = b"HEADER RECORD*******OBS     HEADER RECORD!!!!!!!"
+
+# Only the header records are read, so this comfortably covers datasets with
+# thousands of variables without touching the observation data
+XPT_HEADER_READ_BYTES = 1024 * 1024
+
+# Rows read per chunk while converting; bounds memory for very large datasets
+XPT_CHUNK_ROWS = 100_000
+
+# SAS numeric dates count days, and datetimes seconds, from 1960-01-01
+SAS_EPOCH = pd.Timestamp('1960-01-01')
+
+# Display formats that mark a numeric variable as a date, datetime or time.
+# Datetimes must be checked before DATE, since DATETIME and DATEAMPM share its prefix.
+SAS_DATETIME_FORMATS = ('DATETIME', 'DATEAMPM', 'E8601DT', 'IS8601DT', 'B8601DT')
+SAS_DATE_FORMATS = ('DATE', 'E8601DA', 'IS8601DA', 'B8601DA', 'YYMMDD', 'MMDDYY', 'DDMMYY')
+SAS_TIME_FORMATS = ('TIME', 'E8601TM', 'IS8601TM', 'TOD', 'HHMM')
+
+# Converted values are written as text in one fixed format per kind, so a column
+# reads the same in every chunk whatever its values (times are HH:MM:SS)
+ISO_DATE_FORMAT = '%Y-%m-%d'
+ISO_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+def load_define_metadata(variables_csv):
+    """
+    Load per-variable DataType and CodeList decodes from the variables report
+    written by definexml2csv.py, keyed by (dataset name, variable name).
+
+    Codelists for the same variable in different studies are merged; the
+    first decode seen for a coded value wins.
+    """
+    df = pd.read_csv(variables_csv, dtype=str, keep_default_na=False)
+    metadata = {}
+    for row in df.itertuples(index=False):
+        key = (row.Dataset_Name.upper(), row.Variable_Name.upper())
+        entry = metadata.setdefault(key, {'data_type': row.Variable_Data_Type, 'codelist': {}})
+        if row.CodeList_Coded_Values:
+            for pair in row.CodeList_Coded_Values.split(';\n'):
+                code, _, decode = pair.partition(': ')
+                if decode and decode != 'None':
+                    entry['codelist'].setdefault(code, decode)
+    return metadata
+
+def build_type_rules(member_name, header_variables, metadata, decode_codelists=False):
+    """
+    Decide how each variable should be typed, using the Define-XML DataType and,
+    for numeric variables, the SAS display format from the XPT header (ADaM
+    numeric dates are usually declared as integer/float in Define-XML).
+
+    Returns {variable name: (conversion, codelist or None)}.
+    """
+    rules = {}
+    for variable in header_variables:
+        name = variable['name']
+        display_format = variable['format'].upper()
+        define = metadata.get((member_name.upper(), name.upper()), {})
+        data_type = define.get('data_type')
+
+        conversion = None
+        if variable['type'] == 'numeric':
+            if display_format.startswith(SAS_DATETIME_FORMATS) or data_type == 'datetime':
+                conversion = 'sas_datetime'
+            elif display_format.startswith(SAS_DATE_FORMATS) or data_type == 'date':
+                conversion = 'sas_date'
+            elif display_format.startswith(SAS_TIME_FORMATS) or data_type == 'time':
+                conversion = 'sas_time'
+        elif data_type in ('date', 'datetime'):
+            conversion = 'iso8601'
+
+        codelist = define.get('codelist') if decode_codelists else None
+        if conversion or codelist:
+            rules[name] = (conversion, codelist or None)
+    return rules
+
+def decode_values(values, codelist):
+    """
+    Map a column through a codelist's {coded value: decode}.
+
+    XPT numerics are read as floats while Define-XML coded values are text,
+    so integral floats are looked up without their ".0" (40.0 -> "40").
+    Run `python -m doctest _scripts/xpt2csv.py` to check:
+
+    >>> decode_values(pd.Series([40.0, 1.5, None]), {'40': 'Week 4', '1.5': 'Half'}).tolist()
+    ['Week 4', 'Half', nan]
+    >>> decode_values(pd.Series(['Y', 'N']), {'Y': 'Yes'}).tolist()
+    ['Yes', nan]
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        keys = values.map(lambda v: str(int(v)) if float(v).is_integer() else str(v), na_action='ignore')
+        return keys.map(codelist)
+    return values.astype(str).map(codelist)
+
+def format_times(seconds):
+    """
+    Seconds (since midnight, or a duration) as HH:MM:SS text, fractions dropped.
+
+    >>> format_times(pd.Series([30600.0, 3600.5, None, 90000.0])).tolist()
+    ['08:30:00', '01:00:00', nan, '25:00:00']
+    """
+    whole = pd.to_numeric(seconds, errors='coerce').dropna().astype('int64')
+    text = ((whole // 3600).astype(str).str.zfill(2) + ':' + (whole % 3600 // 60).astype(str).str.zfill(2)
+            + ':' + (whole % 60).astype(str).str.zfill(2))
+    return text.reindex(seconds.index)
+
+def apply_type_rules(chunk, rules):
+    """
+    Apply vectorized date/time conversions and codelist decodes to one chunk.
+
+    SAS numeric dates/datetimes/times are converted in place, to text in
+    ISO_DATE_FORMAT, ISO_DATETIME_FORMAT and HH:MM:SS. Character ISO 8601
+    (--DTC) values may legitimately be partial dates, so they are kept as-is and
+    the parsed timestamp is added as <VAR>_DT (in ISO_DATETIME_FORMAT).
+    Decodes are added as <VAR>_DECODE.
+
+    >>> chunk = pd.DataFrame({'ADT': [0.0, 1.0], 'ADTM': [0.0, 30600.0], 'ATM': [30600.0, None]})
+    >>> rules = {'ADT': ('sas_date', None), 'ADTM': ('sas_datetime', None), 'ATM': ('sas_time', None)}
+    >>> apply_type_rules(chunk, rules).values.tolist()
+    [['1960-01-01', '1960-01-01T00:00:00', '08:30:00'], ['1960-01-02', '1960-01-01T08:30:00', nan]]
+    """
+    for name, (conversion, codelist) in rules.items():
+        if name not in chunk.columns:
+            continue
+        values = chunk[name]
+        if conversion == 'sas_date':
+            chunk[name] = (SAS_EPOCH + pd.to_timedelta(values, unit='D')).dt.strftime(ISO_DATE_FORMAT)
+        elif conversion == 'sas_datetime':
+            chunk[name] = (SAS_EPOCH + pd.to_timedelta(values, unit='s')).dt.strftime(ISO_DATETIME_FORMAT)
+        elif conversion == 'sas_time':
+            chunk[name] = format_times(values)
+        elif conversion == 'iso8601':
+            chunk[f"{name}_DT"] = pd.to_datetime(values, format='ISO8601', errors='coerce') \
+                .dt.strftime(ISO_DATETIME_FORMAT)
+        if codelist:
+            chunk[f"{name}_DECODE"] = decode_values(values, codelist)
+    return chunk
+
+def convert_xpt_to_csv(source_dir=".", output_dir="xpt_converted", inventory_db="xpt_inventory.db",
+                       chunk_rows=XPT_CHUNK_ROWS, top_k=10, define_metadata=None, decode_codelists=False):
+    """
+    Convert all XPT files to CSV format from subdirectories.
+
+    Each file is streamed in chunks of `chunk_rows`; the same pass builds a
+    per-column profile (nulls, approximate distinct count, min/max, top-k)
+    written to <name>.profile.json and rolled up into the inventory database.
+
+    If `define_metadata` points to the variables report from definexml2csv.py,
+    dates and times are typed at conversion time and, with `decode_codelists`,
+    decoded columns are added for variables with a CodeList.
+    """
     
     # Create output directory with timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -32,6 +191,10 @@ def convert_xpt_to_csv(source_dir=".", output_dir="xpt_converted"):
         print("No XPT files found. Exiting.")
         return
     
+    metadata = load_define_metadata(define_metadata) if define_metadata else {}
+    if metadata:
+        print(f"Loaded Define-XML metadata for {len(metadata)} dataset variables")
+    
     # Track conversions
     successful = 0
     failed = []
@@ -39,19 +202,42 @@ def convert_xpt_to_csv(source_dir=".", output_dir="xpt_converted"):
     
     # Create summary report
     summary_data = []
+    column_profiles = []
     
     for xpt_file in tqdm(xpt_files, desc="Converting XPT files"):
         try:
-            # Read XPT
-            df = pd.read_sas(str(xpt_file), format='xport', encoding='latin1')
-            
             # Create output path preserving folder structure
             relative_path = xpt_file.relative_to(source_dir)
             csv_path = Path(output_dir) / relative_path.with_suffix('.csv')
             csv_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Save as CSV
-            df.to_csv(csv_path, index=False)
+            # Work out date/codelist conversions once per file from its header
+            header = read_xpt_header(xpt_file)
+            rules = build_type_rules(header['member_name'], header['variables'],
+                                     metadata, decode_codelists)
+            
+            # Stream XPT to CSV chunk by chunk, profiling columns as we go
+            profiler = DatasetProfiler(top_k=top_k)
+            with pd.read_sas(str(xpt_file), format='xport', encoding='latin1',
+                             chunksize=chunk_rows) as reader:
+                columns = list(reader.columns)
+                header_written = False
+                for chunk in reader:
+                    chunk = apply_type_rules(chunk, rules)
+                    chunk.to_csv(csv_path, index=False, mode='a' if header_written else 'w',
+                                 header=not header_written)
+                    header_written = True
+                    profiler.update(chunk)
+                if not header_written:
+                    pd.DataFrame(columns=columns).to_csv(csv_path, index=False)
+            row_count = profiler.row_count
+            
+            profile = profiler.to_dict()
+            profile['source'] = str(relative_path)
+            with open(csv_path.with_suffix('.profile.json'), 'w') as f:
+                json.dump(profile, f, indent=2)
+            for column_profile in profile['columns']:
+                column_profiles.append({'path': str(relative_path), **column_profile})
             
             # Calculate sizes
             original_size_mb = xpt_file.stat().st_size / 1024 / 1024
@@ -63,11 +249,11 @@ def convert_xpt_to_csv(source_dir=".", output_dir="xpt_converted"):
             with open(summary_path, 'w') as f:
                 f.write(f"Original XPT file: {xpt_file.name}\n")
                 f.write(f"Converted CSV: {csv_path.name}\n")
-                f.write(f"Rows: {len(df)}\n")
-                f.write(f"Columns: {len(df.columns)}\n")
-                f.write(f"Column names: {', '.join(df.columns[:10])}")
-                if len(df.columns) > 10:
-                    f.write(f"... and {len(df.columns) - 10} more")
+                f.write(f"Rows: {row_count}\n")
+                f.write(f"Columns: {len(columns)}\n")
+                f.write(f"Column names: {', '.join(columns[:10])}")
+                if len(columns) > 10:
+                    f.write(f"... and {len(columns) - 10} more")
                 f.write("\n")
                 f.write(f"Original size: {original_size_mb:.2f} MB\n")
                 f.write(f"CSV size: {csv_size_mb:.2f} MB\n")
@@ -77,8 +263,8 @@ def convert_xpt_to_csv(source_dir=".", output_dir="xpt_converted"):
             summary_data.append({
                 'filename': xpt_file.name,
                 'folder': relative_path.parts[0],
-                'rows': len(df),
-                'columns': len(df.columns),
+                'rows': row_count,
+                'columns': len(columns),
                 'original_size_mb': round(original_size_mb, 2),
                 'csv_size_mb': round(csv_size_mb, 2),
                 'path': str(relative_path)
@@ -120,6 +306,17 @@ def convert_xpt_to_csv(source_dir=".", output_dir="xpt_converted"):
             if failed:
                 failed_df = pd.DataFrame(failed)
                 failed_df.to_excel(writer, sheet_name='Failed Conversions', index=False)
+            
+            # Column profiles (top values flattened for the spreadsheet)
+            if column_profiles:
+                profiles_df = pd.DataFrame(column_profiles)
+                profiles_df['top_values'] = profiles_df['top_values'].apply(
+                    lambda values: '; '.join(f"{v['value']} ({v['count']})" for v in values))
+                profiles_df.to_excel(writer, sheet_name='Column Profiles', index=False)
+    
+    if column_profiles:
+        write_profiles_db(column_profiles, inventory_db)
+        print(f"Column profiles added to: {inventory_db}")
     
     # Create a simple log file
     log_path = Path(output_dir) / "conversion_log.txt"
@@ -151,33 +348,282 @@ def convert_xpt_to_csv(source_dir=".", output_dir="xpt_converted"):
     print(f"\nOutput directory: {output_dir}")
     print(f"Inventory file: {inventory_path}")
 
-def create_xpt_inventory(source_dir="."):
-    """Create an inventory of all XPT files before conversion"""
-    
+def read_xpt_header(xpt_path):
+    """
+    Read dataset metadata from the header records of a SAS XPORT (v5) file.
+
+    Only the header cards and the final data card are parsed; the observation
+    count is derived from the file size and the row length declared by the
+    NAMESTR records. XPORT v5 doesn't record where a member's data ends, so
+    the data is searched (memory-mapped, without parsing rows) for the MEMBER
+    header card of a second member; files holding more than one are rejected.
+    """
+    xpt_path = Path(xpt_path)
+    file_size = xpt_path.stat().st_size
+
+    with open(xpt_path, 'rb') as f:
+        header = f.read(XPT_HEADER_READ_BYTES)
+
+        if not header.startswith(XPT_LIBRARY_HEADER):
+            raise ValueError("Not a SAS XPORT v5 file (missing LIBRARY header record)")
+
+        # Cards 1-3 are the library header; the member header follows
+        member_offset = 3 * XPT_CARD_SIZE
+        if not header[member_offset:].startswith(XPT_MEMBER_HEADER):
+            raise ValueError("Missing MEMBER header record")
+        namestr_length = int(header[member_offset + 74:member_offset + 78])
+
+        # Member descriptor cards: name on the first, label on the second
+        descriptor = header[member_offset + 2 * XPT_CARD_SIZE:member_offset + 4 * XPT_CARD_SIZE]
+        member_name = descriptor[8:16].decode('latin1').strip()
+        dataset_label = descriptor[XPT_CARD_SIZE + 32:XPT_CARD_SIZE + 72].decode('latin1').strip()
+        dataset_type = descriptor[XPT_CARD_SIZE + 72:XPT_CARD_SIZE + 80].decode('latin1').strip()
+
+        namestr_offset = member_offset + 4 * XPT_CARD_SIZE
+        if not header[namestr_offset:].startswith(XPT_NAMESTR_HEADER):
+            raise ValueError("Missing NAMESTR header record")
+        variable_count = int(header[namestr_offset + 54:namestr_offset + 58])
+
+        # Variable descriptors are padded out to a whole number of cards
+        variables_offset = namestr_offset + XPT_CARD_SIZE
+        variables_size = variable_count * namestr_length
+        padded_size = -(-variables_size // XPT_CARD_SIZE) * XPT_CARD_SIZE
+        obs_offset = variables_offset + padded_size
+
+        if obs_offset + XPT_CARD_SIZE > len(header):
+            # Extremely wide dataset; re-read just enough of the header
+            f.seek(0)
+            header = f.read(obs_offset + XPT_CARD_SIZE)
+
+        variables = []
+        row_length = 0
+        for i in range(variable_count):
+            start = variables_offset + i * namestr_length
+            record = header[start:start + namestr_length]
+            var_type, _, var_length, var_number = struct.unpack('>hhhh', record[0:8])
+            var_position = struct.unpack('>i', record[84:88])[0]
+            variables.append({
+                'position': var_number,
+                'name': record[8:16].decode('latin1').strip(),
+                'label': record[16:56].decode('latin1').strip(),
+                'type': 'numeric' if var_type == 1 else 'character',
+                'length': var_length,
+                'format': record[56:64].decode('latin1').strip(),
+            })
+            row_length = max(row_length, var_position + var_length)
+
+        if not header[obs_offset:].startswith(XPT_OBS_HEADER):
+            raise ValueError("Missing OBS header record (unsupported layout)")
+
+        data_start = obs_offset + XPT_CARD_SIZE
+        if _next_member_offset(f, data_start) is not None:
+            raise ValueError("Multiple members in one file are not supported")
+        data_size = file_size - data_start
+        observation_count = data_size // row_length if row_length else 0
+
+        # The final card is blank-padded, which can look like extra short rows;
+        # drop trailing all-blank rows that fall inside that last card
+        if observation_count and row_length < XPT_CARD_SIZE:
+            f.seek(max(data_start, file_size - XPT_CARD_SIZE))
+            tail_start = f.tell() - data_start
+            tail = f.read()
+            while observation_count:
+                row_start = (observation_count - 1) * row_length
+                if row_start < tail_start:
+                    break
+                row = tail[row_start - tail_start:row_start - tail_start + row_length]
+                if row.strip(b' '):
+                    break
+                observation_count -= 1
+
+    return {
+        'member_name': member_name,
+        'dataset_label': dataset_label,
+        'dataset_type': dataset_type,
+        'variable_count': variable_count,
+        'row_length': row_length,
+        'observation_count': observation_count,
+        'variables': variables,
+    }
+
+def _next_member_offset(f, start):
+    """Offset of the first MEMBER header card at or after start, or None; header
+    records always begin on a card boundary, so matches inside a card are data"""
+    if os.fstat(f.fileno()).st_size <= start:
+        return None
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offset = mm.find(XPT_MEMBER_HEADER, start)
+        while offset >= 0 and offset % XPT_CARD_SIZE:
+            offset = mm.find(XPT_MEMBER_HEADER, offset + 1)
+    return offset if offset >= 0 else None
+
+def _scan_xpt_file(args):
+    """Inventory worker: header-scan one XPT file, capturing any error"""
+    xpt_file, source_dir, subdir = args
+    entry = {
+        'filename': xpt_file.name,
+        'folder': subdir,
+        'path': str(xpt_file.relative_to(source_dir)),
+        'size_mb': round(xpt_file.stat().st_size / 1024 / 1024, 2),
+        'member_name': None,
+        'dataset_label': None,
+        'dataset_type': None,
+        'variable_count': None,
+        'observation_count': None,
+        'row_length': None,
+        'error': None,
+    }
+    variables = []
+    try:
+        header = read_xpt_header(xpt_file)
+        variables = header.pop('variables')
+        entry.update(header)
+    except Exception as e:
+        entry['error'] = str(e)
+    return entry, variables
+
+def write_inventory_db(inventory, variables, db_path):
+    """Write the header-scan inventory to a SQLite database (replacing any previous run)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript("""
+            DROP TABLE IF EXISTS xpt_variables;
+            DROP TABLE IF EXISTS xpt_files;
+            CREATE TABLE xpt_files (
+                path TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                folder TEXT,
+                size_mb REAL,
+                member_name TEXT,
+                dataset_label TEXT,
+                dataset_type TEXT,
+                variable_count INTEGER,
+                observation_count INTEGER,
+                row_length INTEGER,
+                error TEXT
+            );
+            CREATE TABLE xpt_variables (
+                path TEXT NOT NULL REFERENCES xpt_files(path),
+                position INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                label TEXT,
+                type TEXT,
+                length INTEGER,
+                format TEXT,
+                PRIMARY KEY (path, position)
+            );
+            CREATE INDEX idx_xpt_files_member ON xpt_files(member_name);
+            CREATE INDEX idx_xpt_variables_name ON xpt_variables(name);
+        """)
+        file_columns = ['path', 'filename', 'folder', 'size_mb', 'member_name', 'dataset_label', 'dataset_type',
+                        'variable_count', 'observation_count', 'row_length', 'error']
+        conn.executemany(
+            f"INSERT INTO xpt_files ({', '.join(file_columns)}) VALUES ({', '.join('?' * len(file_columns))})",
+            [tuple(entry[c] for c in file_columns) for entry in inventory]
+        )
+        variable_columns = ['path', 'position', 'name', 'label', 'type', 'length', 'format']
+        conn.executemany(
+            f"INSERT INTO xpt_variables ({', '.join(variable_columns)}) VALUES ({', '.join('?' * len(variable_columns))})",
+            [tuple(v[c] for c in variable_columns) for v in variables]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def write_profiles_db(column_profiles, db_path):
+    """Roll per-column profiles into the inventory database (replacing profiles for the same files)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS xpt_column_profiles (
+                path TEXT NOT NULL,
+                name TEXT NOT NULL,
+                dtype TEXT,
+                count INTEGER,
+                null_count INTEGER,
+                null_rate REAL,
+                approx_distinct INTEGER,
+                min TEXT,
+                max TEXT,
+                top_values TEXT,
+                PRIMARY KEY (path, name)
+            );
+            CREATE INDEX IF NOT EXISTS idx_xpt_column_profiles_name ON xpt_column_profiles(name);
+        """)
+        paths = sorted({p['path'] for p in column_profiles})
+        conn.executemany("DELETE FROM xpt_column_profiles WHERE path = ?", [(p,) for p in paths])
+        conn.executemany(
+            "INSERT INTO xpt_column_profiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(p['path'], p['name'], p['dtype'], p['count'], p['null_count'], p['null_rate'],
+              p['approx_distinct'],
+              None if p['min'] is None else str(p['min']),
+              None if p['max'] is None else str(p['max']),
+              json.dumps(p['top_values']))
+             for p in column_profiles]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def create_xpt_inventory(source_dir=".", output_db="xpt_inventory.db", max_workers=16):
+    """
+    Create an inventory of all XPT files before conversion.
+
+    Reads only the XPT header records (in parallel) to capture each dataset's
+    member name, label, variables and exact observation count. Results are
+    written to a SQLite database, a Parquet file per table, and the XLSX.
+    """
+
     subdirs = ["pd-eua-production-051925", "pd-eua-production-063025"]
-    inventory = []
-    
+    jobs = []
+
     for subdir in subdirs:
         subdir_path = Path(source_dir) / subdir
         if subdir_path.exists():
             for xpt_file in subdir_path.rglob("*.xpt"):
-                inventory.append({
-                    'filename': xpt_file.name,
-                    'folder': subdir,
-                    'path': str(xpt_file.relative_to(source_dir)),
-                    'size_mb': round(xpt_file.stat().st_size / 1024 / 1024, 2)
-                })
-    
-    if inventory:
-        df = pd.DataFrame(inventory)
-        df = df.sort_values(['folder', 'filename'])
-        output_file = "xpt_files_inventory.xlsx"
-        df.to_excel(output_file, index=False)
-        print(f"Created inventory: {output_file}")
-        print(f"Total files: {len(inventory)}")
-        print(f"Total size: {df['size_mb'].sum():.2f} MB ({df['size_mb'].sum()/1024:.2f} GB)")
-    else:
+                jobs.append((xpt_file, source_dir, subdir))
+
+    if not jobs:
         print("No XPT files found")
+        return
+
+    # Header reads are small and I/O bound, so threads are sufficient
+    inventory = []
+    all_variables = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for entry, variables in tqdm(executor.map(_scan_xpt_file, jobs), total=len(jobs),
+                                     desc="Scanning XPT headers"):
+            inventory.append(entry)
+            for variable in variables:
+                all_variables.append({'path': entry['path'], **variable})
+
+    df = pd.DataFrame(inventory)
+    df = df.sort_values(['folder', 'filename'])
+    variables_df = pd.DataFrame(all_variables)
+
+    write_inventory_db(df.to_dict('records'), all_variables, output_db)
+    print(f"Created inventory database: {output_db}")
+
+    try:
+        df.to_parquet(Path(output_db).with_suffix('.files.parquet'), index=False)
+        variables_df.to_parquet(Path(output_db).with_suffix('.variables.parquet'), index=False)
+    except ImportError:
+        print("pyarrow not installed; skipping Parquet inventory")
+
+    output_file = "xpt_files_inventory.xlsx"
+    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='File Inventory', index=False)
+        if not variables_df.empty:
+            variables_df.to_excel(writer, sheet_name='Variables', index=False)
+    print(f"Created inventory: {output_file}")
+
+    failed = df['error'].notna().sum()
+    print(f"Total files: {len(inventory)}")
+    print(f"Total size: {df['size_mb'].sum():.2f} MB ({df['size_mb'].sum()/1024:.2f} GB)")
+    print(f"Total observations: {int(df['observation_count'].fillna(0).sum()):,}")
+    print(f"Total variables: {len(all_variables):,}")
+    if failed:
+        print(f"Files with unreadable headers: {failed}")
 
 if __name__ == "__main__":
     print("XPT to CSV Converter")
@@ -190,6 +636,8 @@ if __name__ == "__main__":
     # Ask user to proceed
     response = input("\nProceed with conversion? (y/n): ")
     if response.lower() == 'y':
-        convert_xpt_to_csv()
+        # Type dates and decode codelists using definexml2csv.py output when present
+        define_metadata = "variables_report.csv" if os.path.exists("variables_report.csv") else None
+        convert_xpt_to_csv(define_metadata=define_metadata, decode_codelists=define_metadata is not None)
     else:
         print("Conversion cancelled.")
@@ -0,0 +1,511 @@
+const navigatorConfig=window.NAVIGATOR;const modernaProfile=navigatorConfig.profile==='moderna';const folderButtons=navigatorConfig.folderFilter==='buttons';let csvData=[];let facetCounts=null;let dataSource=null;let bitmapIndex=null;const bitmapCache=new Map();let searchIndex=null;const searchShards=new Map();let searchSequence=0;let searchQuery='';let searchScores=null;let shardManifest=null;const shardLoads=new Map();let corpusLoad=null;let shardRows=[];const shardTags=new Set();let nearDuplicates=null;let currentData=[];const tooltip=d3.select('.tooltip');let documentTypeSortMode='count';let tooltipPersistent=false;let currentView='file-list';let displayedFiles=0;const filesPerPage=200;let filteredFileData=[];let allUniqueTags=[];let selectedTags=new Set();let availableTagsCache={rows:null,tags:[]};let tagSearchFocusIndex=-1;let sortColumn='filename';let sortDirection='asc';const extensionColors={'pdf':'#DC2626','doc':'#2563EB','docx':'#1E40AF','xpt':'#7C3AED','jpg':'#EAB308','jpeg':'#CA8A04','xml':'#059669','excel':'#0891B2','xlsx':'#10B981','xls':'#059669','ppt':'#EA580C','pptx':'#DC2626','png':'#F59E0B','gif':'#8B5CF6','txt':modernaProfile?'#D97706':'#6B7280','csv':'#14B8A6','zip':'#64748B','msg':'#0891B2','jmp':'#F97316','sas':'#F87171','other':'#9CA3AF'
+};document.addEventListener('click',function(event){if(tooltipPersistent&&!event.target.closest('.tooltip')&&
+!event.target.closest('.bar-segment')&&!event.target.closest('text')){hideTooltip();tooltipPersistent=false;}
+});document.addEventListener('keydown',function(event){if(event.key==='Escape'&&tooltipPersistent){hideTooltip();tooltipPersistent=false;}
+});document.getElementById('sortCount').addEventListener('change',function(){if(this.checked&&currentData.length>0){const sortedData=[...currentData].sort((a,b)=>{if(b.count!==a.count){return b.count-a.count;}
+return a.tag.localeCompare(b.tag);});createChart(sortedData);}
+});document.getElementById('sortTag').addEventListener('change',function(){if(this.checked&&currentData.length>0){const sortedData=[...currentData].sort((a,b)=>a.tag.localeCompare(b.tag));createChart(sortedData);}
+});document.getElementById('domainFilter').addEventListener('change',function(){processData();});document.getElementById('documentTypeFilter').addEventListener('change',function(){processData();});document.getElementById('documentTypeFilter').addEventListener('keydown',function(e){if((e.altKey||e.ctrlKey)&&e.key==='s'){e.preventDefault();toggleDocumentTypeSort();}
+});document.getElementById('vaccineCandidateFilter').addEventListener('change',function(){processData();});document.getElementById('clinicalTrialFilter').addEventListener('change',function(){processData();});document.querySelectorAll('.tab-button').forEach(tab=>{tab.addEventListener('click',function(){document.querySelectorAll('.tab-button').forEach(t=>t.classList.remove('active'));this.classList.add('active');clearAllFilters();currentView=this.dataset.view;if(currentView==='file-list'){document.getElementById('file-list-view').style.display='block';document.getElementById('tag-chart-view').style.display='none';document.querySelector('.sort-controls').style.display='none';}else{document.getElementById('file-list-view').style.display='none';document.getElementById('tag-chart-view').style.display='block';document.querySelector('.sort-controls').style.display='block';}
+processData();});});function setupButtonFilters(containerId){const container=document.getElementById(containerId);const buttons=container.querySelectorAll('.filter-button');buttons.forEach(button=>{button.addEventListener('click',function(){buttons.forEach(b=>b.classList.remove('active'));this.classList.add('active');processData();});});}
+if(folderButtons){setupButtonFilters('folderFilters');}else{document.getElementById('folderFilter').addEventListener('change',function(){processData();});}
+setupButtonFilters('moduleFilters');document.querySelectorAll('#fileTypeFilters .file-type-button').forEach(button=>{button.addEventListener('click',function(){document.querySelectorAll('#fileTypeFilters .file-type-button').forEach(b=>b.classList.remove('active'));this.classList.add('active');processData();});});function countFacets(rows){const folderCounts={};rows.forEach(row=>{const folder=row.folder||'none';folderCounts[folder]=(folderCounts[folder]||0)+1;});const moduleCounts={none:0};rows.forEach(row=>{const module=row.module||'none';if(module===''||!module){moduleCounts.none++;}else{moduleCounts[module]=(moduleCounts[module]||0)+1;}
+});const documentTypeCounts={};const vaccineCandidateCounts={};const clinicalTrialCounts={};rows.forEach(row=>{const docType=row.documentType||'Unknown';documentTypeCounts[docType]=(documentTypeCounts[docType]||0)+1;const candidates=row.vaccineCandidate;if(Array.isArray(candidates)){candidates.forEach(candidate=>{vaccineCandidateCounts[candidate]=(vaccineCandidateCounts[candidate]||0)+1;});}else if(candidates){vaccineCandidateCounts[candidates]=(vaccineCandidateCounts[candidates]||0)+1;}else{vaccineCandidateCounts['None']=(vaccineCandidateCounts['None']||0)+1;}
+const clinicalTrial=row.clinicalTrial||'None';clinicalTrialCounts[clinicalTrial]=(clinicalTrialCounts[clinicalTrial]||0)+1;});const fileTypeCounts={};rows.forEach(row=>{if(modernaProfile){const fileType=row.file_type?row.file_type.toLowerCase():null;if(fileType){if(fileType==='xls'||fileType==='xlsx'){fileTypeCounts['excel']=(fileTypeCounts['excel']||0)+1;}else{fileTypeCounts[fileType]=(fileTypeCounts[fileType]||0)+1;}
+}else{const ext=getFileExtension(row.filename);if(row.filename.toLowerCase().endsWith('-sas.pdf')){fileTypeCounts['sas']=(fileTypeCounts['sas']||0)+1;}else if(ext){fileTypeCounts[ext]=(fileTypeCounts[ext]||0)+1;}
+}
+}else{const ext=getFileExtension(row.filename);if(row.filename.toLowerCase().endsWith('-sas.pdf')){fileTypeCounts['sas']=(fileTypeCounts['sas']||0)+1;}else if(ext==='doc'||ext==='docx'){fileTypeCounts['word']=(fileTypeCounts['word']||0)+1;}else{fileTypeCounts[ext]=(fileTypeCounts[ext]||0)+1;}
+}
+});const domainCounts={};rows.forEach(row=>{const domain=extractDomain(row.filename);if(domain){domainCounts[domain]=(domainCounts[domain]||0)+1;}
+});return{total:rows.length,folder:folderCounts,module:moduleCounts,documentType:documentTypeCounts,vaccineCandidate:vaccineCandidateCounts,clinicalTrial:clinicalTrialCounts,fileType:fileTypeCounts,domain:domainCounts
+};}
+function precomputedFacetCounts(activeFilters){if(!facetCounts||facetCounts.counts.total!==corpusSize()||searchScores){return null;}
+const active=Object.entries(activeFilters).filter(([facet,value])=>value!=='all');if(active.length+selectedTags.size===0){return facetCounts.counts;}
+if(active.length+selectedTags.size>1){return null;}
+const[facet,value]=active.length?active[0]:['tags',Array.from(selectedTags)[0]];const states=facetCounts.cross[facet]||{};return Object.prototype.hasOwnProperty.call(states,value)?states[value]:null;}
+function wholeCorpusFacetCounts(){if(facetCounts&&facetCounts.counts.total===corpusSize()){return facetCounts.counts;}
+return countFacets(csvData);}
+function updateFilterCountsFromFilteredData(dataToCount){const activeFileType=document.querySelector('#fileTypeFilters .file-type-button.active').dataset.filter;const activeFolder=activeFolderFilter();const activeModule=document.querySelector('#moduleFilters .filter-button.active').dataset.filter;const activeDocumentType=document.getElementById('documentTypeFilter').value;const activeDomain=document.getElementById('domainFilter').value;const activeVaccineCandidate=document.getElementById('vaccineCandidateFilter').value;const activeClinicalTrial=document.getElementById('clinicalTrialFilter').value;const hasActiveTags=selectedTags.size>0;const counts=precomputedFacetCounts({fileType:activeFileType,folder:activeFolder,module:activeModule,documentType:activeDocumentType,domain:activeDomain,vaccineCandidate:activeVaccineCandidate,clinicalTrial:activeClinicalTrial
+})||countFacets(dataToCount);const folderCounts=counts.folder;const moduleCounts=counts.module;const documentTypeCounts=counts.documentType;const vaccineCandidateCounts=counts.vaccineCandidate;const clinicalTrialCounts=counts.clinicalTrial;const fileTypeCounts=counts.fileType;const domainCounts=counts.domain;if(folderButtons){document.querySelectorAll('#folderFilters .filter-button').forEach(button=>{const filter=button.dataset.filter;let countSpan=button.querySelector('.filter-count');if(!countSpan){const buttonText=button.textContent.replace(/\s*\(\d+\)\s*$/,'');button.innerHTML=`${buttonText} <span class="filter-count"></span>`;countSpan=button.querySelector('.filter-count');}
+if(filter==='all'){countSpan.textContent=`(${dataToCount.length})`;}else{const count=folderCounts[filter]||0;countSpan.textContent=`(${count})`;}
+});}else{const folderDropdown=document.getElementById('folderFilter');const currentFolderValue=folderDropdown.value;folderDropdown.querySelectorAll('option').forEach(option=>{const value=option.value;const originalText=option.textContent.split(' (')[0];if(value==='all'){option.textContent=`All Folders (${dataToCount.length})`;}else{const count=folderCounts[value]||0;if(!modernaProfile||currentFolderValue==='all'||count>0){option.textContent=`${originalText} (${count})`;}else{option.textContent=originalText;}
+}
+});folderDropdown.value=currentFolderValue;}
+document.querySelectorAll('#moduleFilters .filter-button').forEach(button=>{const filter=button.dataset.filter;let countSpan=button.querySelector('.filter-count');if(!countSpan){const buttonText=button.textContent.replace(/\s*\(\d+\)\s*$/,'');button.innerHTML=`${buttonText} <span class="filter-count"></span>`;countSpan=button.querySelector('.filter-count');}
+if(filter==='all'){countSpan.textContent=`(${dataToCount.length})`;}else if(filter==='none'){countSpan.textContent=`(${moduleCounts.none})`;}else{const count=moduleCounts[filter]||0;countSpan.textContent=`(${count})`;}
+});const documentTypeFilter=document.getElementById('documentTypeFilter');const currentDocTypeValue=documentTypeFilter.value;documentTypeFilter.querySelectorAll('option').forEach(option=>{const value=option.value;const originalText=option.textContent.split(' (')[0];if(value==='all'){option.textContent='All Types';}else if(currentDocTypeValue==='all'&&documentTypeCounts[value]!==undefined){option.textContent=`${originalText} (${documentTypeCounts[value]})`;}else if(currentDocTypeValue==='all'){option.textContent=`${originalText} (0)`;}else{option.textContent=originalText;}
+});const vaccineCandidateFilter=document.getElementById('vaccineCandidateFilter');const currentVaccineCandidateValue=vaccineCandidateFilter.value;vaccineCandidateFilter.querySelectorAll('option').forEach(option=>{const value=option.value;const originalText=option.textContent.split(' (')[0];if(value==='all'){option.textContent='All Candidates';}else{const count=vaccineCandidateCounts[value]||0;if(activeVaccineCandidate==='all'||count>0){option.textContent=`${originalText} (${count})`;}else{option.textContent=originalText;}
+}
+});const clinicalTrialFilter=document.getElementById('clinicalTrialFilter');const currentClinicalTrialValue=clinicalTrialFilter.value;clinicalTrialFilter.querySelectorAll('option').forEach(option=>{const value=option.value;const originalText=option.textContent.split(' (')[0];if(value==='all'){option.textContent='All Trials';}else{const count=clinicalTrialCounts[value]||0;const activeClinicalTrial=document.getElementById('clinicalTrialFilter').value;if(activeClinicalTrial==='all'||count>0){option.textContent=`${originalText} (${count})`;}else{option.textContent=originalText;}
+}
+});document.querySelectorAll('#fileTypeFilters .file-type-button').forEach(button=>{const filter=button.dataset.filter;if(filter==='all'){button.querySelector('.file-type-count').textContent=`(${dataToCount.length})`;}else{const count=fileTypeCounts[filter]||0;button.querySelector('.file-type-count').textContent=`(${count})`;}
+});const domainFilter=document.getElementById('domainFilter');const currentDomainValue=domainFilter.value;domainFilter.querySelectorAll('option').forEach(option=>{const value=option.value;const originalText=option.textContent.split(' (')[0];if(value==='all'){option.textContent='All Domains';}else if(modernaProfile){const count=domainCounts[value]||0;if(currentDomainValue==='all'||count>0){option.textContent=`${originalText} (${count})`;}else{option.textContent=originalText;}
+}else if(currentDomainValue==='all'&&domainCounts[value]!==undefined){option.textContent=`${originalText} (${domainCounts[value]})`;}else if(currentDomainValue==='all'){option.textContent=`${originalText} (0)`;}else{option.textContent=originalText;}
+});}
+function updateFilterCounts(){const counts=wholeCorpusFacetCounts();const folderCounts=counts.folder;const moduleCounts=counts.module;const documentTypeCounts=counts.documentType;const vaccineCandidateCounts=counts.vaccineCandidate;const clinicalTrialCounts=counts.clinicalTrial;const fileTypeCounts=counts.fileType;if(folderButtons){document.querySelectorAll('#folderFilters .filter-button').forEach(button=>{const filter=button.dataset.filter;let countSpan=button.querySelector('.filter-count');if(!countSpan){const buttonText=button.textContent.replace(/\s*\(\d+\)\s*$/,'');button.innerHTML=`${buttonText} <span class="filter-count"></span>`;countSpan=button.querySelector('.filter-count');}
+if(filter==='all'){countSpan.textContent=`(${corpusSize()})`;}else{const count=folderCounts[filter]||0;countSpan.textContent=`(${count})`;}
+});}else{const folderDropdown=document.getElementById('folderFilter');folderDropdown.innerHTML='<option value="all">All Folders</option>';const uniqueFolders=Object.keys(folderCounts).filter(folder=>folder!=='none');const sortedFolders=uniqueFolders.sort((a,b)=>{const dateA=new Date(a.replace(/.*-(\d{6}).*/,'$1').replace(/(\d{2})(\d{2})(\d{2})/,'20$3-$1-$2'));const dateB=new Date(b.replace(/.*-(\d{6}).*/,'$1').replace(/(\d{2})(\d{2})(\d{2})/,'20$3-$1-$2'));if(isNaN(dateA)||isNaN(dateB)){return a.localeCompare(b);}
+return dateB-dateA;});sortedFolders.forEach(folder=>{const option=document.createElement('option');option.value=folder;option.textContent=`${folder} (${folderCounts[folder]||0})`;folderDropdown.appendChild(option);});}
+document.querySelectorAll('#moduleFilters .filter-button').forEach(button=>{const filter=button.dataset.filter;let countSpan=button.querySelector('.filter-count');if(!countSpan){const buttonText=button.textContent.replace(/\s*\(\d+\)\s*$/,'');button.innerHTML=`${buttonText} <span class="filter-count"></span>`;countSpan=button.querySelector('.filter-count');}
+if(filter==='all'){countSpan.textContent=`(${corpusSize()})`;}else if(filter==='none'){countSpan.textContent=`(${moduleCounts.none})`;}else{const count=moduleCounts[filter]||0;countSpan.textContent=`(${count})`;}
+});const documentTypeFilter=document.getElementById('documentTypeFilter');let sortedDocTypes=Object.entries(documentTypeCounts)
+.map(([type,count])=>({type,count}));if(documentTypeSortMode==='count'){sortedDocTypes.sort((a,b)=>b.count-a.count);}else{sortedDocTypes.sort((a,b)=>a.type.localeCompare(b.type));}
+const allTypesOption=documentTypeFilter.querySelector('option[value="all"]');if(allTypesOption){allTypesOption.textContent='All Types';}
+const fragment=document.createDocumentFragment();const existingOptions={};documentTypeFilter.querySelectorAll('option').forEach(opt=>{if(opt.value!=='all'){existingOptions[opt.value]=opt;opt.remove();}
+});sortedDocTypes.forEach(({type,count})=>{let option=existingOptions[type];if(!option){option=document.createElement('option');option.value=type;}
+option.textContent=`${type} (${count})`;fragment.appendChild(option);});documentTypeFilter.appendChild(fragment);sortAndUpdateFileTypeButtons(fileTypeCounts);const vaccineCandidateFilter=document.getElementById('vaccineCandidateFilter');console.log('Vaccine candidate counts:',vaccineCandidateCounts);const sortedVaccineCandidates=Object.entries(vaccineCandidateCounts)
+.map(([candidate,count])=>({candidate,count}))
+.sort((a,b)=>a.candidate.localeCompare(b.candidate));vaccineCandidateFilter.innerHTML='<option value="all">All Candidates</option>';sortedVaccineCandidates.forEach(({candidate,count})=>{const option=document.createElement('option');option.value=candidate;option.textContent=`${candidate} (${count})`;vaccineCandidateFilter.appendChild(option);});console.log('Added vaccine candidates to dropdown:',sortedVaccineCandidates.length);const clinicalTrialFilter=document.getElementById('clinicalTrialFilter');const sortedClinicalTrials=Object.entries(clinicalTrialCounts)
+.filter(([trial,count])=>trial!=='None')
+.map(([trial,count])=>({trial,count}))
+.sort((a,b)=>a.trial.localeCompare(b.trial));clinicalTrialFilter.innerHTML='<option value="all">All Trials</option>';sortedClinicalTrials.forEach(({trial,count})=>{const option=document.createElement('option');option.value=trial;option.textContent=`${trial} (${count})`;clinicalTrialFilter.appendChild(option);});}
+function sortAndUpdateFileTypeButtons(fileTypeCounts){const container=document.getElementById('fileTypeFilters');const allButton=container.querySelector('.file-type-button[data-filter="all"]');if(modernaProfile){const fileTypeDefinitions={'pdf':{label:'PDF',color:'#DC2626'},'xpt':{label:'XPT',color:'#7C3AED'},'txt':{label:'TXT',color:'#D97706'},'docx':{label:'DOCX',color:'#1E40AF'},'doc':{label:'DOC',color:'#2563EB'},'excel':{label:'Excel',color:'#0891B2'},'word':{label:'Word',color:'#2563EB'},'xlsx':{label:'XLSX',color:'#10B981'},'xls':{label:'XLS',color:'#059669'},'xml':{label:'XML',color:'#059669'},'xsl':{label:'XSL',color:'#10B981'},'jmp':{label:'JMP',color:'#F97316'},'mp4':{label:'MP4',color:'#EC4899'},'sas':{label:'SAS',color:'#F87171'}
+};const currentActive=container.querySelector('.file-type-button.active')?.dataset.filter||'all';allButton.querySelector('.file-type-count')?.remove();const allText=allButton.textContent.replace(/\s*\(\d+\)$/,'');allButton.innerHTML=`${allText} <span class="file-type-count">(${corpusSize()})</span>`;container.innerHTML='';container.appendChild(allButton);const fileTypesWithCounts=Object.entries(fileTypeCounts)
+.filter(([type,count])=>count>0)
+.sort((a,b)=>b[1]-a[1]);fileTypesWithCounts.forEach(([filter,count])=>{const definition=fileTypeDefinitions[filter]||{label:filter.toUpperCase(),color:'#9CA3AF'};const button=document.createElement('button');button.className='file-type-button';if(filter===currentActive){button.classList.add('active');}
+button.dataset.filter=filter;button.style.background=definition.color;button.textContent=definition.label+' ';const countSpan=document.createElement('span');countSpan.className='file-type-count';countSpan.textContent=`(${count})`;button.appendChild(countSpan);container.appendChild(button);});}else{const otherButtons=Array.from(container.querySelectorAll('.file-type-button:not([data-filter="all"])'));const buttonInfo=otherButtons.map(button=>{const filter=button.dataset.filter;const count=fileTypeCounts[filter]||0;const style=button.getAttribute('style');const isActive=button.classList.contains('active');const text=button.textContent.replace(/\s*\(\d+\)$/,'');return{filter,count,style,isActive,text,element:button
+};});buttonInfo.sort((a,b)=>b.count-a.count);allButton.querySelector('.file-type-count')?.remove();const allText=allButton.textContent.replace(/\s*\(\d+\)$/,'');allButton.innerHTML=`${allText} <span class="file-type-count">(${corpusSize()})</span>`;container.innerHTML='';container.appendChild(allButton);buttonInfo.forEach(info=>{const button=document.createElement('button');button.className='file-type-button'+(info.isActive?' active':'');button.dataset.filter=info.filter;if(info.style){button.setAttribute('style',info.style);}
+const buttonText=info.text;const countSpan=document.createElement('span');countSpan.className='file-type-count';countSpan.textContent=`(${info.count})`;button.textContent=buttonText+' ';button.appendChild(countSpan);container.appendChild(button);});}
+container.querySelectorAll('.file-type-button').forEach(button=>{button.addEventListener('click',function(){document.querySelectorAll('#fileTypeFilters .file-type-button').forEach(b=>b.classList.remove('active'));this.classList.add('active');processData();});});const domainCounts=wholeCorpusFacetCounts().domain;if(modernaProfile){const domainFilter=document.getElementById('domainFilter');const currentDomainValue=domainFilter.value;const domainDefinitions={'ada':'ada - Analysis Dataset','adae':'adae - Analysis Dataset for Adverse Events','adar':'adar - Analysis Dataset for Reactogenicity','adar1':'adar1 - Analysis Dataset for Reactogenicity (Part 1)','adar2':'adar2 - Analysis Dataset for Reactogenicity (Part 2)','adarp7d':'adarp7d - Analysis Dataset for Reactogenicity (7-Day)','adarsum':'adarsum - Analysis Dataset for Reactogenicity Summary','adc19ef':'adc19ef - Analysis Dataset for COVID-19 Efficacy','adcevd':'adcevd - Analysis Dataset for COVID-19 Events/Disease','adcm':'adcm - Analysis Dataset for Concomitant Medications','adcov':'adcov - Analysis Dataset for COVID-19','adds':'adds - Analysis Dataset for Disposition','addv':'addv - Analysis Dataset for Protocol Deviations','adeff':'adeff - Analysis Dataset for Efficacy','adeff2':'adeff2 - Analysis Dataset for Efficacy (Part 2)','adeff3':'adeff3 - Analysis Dataset for Efficacy (Part 3)','adex':'adex - Analysis Dataset for Exposure','adfacevd':'adfacevd - Analysis Dataset for Findings About COVID-19 Events/Disease','adis':'adis - Analysis Dataset for Immunogenicity','adlb':'adlb - Analysis Dataset for Laboratory Tests','admb':'admb - Analysis Dataset for Microbiology','admh':'admh - Analysis Dataset for Medical History','adsl':'adsl - Subject-Level Analysis Dataset','adslsf':'adslsf - Subject-Level Analysis Dataset (Safety)','adsymp':'adsymp - Analysis Dataset for Symptoms','adsympt':'adsympt - Analysis Dataset for Symptoms','adtte':'adtte - Analysis Dataset for Time-to-Event','adttea':'adttea - Analysis Dataset for Time-to-Event (Analysis A)','adtteb':'adtteb - Analysis Dataset for Time-to-Event (Analysis B)','adttre':'adttre - Analysis Dataset for Time-to-Event Response','adttre2':'adttre2 - Analysis Dataset for Time-to-Event Response (Part 2)','adva':'adva - Analysis Dataset for Vaccine Administration','advs':'advs - Analysis Dataset for Vital Signs','ae':'ae - Adverse Events','ce':'ce - Clinical Events','clinsite':'clinsite - Clinical Site','cm':'cm - Concomitant Medications','co':'co - Comments','dd':'dd - Death Details','di':'di - Device Identification','dm':'dm - Demographics','ds':'ds - Disposition','dv':'dv - Protocol Deviations','ec':'ec - Exposure as Collected','eg':'eg - ECG Test Results','er':'er - External Reference','ex':'ex - Exposure','faae':'faae - Findings About Adverse Events','face':'face - Findings About Clinical Events','faef':'faef - Findings About Efficacy','faho':'faho - Findings About Healthcare Organization','faot':'faot - Findings About Other','ho':'ho - Healthcare Organization','ie':'ie - Inclusion/Exclusion Criteria','is':'is - Immunogenicity Specimen','lb':'lb - Laboratory Test Results','mb':'mb - Microbiology Specimen','mh':'mh - Medical History','mo':'mo - Morphology','pe':'pe - Physical Examination','pr':'pr - Procedures','relrec':'relrec - Related Records','rp':'rp - Reproductive System Findings','se':'se - Subject Elements','sv':'sv - Subject Visits','ta':'ta - Trial Arms','te':'te - Trial Elements','ti':'ti - Trial Inclusion/Exclusion Criteria','ts':'ts - Trial Summary','tv':'tv - Trial Visits','vs':'vs - Vital Signs','xa':'xa - Custom Domain','xm':'xm - Custom Miscellaneous','xq':'xq - Viral Sequencing','supp':'supp - Supplemental Qualifiers (General)','suppae':'suppae - Supplemental Qualifiers for AE','suppce':'suppce - Supplemental Qualifiers for CE','suppcm':'suppcm - Supplemental Qualifiers for CM','suppdm':'suppdm - Supplemental Qualifiers for DM','suppds':'suppds - Supplemental Qualifiers for DS','suppdv':'suppdv - Supplemental Qualifiers for DV','suppec':'suppec - Supplemental Qualifiers for EC','suppeg':'suppeg - Supplemental Qualifiers for EG','suppex':'suppex - Supplemental Qualifiers for EX','suppfaae':'suppfaae - Supplemental Qualifiers for FAAE','suppface':'suppface - Supplemental Qualifiers for FACE','suppfaot':'suppfaot - Supplemental Qualifiers for FAOT','suppho':'suppho - Supplemental Qualifiers for HO','suppie':'suppie - Supplemental Qualifiers for IE','suppis':'suppis - Supplemental Qualifiers for IS','supplb':'supplb - Supplemental Qualifiers for LB','suppmb':'suppmb - Supplemental Qualifiers for MB','suppmh':'suppmh - Supplemental Qualifiers for MH','suppmo':'suppmo - Supplemental Qualifiers for MO','supppe':'supppe - Supplemental Qualifiers for PE','supppr':'supppr - Supplemental Qualifiers for PR','supprp':'supprp - Supplemental Qualifiers for RP','suppvs':'suppvs - Supplemental Qualifiers for VS','suppxa':'suppxa - Supplemental Qualifiers for XA','ve':'ve - Vaccine Events','suppve':'suppve - Supplemental Qualifiers for VE','supper':'supper - Supplemental Qualifiers for ER','suppfaef':'suppfaef - Supplemental Qualifiers for FAEF','suppsc':'suppsc - Supplemental Qualifiers for SC','suppsv':'suppsv - Supplemental Qualifiers for SV','suppxm':'suppxm - Supplemental Qualifiers for XM','suppxq':'suppxq - Supplemental Qualifiers for XQ','adxb':'adxb - Analysis Dataset for Viral Sequencing','xb':'xb - Viral Sequencing'
+};domainFilter.innerHTML='<option value="all">All Domains</option>';const domainsWithCounts=Object.keys(domainCounts).sort();const adamDomains=[];const sdtmDomains=[];const suppDomains=[];domainsWithCounts.forEach(domain=>{if(domain.startsWith('ad')){adamDomains.push(domain);}else if(domain.startsWith('supp')){suppDomains.push(domain);}else{sdtmDomains.push(domain);}
+});if(adamDomains.length>0){const adamGroup=document.createElement('optgroup');adamGroup.label='ADaM (Analysis) Datasets';adamDomains.forEach(domain=>{const option=document.createElement('option');option.value=domain;const label=domainDefinitions[domain]||`${domain} - ${domain.toUpperCase()}`;option.textContent=`${label} (${domainCounts[domain]})`;adamGroup.appendChild(option);});domainFilter.appendChild(adamGroup);}
+if(sdtmDomains.length>0){const sdtmGroup=document.createElement('optgroup');sdtmGroup.label='SDTM Domains';sdtmDomains.forEach(domain=>{const option=document.createElement('option');option.value=domain;const label=domainDefinitions[domain]||`${domain} - ${domain.toUpperCase()}`;option.textContent=`${label} (${domainCounts[domain]})`;sdtmGroup.appendChild(option);});domainFilter.appendChild(sdtmGroup);}
+if(suppDomains.length>0){const suppGroup=document.createElement('optgroup');suppGroup.label='Supplemental Qualifier Datasets';suppDomains.forEach(domain=>{const option=document.createElement('option');option.value=domain;const label=domainDefinitions[domain]||`${domain} - ${domain.toUpperCase()}`;option.textContent=`${label} (${domainCounts[domain]})`;suppGroup.appendChild(option);});domainFilter.appendChild(suppGroup);}
+if(currentDomainValue&&domainFilter.querySelector(`option[value="${currentDomainValue}"]`)){domainFilter.value=currentDomainValue;}else{domainFilter.value='all';}
+}else{const domainFilter=document.getElementById('domainFilter');const currentDomainValue=domainFilter.value;domainFilter.querySelectorAll('option').forEach(option=>{const value=option.value;const originalText=option.textContent.split(' (')[0];if(value==='all'){option.textContent='All Domains';}else if(currentDomainValue==='all'&&domainCounts[value]){option.textContent=`${originalText} (${domainCounts[value]})`;}else{option.textContent=originalText;}
+});}
+}
+document.addEventListener('click',function(e){if(e.target.id==='clearAllFilters'||e.target.parentElement?.id==='clearAllFilters'){clearAllFilters();processData();}
+});function decodeTaggedFiles(compact){const columns=compact.fields.map(name=>[name,compact.columns[name]]);const documents=new Array(compact.count);for(let i=0;i<compact.count;i++){const doc={};for(const[name,column]of columns){if(column.type==='raw'){doc[name]=column.values[i];}else if(column.type==='dict'){const code=column.codes[i];if(code>=0)doc[name]=column.values[code];}else if(column.type==='list'){const codes=column.codes[i];if(codes)doc[name]=codes.map(code=>column.values[code]);}else if(column.type==='template'){const[prefix,suffix]=column.templates[column.codes[i]];doc[name]=prefix+column.ids[i]+suffix;}
+}
+documents[i]=doc;}
+return Object.assign({documents:documents},compact.extras);}
+async function loadTaggedFiles(baseName){try{const response=await fetch(baseName+'.compact.json');if(response.ok){const compact=await response.json();facetCounts=compact.facets||null;dataSource=compact.source||null;return decodeTaggedFiles(compact);}
+}catch(error){console.warn('Compact data unavailable, loading full JSON:',error);}
+const response=await fetch(baseName+'.json');return response.ok?response.json():null;}
+function documentRow(doc){let docType=doc.documentType||'Unknown';if(docType.toLowerCase()==='slip sheet'||
+docType.toLowerCase()==='slipsheet'||
+docType.toLowerCase()==='foia redaction slip sheet'){docType='FOIA Redaction Slipsheet';}
+return{filename:doc.filename,title:doc.title,date:doc.date,google_drive_link:doc.googleDriveLink,folder:doc.folder,file_type:doc.fileType,page_count:doc.pageCount.toString(),module:doc.module,documentType:docType,vaccineCandidate:doc.vaccineCandidate,clinicalTrial:doc.clinicalTrial,people_mentioned:doc.peopleMentioned.join(', '),tags:doc.tags.join(', '),has_exemption:doc.hasExemption?'True':'False',has_exclusion:doc.hasExclusion?'True':'False',password_protected:doc.passwordProtected?'True':'False',processed:doc.processed?'True':'False'
+};}
+async function loadShardManifest(baseName){try{const response=await fetch(baseName+'.shards/manifest.json');if(!response.ok){return false;}
+shardManifest=await response.json();shardManifest.baseName=baseName;shardRows=new Array(shardManifest.count);facetCounts=shardManifest.facets;dataSource=shardManifest.source;return true;}catch(error){console.warn('Shard manifest unavailable, loading the whole file:',error);return false;}
+}
+async function loadShardFacetCounts(){try{const response=await fetch(shardManifest.baseName+'.shards/facets.json');if(response.ok){const data=await response.json();if(data.source===dataSource){facetCounts=data.facets;}
+}
+}catch(error){console.warn('Single-filter counts unavailable, counting on the page:',error);}
+}
+function corpusSize(){return shardManifest?shardManifest.count:csvData.length;}
+function shardsFor(filters){return shardManifest.shards.filter(shard=>Object.entries(filters).every(([facet,value])=>{if(value==='all'){return true;}
+const index=shardManifest.values[facet].indexOf(value);return index<0||shard.matches[facet].includes(index);}));}
+function loadShard(shard){if(!shardLoads.has(shard.file)){const url=`${shardManifest.baseName}.shards/${shard.file}`;shardLoads.set(shard.file,fetch(url)
+.then(response=>{if(!response.ok){throw new Error(`${url}: ${response.status}`);}
+return response.json();})
+.then(data=>addShard(shard,data))
+.catch(error=>{shardLoads.delete(shard.file);throw error;}));}
+return shardLoads.get(shard.file);}
+function addShard(shard,data){if(shard.loaded){return;}
+const documents=decodeTaggedFiles(data).documents;const words=decodeBitmap(data.ordinals,shardManifest.count);let i=0;for(let w=0;w<words.length;w++){let word=words[w];while(word!==0){shardRows[(w<<5)+31-Math.clz32(word&-word)]=documentRow(documents[i]);documents[i].tags.forEach(tag=>shardTags.add(tag));i++;word&=word-1;}
+}
+shard.loaded=true;csvData=shardRows.filter(row=>row);if(csvData.length===shardManifest.count){allShardsLoaded();}
+}
+function allShardsLoaded(){allUniqueTags=Array.from(shardTags).sort();loadBitmapIndex(shardManifest.baseName);loadSearchIndex(shardManifest.baseName);}
+function loadWholeCorpus(){if(!corpusLoad){corpusLoad=loadTaggedFiles(shardManifest.baseName)
+.then(data=>{if(!data){throw new Error('Failed to load data');}
+shardRows=data.documents.map(documentRow);data.documents.forEach(doc=>doc.tags.forEach(tag=>shardTags.add(tag)));shardManifest.shards.forEach(shard=>{shard.loaded=true;});csvData=shardRows.slice();allShardsLoaded();})
+.catch(error=>{corpusLoad=null;throw error;});}
+return corpusLoad;}
+function shardsLoaded(filters){const missing=shardsFor(filters).filter(shard=>!shard.loaded);if(missing.length===0){return true;}
+const load=missing.length===shardManifest.shards.length
+?loadWholeCorpus()
+:Promise.all(missing.map(loadShard));load.then(processData).catch(error=>{console.error('Error loading data:',error);const container=document.getElementById('loading-container');container.innerHTML=
+'<p style="color: #d32f2f;">Error loading data. Please check that '+navigatorConfig.corpusBase+
+'.shards/ is complete.</p>';container.style.display='';});return false;}
+async function loadNearDuplicates(){try{const response=await fetch('near-duplicates.json');if(response.ok){nearDuplicates=(await response.json()).neighbors;}
+}catch(error){console.warn('Near-duplicate index unavailable:',error);}
+}
+function escapeHtml(text){return String(text).replace(/[&<>"]/g,c=>({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;'})[c]);}
+function otherVersionsHtml(file){const fileId=(String(file.google_drive_link||'').split('/d/')[1]||'').split(/[/?]/)[0];const versions=nearDuplicates&&fileId&&Object.prototype.hasOwnProperty.call(nearDuplicates,fileId)
+?nearDuplicates[fileId]:[];if(versions.length===0){return'';}
+return`
+                <div class="tag-popup-versions">
+                    <strong>Other versions</strong>
+                    ${versions.map(version=>`
+                        <a href="${escapeHtml(version.googleDriveLink)}" target="_blank" rel="noopener noreferrer">${escapeHtml(version.filename)}</a>
+                        <span class="version-detail">${escapeHtml(version.corpus)}, ${version.distance===0?'same text':'minor differences'}</span>
+                    `).join('')}
+                </div>
+            `;}
+window.addEventListener('DOMContentLoaded',async function(){try{if(await loadShardManifest(navigatorConfig.corpusBase)){document.getElementById('loading-container').style.display='none';updateFilterCounts();initializeTagSearch([]);processData();loadShardFacetCounts();loadNearDuplicates();return;}
+const data=await loadTaggedFiles(navigatorConfig.corpusBase);if(data){csvData=data.documents.map(documentRow);document.getElementById('loading-container').style.display='none';updateFilterCounts();initializeTagSearch(data.documents);processData();loadBitmapIndex(navigatorConfig.corpusBase);loadSearchIndex(navigatorConfig.corpusBase);loadNearDuplicates();}else{throw new Error('Failed to load data');}
+}catch(error){console.error('Error loading data:',error);document.getElementById('loading-container').innerHTML=
+'<p style="color: #d32f2f;">Error loading data. Please check that '+navigatorConfig.corpusBase+
+'.json exists.</p>';}
+});function getFileExtension(filename){const parts=filename.split('.');if(parts.length>1){return parts[parts.length-1].toLowerCase();}
+return'other';}
+function extractDomain(filename){if(filename.toLowerCase().endsWith('-sas.pdf')){return'sas';}
+if(modernaProfile&&!filename.toLowerCase().endsWith('.xpt')){return null;}
+const nameWithoutExt=filename.replace(/\.[^/.]+$/,'');const parts=nameWithoutExt.split(modernaProfile?'_':'-');if(parts.length>1){const lastPart=parts[parts.length-1].toLowerCase();if(lastPart.match(modernaProfile? /^(ad[a-z0-9]+|supp[a-z]+|[a-z]{2,})$/ : /^(ad[a-z]+|supp[a-z]+|[a-z]{2,})$/)){return lastPart;}
+}
+return null;}
+function initializeTagSearch(documents){const tagSet=new Set();documents.forEach(doc=>{doc.tags.forEach(tag=>tagSet.add(tag));});allUniqueTags=Array.from(tagSet).sort();const searchInput=document.getElementById('tagSearchInput');const dropdown=document.getElementById('tagDropdown');const container=document.getElementById('tagSearchContainer');searchInput.addEventListener('input',handleTagSearch);searchInput.addEventListener('focus',handleTagFocus);searchInput.addEventListener('keydown',handleTagKeydown);document.addEventListener('click',(e)=>{if(!container.contains(e.target)){hideTagDropdown();}
+});}
+function handleTagFocus(){const input=document.getElementById('tagSearchInput');if(input.value.trim()===''){showAvailableTags();}
+}
+function availableTags(){if(availableTagsCache.rows!==filteredFileData){let tags=allUniqueTags;if(filteredFileData!==csvData){const tagSet=new Set();filteredFileData.forEach(file=>{if(file.tags){file.tags.split(', ').forEach(tag=>{if(tag){tagSet.add(tag);}
+});}
+});tags=Array.from(tagSet).sort();}
+availableTagsCache={rows:filteredFileData,tags:tags};}
+return availableTagsCache.tags;}
+function showAvailableTags(){const tags=availableTags().filter(tag=>!selectedTags.has(tag));if(tags.length>0){renderTagDropdown(tags,'');showTagDropdown();}
+}
+function handleTagSearch(e){const query=e.target.value.toLowerCase().trim();const dropdown=document.getElementById('tagDropdown');if(query===''){hideTagDropdown();return;}
+const filtered=availableTags().filter(tag=>
+tag.toLowerCase().includes(query)&&!selectedTags.has(tag)
+);renderTagDropdown(filtered,query);showTagDropdown();}
+function renderTagDropdown(tags,query){const dropdown=document.getElementById('tagDropdown');dropdown.innerHTML='';if(tags.length===0){dropdown.innerHTML='<div class="tag-dropdown-empty">No matching tags found</div>';return;}
+const header=document.createElement('div');header.className='tag-dropdown-header';const scrollHint=tags.length>10?' (scroll for more)':'';header.innerHTML=`
+                ${tags.length} matching tags${scrollHint}
+                ${selectedTags.size>0?'<span class="tag-clear-all" onclick="clearAllTags()">Clear all</span>':''}
+            `;dropdown.appendChild(header);tags.forEach((tag,index)=>{const item=document.createElement('div');item.className='tag-dropdown-item';item.dataset.tag=tag;item.dataset.index=index;const highlighted=highlightMatch(tag,query);item.innerHTML=highlighted;item.addEventListener('click',()=>selectTag(tag));dropdown.appendChild(item);});tagSearchFocusIndex=-1;}
+function highlightMatch(text,query){if(!query)return text;const regex=new RegExp(`(${escapeRegExp(query)})`,'gi');return text.replace(regex,'<mark>$1</mark>');}
+function escapeRegExp(string){return string.replace(/[.*+?^${}()|[\\]\\\\]/g,'\\\\$&');}
+function selectTag(tag){selectedTags.add(tag);renderSelectedTags();document.getElementById('tagSearchInput').value='';hideTagDropdown();processData();}
+function removeTag(tag){selectedTags.delete(tag);renderSelectedTags();processData();}
+function clearAllTags(){selectedTags.clear();renderSelectedTags();hideTagDropdown();processData();}
+function toggleDocumentTypeSort(){const documentTypeFilter=document.getElementById('documentTypeFilter');const currentSelection=documentTypeFilter.value;const wasOpen=document.activeElement===documentTypeFilter;documentTypeSortMode=documentTypeSortMode==='count'?'alpha':'count';const button=document.getElementById('documentTypeSortToggle');const icon=button.querySelector('i');if(documentTypeSortMode==='count'){icon.className='fas fa-sort-amount-down';button.title='Currently sorted by count (click to sort A-Z)';}else{icon.className='fas fa-sort-alpha-down';button.title='Currently sorted A-Z (click to sort by count)';}
+button.classList.add('animating');setTimeout(()=>button.classList.remove('animating'),200);updateFilterCounts();if(currentSelection&&documentTypeFilter.querySelector(`option[value="${currentSelection}"]`)){documentTypeFilter.value=currentSelection;}
+if(wasOpen){setTimeout(()=>{documentTypeFilter.focus();},10);}
+}
+function clearAllFilters(){document.querySelectorAll('#fileTypeFilters .file-type-button').forEach(btn=>{btn.classList.remove('active');});document.querySelector('#fileTypeFilters .file-type-button[data-filter="all"]').classList.add('active');document.querySelectorAll('#moduleFilters .filter-button').forEach(btn=>{btn.classList.remove('active');});document.querySelector('#moduleFilters .filter-button[data-filter="all"]').classList.add('active');if(folderButtons){document.querySelectorAll('#folderFilters .filter-button').forEach(btn=>{btn.classList.remove('active');});document.querySelector('#folderFilters .filter-button[data-filter="all"]').classList.add('active');}else{document.getElementById('folderFilter').value='all';}
+document.getElementById('domainFilter').value='all';document.getElementById('documentTypeFilter').value='all';document.getElementById('vaccineCandidateFilter').value='all';document.getElementById('clinicalTrialFilter').value='all';document.getElementById('documentSearchInput').value='';searchSequence++;searchQuery='';searchScores=null;if(sortColumn==='relevance'){sortColumn='filename';sortDirection='asc';}
+selectedTags.clear();renderSelectedTags();hideTagDropdown();}
+function renderSelectedTags(){const container=document.getElementById('selectedTags');container.innerHTML='';selectedTags.forEach(tag=>{const chip=document.createElement('div');chip.className='tag-chip';chip.innerHTML=`
+                    ${tag}
+                    <button class="tag-chip-remove" onclick="removeTag('${tag.replace(/'/g,"\\\\'")}')" title="Remove tag">
+                        ×
+                    </button>
+                `;container.appendChild(chip);});}
+function showTagDropdown(){const dropdown=document.getElementById('tagDropdown');dropdown.classList.add('active');}
+function hideTagDropdown(){const dropdown=document.getElementById('tagDropdown');dropdown.classList.remove('active');tagSearchFocusIndex=-1;updateDropdownFocus();}
+function handleTagKeydown(e){const dropdown=document.getElementById('tagDropdown');const items=dropdown.querySelectorAll('.tag-dropdown-item');if(!dropdown.classList.contains('active')||items.length===0){return;}
+switch(e.key){case'ArrowDown':
+e.preventDefault();tagSearchFocusIndex=Math.min(tagSearchFocusIndex+1,items.length-1);updateDropdownFocus();break;case'ArrowUp':
+e.preventDefault();tagSearchFocusIndex=Math.max(tagSearchFocusIndex-1,-1);updateDropdownFocus();break;case'Enter':
+e.preventDefault();if(tagSearchFocusIndex>=0){const focusedItem=items[tagSearchFocusIndex];selectTag(focusedItem.dataset.tag);}
+break;case'Escape':
+e.preventDefault();hideTagDropdown();e.target.blur();break;}
+}
+function updateDropdownFocus(){const dropdown=document.getElementById('tagDropdown');const items=dropdown.querySelectorAll('.tag-dropdown-item');items.forEach((item,index)=>{if(index===tagSearchFocusIndex){item.classList.add('focused');item.scrollIntoView({block:'nearest'});}else{item.classList.remove('focused');}
+});}
+async function loadBitmapIndex(baseName){try{const response=await fetch(baseName+'.bitmaps.json');if(!response.ok){return;}
+const index=await response.json();if(index.source&&index.source===dataSource&&index.count===csvData.length){bitmapCache.clear();bitmapIndex=index;}
+}catch(error){console.warn('Bitmap index unavailable, filtering by scan:',error);}
+}
+function decodeBitmap(encoded,size){const bytes=Uint8Array.from(atob(encoded),c=>c.charCodeAt(0));const view=new DataView(bytes.buffer);const words=new Uint32Array(Math.ceil(size / 32));let pos=0;while(pos<bytes.length){const base=view.getUint16(pos,true)*65536;const type=view.getUint8(pos+2);const n=view.getUint16(pos+3,true);pos+=5;if(type===0){for(let k=0;k<n;k++,pos+=2){const i=base+view.getUint16(pos,true);words[i>>5]|=1<<(i&31);}
+}else if(type===1){for(let k=0;k<n;k++,pos+=4){words[(base>>5)+k]=view.getUint32(pos,true);}
+}else{for(let k=0;k<n;k++,pos+=4){const start=base+view.getUint16(pos,true);const end=start+view.getUint16(pos+2,true);for(let i=start;i<=end;i++){words[i>>5]|=1<<(i&31);}
+}
+}
+}
+return words;}
+function indexBitmap(facet,value){const bitmaps=facet==='tags'?bitmapIndex.tags:bitmapIndex.facets[facet];if(!bitmaps||!Object.prototype.hasOwnProperty.call(bitmaps,value)){return null;}
+const key=facet+'\u0000'+value;if(!bitmapCache.has(key)){bitmapCache.set(key,decodeBitmap(bitmaps[value],csvData.length));}
+return bitmapCache.get(key);}
+function filterRowsByBitmapIndex(filters){if(!bitmapIndex){return null;}
+const bitmaps=Object.entries(filters)
+.filter(([facet,value])=>value!=='all')
+.map(([facet,value])=>indexBitmap(facet,value));selectedTags.forEach(tag=>bitmaps.push(indexBitmap('tags',tag)));if(bitmaps.includes(null)){return null;}
+if(bitmaps.length===0){return csvData;}
+const words=Uint32Array.from(bitmaps[0]);for(let b=1;b<bitmaps.length;b++){for(let w=0;w<words.length;w++){words[w]&=bitmaps[b][w];}
+}
+const rows=[];for(let w=0;w<words.length;w++){let word=words[w];while(word!==0){rows.push(csvData[(w<<5)+31-Math.clz32(word&-word)]);word&=word-1;}
+}
+return rows;}
+function filterRowsByScan({fileType:fileTypeFilter,domain:domainFilter,folder:folderFilter,module:moduleFilter,documentType:documentTypeFilter,vaccineCandidate:vaccineCandidateFilter,clinicalTrial:clinicalTrialFilter
+}){let filteredData=csvData;if(fileTypeFilter!=='all'){if(modernaProfile){filteredData=filteredData.filter(row=>{const fileType=row.file_type?row.file_type.toLowerCase():null;if(fileType){if(fileTypeFilter==='excel'){return fileType==='xls'||fileType==='xlsx';}
+return fileType===fileTypeFilter;}else{if(fileTypeFilter==='sas'){return row.filename.toLowerCase().endsWith('-sas.pdf');}else if(fileTypeFilter==='excel'){const ext=getFileExtension(row.filename);return ext==='xls'||ext==='xlsx';}else{const ext=getFileExtension(row.filename);return ext===fileTypeFilter;}
+}
+});}else{if(fileTypeFilter==='sas'){filteredData=filteredData.filter(row=>
+row.filename.toLowerCase().endsWith('-sas.pdf')
+);}else if(fileTypeFilter==='word'){filteredData=filteredData.filter(row=>{const ext=getFileExtension(row.filename);return ext==='doc'||ext==='docx';});}else{filteredData=filteredData.filter(row=>
+getFileExtension(row.filename)===fileTypeFilter
+);}
+}
+}
+if(domainFilter!=='all'){filteredData=filteredData.filter(row=>{const domain=extractDomain(row.filename);return domain===domainFilter;});}
+if(folderFilter!=='all'){filteredData=filteredData.filter(row=>row.folder===folderFilter);}
+if(moduleFilter!=='all'){if(moduleFilter==='none'){filteredData=filteredData.filter(row=>!row.module||row.module===''||row.module===null);}else{filteredData=filteredData.filter(row=>{const rowModule=row.module?row.module.trim():'';return rowModule===moduleFilter;});}
+}
+if(documentTypeFilter!=='all'){filteredData=filteredData.filter(row=>row.documentType===documentTypeFilter);}
+if(vaccineCandidateFilter!=='all'){filteredData=filteredData.filter(row=>{const candidates=row.vaccineCandidate;if(Array.isArray(candidates)){return candidates.includes(vaccineCandidateFilter);}else if(candidates){return candidates===vaccineCandidateFilter;}else{return vaccineCandidateFilter==='None';}
+});}
+if(clinicalTrialFilter!=='all'){filteredData=filteredData.filter(row=>{const trial=row.clinicalTrial||'None';return trial===clinicalTrialFilter;});}
+if(selectedTags.size>0){console.log('Selected tags:',Array.from(selectedTags));filteredData=filteredData.filter(row=>{const rowTags=row.tags.split(', ').filter(t=>t.trim());const hasAllTags=Array.from(selectedTags).every(tag=>rowTags.includes(tag));return hasAllTags;});console.log('After tag filter (AND logic):',filteredData.length,'files');}
+return filteredData;}
+async function loadSearchIndex(baseName){try{const response=await fetch(baseName+'.search/index.json');if(!response.ok){return;}
+const index=await response.json();if(index.source&&index.source===dataSource&&index.count===csvData.length){searchIndex=Object.assign({baseName:baseName},index);allUniqueTags=index.tags.map(([tag])=>tag);availableTagsCache={rows:null,tags:[]};document.getElementById('documentSearchInput').addEventListener('input',handleDocumentSearch);document.getElementById('documentSearchSection').style.display='block';}
+}catch(error){console.warn('Search index unavailable:',error);}
+}
+function tokenize(text){return text.toLowerCase().match(/[\p{L}\p{N}]+/gu)||[];}
+function searchShard(token){const shard= /^[a-z0-9]/.test(token)?token[0]:'_';if(!searchIndex.shards[shard]){return Promise.resolve({tokens:[],postings:[]});}
+if(!searchShards.has(shard)){const request=fetch(`${searchIndex.baseName}.search/${shard}.json`).then(response=>{if(!response.ok){throw new Error(`Search shard ${shard} not available`);}
+return response.json();});request.catch(()=>searchShards.delete(shard));searchShards.set(shard,request);}
+return searchShards.get(shard);}
+async function searchDocuments(query){const words=Array.from(new Set(tokenize(query)));const shards=await Promise.all(words.map(searchShard));let scores=null;words.forEach((word,w)=>{const{tokens,postings}=shards[w];let lo=0;let hi=tokens.length;while(lo<hi){const mid=(lo+hi)>>1;if(tokens[mid]<word){lo=mid+1;}else{hi=mid;}
+}
+const wordScores=new Map();for(let t=lo;t<tokens.length&&tokens[t].startsWith(word);t++){const list=postings[t];const rarity=Math.log(1+searchIndex.count / (list.length / 2));const weight=tokens[t]===word?rarity:rarity / 2;let ordinal=0;for(let p=0;p<list.length;p+=2){ordinal+=list[p];const score=list[p+1]*weight;if(score>(wordScores.get(ordinal)||0)){wordScores.set(ordinal,score);}
+}
+}
+if(scores===null){scores=wordScores;}else{const combined=new Map();wordScores.forEach((score,ordinal)=>{if(scores.has(ordinal)){combined.set(ordinal,scores.get(ordinal)+score);}
+});scores=combined;}
+});return scores||new Map();}
+async function handleDocumentSearch(e){const query=e.target.value.trim();const sequence=++searchSequence;let scores=null;if(tokenize(query).length>0){try{scores=await searchDocuments(query);}catch(error){console.warn('Search failed:',error);return;}
+}
+if(sequence!==searchSequence){return;}
+searchQuery=scores?query:'';searchScores=scores?new Map(Array.from(scores,([ordinal,score])=>[csvData[ordinal],score])):null;if(searchScores&&sortColumn!=='relevance'){sortColumn='relevance';}else if(!searchScores&&sortColumn==='relevance'){sortColumn='filename';sortDirection='asc';}
+processData();}
+function activeFolderFilter(){return folderButtons
+?document.querySelector('#folderFilters .filter-button.active').dataset.filter
+:document.getElementById('folderFilter').value;}
+function processData(){const fileTypeFilter=document.querySelector('#fileTypeFilters .file-type-button.active').dataset.filter;const domainFilter=document.getElementById('domainFilter').value;const folderFilter=activeFolderFilter();const moduleFilter=document.querySelector('#moduleFilters .filter-button.active').dataset.filter;const documentTypeFilter=document.getElementById('documentTypeFilter').value;const vaccineCandidateFilter=document.getElementById('vaccineCandidateFilter').value;const clinicalTrialFilter=document.getElementById('clinicalTrialFilter').value;const filters={fileType:fileTypeFilter,domain:domainFilter,folder:folderFilter,module:moduleFilter,documentType:documentTypeFilter,vaccineCandidate:vaccineCandidateFilter,clinicalTrial:clinicalTrialFilter
+};if(shardManifest&&!shardsLoaded(filters)){document.getElementById('stats').textContent='Loading documents...';return;}
+let filteredData=filterRowsByBitmapIndex(filters)||filterRowsByScan(filters);if(searchScores){filteredData=filteredData
+.filter(row=>searchScores.has(row))
+.sort((a,b)=>searchScores.get(b)-searchScores.get(a));}
+const acronyms=new Set([
+'FDA','EUA','CBER','CDC','CRO','WHO','NIH','NIEHS','CIOMS','VAERS','BIMO','GLP','GMP','CMC','OCBQ/DMPQ/MRBI','CBER/OVRR/DVP/LDV','COVID-19','COVID','SARS-COV-2','SARS-COV','MERS-COV','CRF','ECRF','RNA','MRNA','DNA','ADSL','ADAE','ADVA','ADCEVD','CDISC','SAS','SDTM','RT-PCR','PCR','NAAT','BMI','ECG','THC','HEK293T','BALB/C','GS1','NDC','BNT162B2','BNT162B1','BNT162','IND','PF-07302048','C4591001','M1','M2','M3','M4','M5','M6','ALC-0315','ALC-0159','DSPC','ACE2','DPP4','RBD','VRBPAC','VAED','MIS','EVALI','RSV','FI-RSV','ACTIV','BARDA','DART','GMFR','AAI','ISARIC','CEPI','MCDC','SBU','FOIA','LNP','PEG','TMPRSS2','ICOS','MTB','NEPA','CEQ','OVRR','IB','PVP','QC','US','PMG','R&D','USA','UK','EU/EEA','ECDC','RS','CY','LPT','SUNY','VA','USPHS','CMI','ID','OVRR/DVP/LDV','RELREC'
+]);function standardizeTag(tag){let result=tag;const replacements={'fda':'FDA','eua':'EUA','ace2':'ACE2','qc':'QC','crf':'CRF','crfs':'CRFs','mrna':'mRNA','mcdc':'MCDC','covid':'COVID','sars':'SARS','mers':'MERS','cov':'CoV','pcr':'PCR','rna':'RNA','dna':'DNA','ecrf':'eCRF','crfs':'CRFs',};Object.entries(replacements).forEach(([key,value])=>{const regex=new RegExp(`\\b${key}\\b`,'gi');result=result.replace(regex,value);});const upperTag=tag.toUpperCase();for(let acronym of acronyms){if(upperTag===acronym.toUpperCase()){return acronym;}
+}
+if(result.includes('-')){result=result.split('-').map(part=>{const lowerPart=part.toLowerCase();if(replacements[lowerPart]){return replacements[lowerPart];}
+return part.charAt(0).toUpperCase()+part.slice(1).toLowerCase();}).join('-');}else{const words=result.split(' ');result=words.map(word=>{if(word.length>1&&word===word.toUpperCase()){return word;}
+return word.charAt(0).toUpperCase()+word.slice(1).toLowerCase();}).join(' ');}
+return result;}
+const tagMap=new Map();const allExtensions=new Set();filteredData.forEach(row=>{if(row.tags){const tags=row.tags.split(',').map(tag=>tag.trim());const extension=getFileExtension(row.filename);allExtensions.add(extension);tags.forEach(tag=>{if(tag){const standardizedTag=standardizeTag(tag);if(!tagMap.has(standardizedTag)){tagMap.set(standardizedTag,{count:0,files:[],extensionCounts:{}
+});}
+const tagData=tagMap.get(standardizedTag);tagData.count++;tagData.files.push({filename:row.filename,link:row.google_drive_link,title:row.title||row.filename,extension:extension
+});if(!tagData.extensionCounts[extension]){tagData.extensionCounts[extension]=0;}
+tagData.extensionCounts[extension]++;}
+});}
+});const tagArray=Array.from(tagMap.entries())
+.map(([tag,data])=>({tag:tag,count:data.count,files:data.files,extensionCounts:data.extensionCounts
+}))
+.sort((a,b)=>{if(b.count!==a.count){return b.count-a.count;}
+return a.tag.localeCompare(b.tag);});currentData=tagArray;updateFilterCountsFromFilteredData(filteredData);const statsDiv=document.getElementById('stats');statsDiv.innerHTML=`${filteredData.length} files displayed`;document.getElementById('controls').style.display='block';if(currentView==='file-list'){document.querySelector('.sort-controls').style.display='none';}
+filteredFileData=filteredData;updateFilterCountsFromFilteredData(filteredData);if(currentView==='file-list'){renderFileList();}else{createChart(tagArray);}
+}
+function createLegend(extensions){const legendDiv=document.getElementById('legend');legendDiv.style.display='flex';const title=legendDiv.querySelector('.legend-title');legendDiv.innerHTML='';legendDiv.appendChild(title);const sortedExtensions=Array.from(extensions).sort();sortedExtensions.forEach(ext=>{const item=document.createElement('div');item.className='legend-item';const color=document.createElement('div');color.className='legend-color';color.style.backgroundColor=extensionColors[ext]||extensionColors['other'];const text=document.createElement('div');text.className='legend-text';text.textContent=ext.toUpperCase();item.appendChild(color);item.appendChild(text);legendDiv.appendChild(item);});}
+function createChart(data){const container=document.getElementById('chart-container');container.innerHTML='<div class="loading">Creating visualization...</div>';const margin={top:20,right:150,bottom:40,left:250};const barHeight=22;const width=1200;const height=data.length*barHeight+margin.top+margin.bottom;container.innerHTML='';const svg=d3.select('#chart-container')
+.append('svg')
+.attr('width',width)
+.attr('height',height);const g=svg.append('g')
+.attr('transform',`translate(${margin.left},${margin.top})`);const xScale=d3.scaleLinear()
+.domain([0,d3.max(data,d=>d.count)])
+.range([0,width-margin.left-margin.right]);const yScale=d3.scaleBand()
+.domain(data.map(d=>d.tag))
+.range([0,height-margin.top-margin.bottom])
+.padding(0.1);g.append('g')
+.attr('transform',`translate(0,${height-margin.top-margin.bottom})`)
+.call(d3.axisBottom(xScale).ticks(10));g.append('text')
+.attr('x',(width-margin.left-margin.right) / 2)
+.attr('y',height-margin.top-margin.bottom+35)
+.style('text-anchor','middle')
+.style('font-size','14px')
+.text('Number of Files');const yAxis=g.append('g');data.forEach(d=>{yAxis.append('text')
+.attr('x',-10)
+.attr('y',yScale(d.tag)+yScale.bandwidth() / 2)
+.attr('dy','0.35em')
+.attr('text-anchor','end')
+.style('font-size','14px')
+.style('cursor','pointer')
+.style('fill','#333')
+.text(d.tag)
+.on('click',function(event){showTooltipPersistent(event,d);})
+.on('mouseover',function(event){d3.select(this).style('fill','#45a049');if(!tooltipPersistent){showTooltip(event,d);}
+})
+.on('mousemove',function(event){if(!tooltipPersistent){moveTooltip(event);}
+})
+.on('mouseout',function(){d3.select(this).style('fill','#333');if(!tooltipPersistent){hideTooltip();}
+});});const bars=g.selectAll('.bar-group')
+.data(data)
+.enter()
+.append('g')
+.attr('class','bar-group');bars.each(function(d){const group=d3.select(this);let currentX=0;const sortedExtensions=Object.keys(d.extensionCounts).sort();sortedExtensions.forEach(ext=>{const count=d.extensionCounts[ext];const width=xScale(count);group.append('rect')
+.attr('class','bar-segment')
+.attr('x',currentX)
+.attr('y',yScale(d.tag))
+.attr('width',width)
+.attr('height',yScale.bandwidth())
+.attr('fill',extensionColors[ext]||extensionColors['other'])
+.attr('data-extension',ext)
+.attr('data-count',count)
+.on('click',function(event){showTooltipPersistent(event,d);})
+.on('mouseover',function(event){if(!tooltipPersistent){showTooltip(event,d);}
+})
+.on('mousemove',function(event){if(!tooltipPersistent){moveTooltip(event);}
+})
+.on('mouseout',function(){if(!tooltipPersistent){hideTooltip();}
+});currentX+=width;});});bars.append('text')
+.attr('class','bar-count')
+.attr('x',d=>xScale(d.count)+5)
+.attr('y',d=>yScale(d.tag)+yScale.bandwidth() / 2)
+.attr('dy','0.35em')
+.text(d=>d.count)
+.style('pointer-events','none');}
+function showTooltip(event,d){if(tooltipPersistent)return;const fileLinks=d.files
+.map(file=>`<a href="${file.link}" target="_blank">${file.filename}</a>`)
+.join('<br>');tooltip
+.classed('persistent',false)
+.style('display','block')
+.html(`
+                    <h4>${d.tag} (${d.count} files)</h4>
+                    ${fileLinks}
+                `);moveTooltip(event);}
+function showTooltipPersistent(event,d){event.stopPropagation();tooltipPersistent=true;const fileLinks=d.files
+.map(file=>`<a href="${file.link}" target="_blank">${file.filename}</a>`)
+.join('<br>');tooltip
+.classed('persistent',true)
+.style('display','block')
+.html(`
+                    <span class="close-btn" onclick="closeTooltip()">×</span>
+                    <h4>${d.tag} (${d.count} files)</h4>
+                    ${fileLinks}
+                `);moveTooltip(event);}
+function closeTooltip(){hideTooltip();tooltipPersistent=false;}
+function moveTooltip(event){const tooltipNode=tooltip.node();const tooltipWidth=tooltipNode.offsetWidth;const tooltipHeight=tooltipNode.offsetHeight;const pageWidth=window.innerWidth;const pageHeight=window.innerHeight;let left=event.pageX+10;let top=event.pageY-10;if(left+tooltipWidth>pageWidth-20){left=event.pageX-tooltipWidth-10;}
+if(top+tooltipHeight>pageHeight+window.scrollY-20){top=event.pageY-tooltipHeight-10;}
+tooltip
+.style('left',left+'px')
+.style('top',top+'px');}
+function hideTooltip(){tooltip
+.style('display','none')
+.classed('persistent',false);}
+let sortedFileData=[];let infiniteScrollObserver=null;function renderFileList(){displayedFiles=0;sortFileData();const container=document.getElementById('file-list-container');container.innerHTML='';renderFileListPage();updateFileListStats();setupInfiniteScroll();}
+function updateFileListStats(){const statsDiv=document.getElementById('stats');if(currentView==='file-list'){const activeFilters=[];const fileTypeFilter=document.querySelector('#fileTypeFilters .file-type-button.active').dataset.filter;if(fileTypeFilter!=='all')activeFilters.push(`Type: ${fileTypeFilter}`);const moduleFilter=document.querySelector('#moduleFilters .filter-button.active').dataset.filter;if(moduleFilter!=='all')activeFilters.push(`Module: ${moduleFilter}`);const folderFilter=activeFolderFilter();if(folderFilter!=='all')activeFilters.push(`Folder: ${folderFilter}`);const domainFilter=document.getElementById('domainFilter').value;if(domainFilter!=='all')activeFilters.push(`Domain: ${domainFilter}`);const documentTypeFilter=document.getElementById('documentTypeFilter').value;if(documentTypeFilter!=='all')activeFilters.push(`Doc Type: ${documentTypeFilter}`);const vaccineCandidateFilter=document.getElementById('vaccineCandidateFilter').value;if(vaccineCandidateFilter!=='all')activeFilters.push(`Vaccine: ${vaccineCandidateFilter}`);const clinicalTrialFilter=document.getElementById('clinicalTrialFilter').value;if(clinicalTrialFilter!=='all')activeFilters.push(`Trial: ${clinicalTrialFilter}`);if(selectedTags.size>0){const tagsList=Array.from(selectedTags);const moduleNames=['M1','M2','M4','M5'];const moduleTags=tagsList.filter(tag=>moduleNames.includes(tag));const otherTags=tagsList.filter(tag=>!moduleNames.includes(tag));if(otherTags.length>0){activeFilters.push(`${otherTags.length} tag${otherTags.length>1?'s':''}`);}
+if(moduleTags.length>0){activeFilters.push(`Module tags: ${moduleTags.join(', ')}`);}
+}
+if(searchScores){activeFilters.push(`Search: "${escapeHtml(searchQuery)}"`);}
+const filterInfo=activeFilters.length>0?` (Filters: ${activeFilters.join(', ')})`:'';statsDiv.innerHTML=`${sortedFileData.length} files displayed${filterInfo}`;const clearButton=document.getElementById('clearAllFilters');if(clearButton){clearButton.style.display=activeFilters.length>0?'inline-flex':'none';}
+}else{const filteredCount=currentData?currentData.reduce((sum,tag)=>sum+tag.files.length,0):0;statsDiv.innerHTML=`${filteredCount} files displayed`;}
+}
+function sortFileData(){let dataToDisplay=filteredFileData;if(sortColumn==='relevance'){sortedFileData=[...dataToDisplay];return;}
+sortedFileData=[...dataToDisplay].sort((a,b)=>{let aVal=a[sortColumn]||'';let bVal=b[sortColumn]||'';if(sortColumn==='pageCount'){aVal=parseInt(aVal)||0;bVal=parseInt(bVal)||0;}
+if(sortDirection==='asc'){return aVal>bVal?1:-1;}else{return aVal<bVal?1:-1;}
+});}
+function renderFileListPage(){const container=document.getElementById('file-list-container');const startIndex=displayedFiles;const endIndex=Math.min(startIndex+filesPerPage,sortedFileData.length);if(displayedFiles===0){container.innerHTML=`
+                    <table class="file-table">
+                        <thead>
+                            <tr>
+                                <th style="width: 20px;"></th>
+                                <th onclick="sortFileList('module')">Module</th>
+                                <th onclick="sortFileList('document_type')">Document Type</th>
+                                <th onclick="sortFileList('filename')">Filename</th>
+                                <th>Tags</th>
+                                <th>Cite</th>
+                            </tr>
+                        </thead>
+                        <tbody id="file-table-body">
+                        </tbody>
+                    </table>
+                `;}
+const tbody=document.getElementById('file-table-body');const fragment=document.createDocumentFragment();for(let i=startIndex;i<endIndex&&i<sortedFileData.length;i++){const file=sortedFileData[i];const row=document.createElement('tr');let color;if(modernaProfile){let fileType;if(file.file_type){fileType=file.file_type.toLowerCase();if(fileType==='xls'||fileType==='xlsx'){fileType='excel';}
+}else{fileType=getFileExtension(file.filename);if(fileType==='xls'||fileType==='xlsx'){fileType='excel';}
+}
+color=extensionColors[fileType]||extensionColors['other'];}else{const ext=getFileExtension(file.filename);color=extensionColors[ext]||extensionColors['other'];}
+row.innerHTML=`
+                    <td><div class="color-bar" style="background-color: ${color};"></div></td>
+                    <td>${file.module||'-'}</td>
+                    <td>${file.documentType||'-'}</td>
+                    <td><a href="${file.google_drive_link}" target="_blank" rel="noopener noreferrer" class="filename-link">${file.filename}</a></td>
+                    <td>
+                        <button class="tags-button" onclick="showTagPopup(event, ${i})" title="View tags" data-color="${color}">
+                            <i class="fa-solid fa-tags"></i>
+                        </button>
+                    </td>
+                    <td>
+                        <button class="cite-button" onclick="showCitationPopup(event, ${i})" data-color="${color}">Cite</button>
+                    </td>
+                `;fragment.appendChild(row);}
+tbody.appendChild(fragment);displayedFiles=endIndex;const loadingIndicator=document.getElementById('loading-indicator');if(displayedFiles<sortedFileData.length){loadingIndicator.style.display='block';}else{loadingIndicator.style.display='none';}
+}
+function setupInfiniteScroll(){if(infiniteScrollObserver){infiniteScrollObserver.disconnect();}
+const loadingIndicator=document.getElementById('loading-indicator');infiniteScrollObserver=new IntersectionObserver((entries)=>{entries.forEach(entry=>{if(entry.isIntersecting&&displayedFiles<sortedFileData.length){renderFileListPage();}
+});},{root:null,rootMargin:'100px',threshold:0.1
+});infiniteScrollObserver.observe(loadingIndicator);}
+function sortFileList(column){if(sortColumn===column){sortDirection=sortDirection==='asc'?'desc':'asc';}else{sortColumn=column;sortDirection='asc';}
+renderFileList();}
+function showTagPopup(event,fileIndex){event.stopPropagation();const button=event.currentTarget;const row=button.closest('tr');const file=sortedFileData[fileIndex];const tags=file.tags?file.tags.split(',').map(t=>t.trim()):[];const isAlreadyActive=button.classList.contains('active');closeCitationPopup();const existingPopup=document.querySelector('.tag-popup');if(existingPopup){existingPopup.remove();}
+document.querySelectorAll('.tags-button.active').forEach(btn=>{btn.classList.remove('active');btn.style.backgroundColor='';btn.style.borderColor='';const icon=btn.querySelector('i');if(icon){icon.style.color='';}
+});document.querySelectorAll('.file-table tr.active-row').forEach(tr=>{tr.classList.remove('active-row');});if(isAlreadyActive){return;}
+button.classList.add('active');const fileColor=button.getAttribute('data-color');if(fileColor){button.style.backgroundColor=fileColor;button.style.borderColor=fileColor;const icon=button.querySelector('i');if(icon){icon.style.color='white';}
+}
+row.classList.add('active-row');const popup=document.createElement('div');popup.className='tag-popup active';const rect=button.getBoundingClientRect();const isMobile=window.innerWidth<=768;if(isMobile){popup.style.position='fixed';popup.style.left='50%';popup.style.transform='translateX(-50%)';popup.style.top='60px';popup.style.width='90%';popup.style.maxWidth='400px';popup.style.maxHeight='calc(100vh - 80px)';popup.style.overflowY='auto';}else{popup.style.right=(window.innerWidth-rect.left+10)+'px';popup.style.top=rect.top+'px';}
+popup.innerHTML=`
+                <div class="tag-popup-header">
+                    <strong>Tags</strong>
+                    <button class="tag-popup-close" onclick="closeTagPopup()">&times;</button>
+                </div>
+                <div class="tag-list">
+                    ${tags.map(tag=>`<span class="tag-item" onclick="addTagFilterFromPopup('${tag}', event)">${tag}</span>`).join('')}
+                </div>
+                ${otherVersionsHtml(file)}
+            `;document.body.appendChild(popup);let isDragging=false;let currentX;let currentY;let initialX;let initialY;let xOffset=0;let yOffset=0;const header=popup.querySelector('.tag-popup-header');header.addEventListener('mousedown',dragStart);document.addEventListener('mousemove',drag);document.addEventListener('mouseup',dragEnd);header.addEventListener('touchstart',dragStart,{passive:false});document.addEventListener('touchmove',drag,{passive:false});document.addEventListener('touchend',dragEnd);function dragStart(e){if(e.target.classList.contains('tag-popup-close'))return;const clientX=e.type.includes('touch')?e.touches[0].clientX:e.clientX;const clientY=e.type.includes('touch')?e.touches[0].clientY:e.clientY;initialX=clientX-xOffset;initialY=clientY-yOffset;if(e.target===header||header.contains(e.target)){isDragging=true;if(isMobile&&popup.style.transform.includes('translateX(-50%)')){const rect=popup.getBoundingClientRect();popup.style.left=rect.left+'px';popup.style.transform='none';}
+}
+}
+function drag(e){if(!isDragging)return;e.preventDefault();const clientX=e.type.includes('touch')?e.touches[0].clientX:e.clientX;const clientY=e.type.includes('touch')?e.touches[0].clientY:e.clientY;currentX=clientX-initialX;currentY=clientY-initialY;xOffset=currentX;yOffset=currentY;popup.style.transform=`translate(${currentX}px, ${currentY}px)`;}
+function dragEnd(e){initialX=currentX;initialY=currentY;isDragging=false;}
+let isClicked=false;button.addEventListener('click',(e)=>{e.stopPropagation();isClicked=true;});document.addEventListener('click',(e)=>{if(!popup.contains(e.target)&&e.target!==button){popup.remove();button.classList.remove('active');button.style.backgroundColor='';button.style.borderColor='';const icon=button.querySelector('i');if(icon){icon.style.color='';}
+}
+});}
+function closeTagPopup(){const popup=document.querySelector('.tag-popup');if(popup){popup.remove();}
+document.querySelectorAll('.tags-button.active').forEach(btn=>{btn.classList.remove('active');btn.style.backgroundColor='';btn.style.borderColor='';const icon=btn.querySelector('i');if(icon){icon.style.color='';}
+});document.querySelectorAll('.file-table tr.active-row').forEach(tr=>{tr.classList.remove('active-row');});}
+function addTagFilter(tag){selectedTags.add(tag);renderSelectedTags();processData();}
+function addTagFilterFromPopup(tag,event){if(event){event.stopPropagation();}
+const activeRow=document.querySelector('.file-table tr.active-row');let activeFileName=null;if(activeRow){const fileLink=activeRow.querySelector('.filename-link');if(fileLink){activeFileName=fileLink.textContent;}
+}
+selectedTags.add(tag);renderSelectedTags();processData();if(activeFileName){setTimeout(()=>{const rows=document.querySelectorAll('.file-table tbody tr');for(let row of rows){const fileLink=row.querySelector('.filename-link');if(fileLink&&fileLink.textContent===activeFileName){row.classList.add('active-row');const tagButton=row.querySelector('.tags-button');if(tagButton){tagButton.classList.add('active');const fileColor=tagButton.getAttribute('data-color');if(fileColor){tagButton.style.backgroundColor=fileColor;tagButton.style.borderColor=fileColor;const icon=tagButton.querySelector('i');if(icon){icon.style.color='white';}
+}
+}
+break;}
+}
+},0);}
+}
+function isLightColor(color){const hex=color.replace('#','');const r=parseInt(hex.substr(0,2),16);const g=parseInt(hex.substr(2,2),16);const b=parseInt(hex.substr(4,2),16);const luminance=(0.299*r+0.587*g+0.114*b) / 255;return luminance>0.5;}
+function generateCitation(file){const year=file.date||'n.d.';const authors=file.people_mentioned&&file.people_mentioned.trim()
+?file.people_mentioned.split(',')[0].trim()+'. '
+:'FDA. ';const documentType=file.document_type?` [${file.document_type}]`:'';let moduleSection='';if(file.module){const moduleNumber=file.module.replace(/^M/,'');moduleSection=`, Module ${moduleNumber}`;}
+return`${authors}(${year}). ${file.title}${documentType}. `+
+`${navigatorConfig.citationSource}${moduleSection}. `+
+`FOIA Release: ${file.folder}. `+
+`Retrieved from ${file.google_drive_link}`;}
+function showCitationPopup(event,fileIndex){event.stopPropagation();const button=event.currentTarget;const row=button.closest('tr');const file=sortedFileData[fileIndex];const citation=generateCitation(file);const isAlreadyActive=button.classList.contains('active');closeTagPopup();const existingPopup=document.querySelector('.citation-popup');if(existingPopup){existingPopup.remove();}
+document.querySelectorAll('.cite-button.active').forEach(btn=>{btn.classList.remove('active');btn.style.backgroundColor='';btn.style.borderColor='';btn.style.color='';});document.querySelectorAll('.file-table tr.active-row').forEach(tr=>{tr.classList.remove('active-row');});if(isAlreadyActive){return;}
+button.classList.add('active');const fileColor=button.getAttribute('data-color');if(fileColor){button.style.backgroundColor=fileColor;button.style.borderColor=fileColor;button.style.color=isLightColor(fileColor)?'#000':'#fff';}
+row.classList.add('active-row');const popup=document.createElement('div');popup.className='citation-popup active';const isMobile=window.innerWidth<=768;const rect=button.getBoundingClientRect();if(isMobile){popup.style.position='fixed';popup.style.left='50%';popup.style.transform='translateX(-50%)';popup.style.top='60px';popup.style.width='90%';popup.style.maxWidth='500px';popup.style.maxHeight='calc(100vh - 80px)';popup.style.overflowY='auto';}else{const popupWidth=520;const popupHeight=300;const popupLeft=rect.left-popupWidth-10;popup.style.left=Math.max(10,popupLeft)+'px';let popupTop=rect.top-100;if(popupTop+popupHeight>window.innerHeight-20){popupTop=window.innerHeight-popupHeight-20;}
+popupTop=Math.max(10,popupTop);popup.style.top=popupTop+'px';}
+popup.innerHTML=`
+                <div class="citation-popup-header">
+                    <strong>Citation</strong>
+                    <button class="citation-popup-close" onclick="closeCitationPopup()">&times;</button>
+                </div>
+                <div class="citation-text">${citation}</div>
+                <button class="citation-copy-button" onclick="event.stopPropagation(); copyCitation('${citation.replace(/'/g,"\\'")}')">
+                    Copy Citation
+                </button>
+            `;document.body.appendChild(popup);let isDragging=false;let currentX;let currentY;let initialX;let initialY;let xOffset=0;let yOffset=0;const header=popup.querySelector('.citation-popup-header');header.addEventListener('mousedown',dragStart);document.addEventListener('mousemove',drag);document.addEventListener('mouseup',dragEnd);header.addEventListener('touchstart',dragStart,{passive:false});document.addEventListener('touchmove',drag,{passive:false});document.addEventListener('touchend',dragEnd);function dragStart(e){if(e.target.classList.contains('citation-popup-close'))return;const clientX=e.type.includes('touch')?e.touches[0].clientX:e.clientX;const clientY=e.type.includes('touch')?e.touches[0].clientY:e.clientY;initialX=clientX-xOffset;initialY=clientY-yOffset;if(e.target===header||header.contains(e.target)){isDragging=true;if(isMobile){popup.style.transform='none';}
+}
+}
+function drag(e){if(!isDragging)return;e.preventDefault();const clientX=e.type.includes('touch')?e.touches[0].clientX:e.clientX;const clientY=e.type.includes('touch')?e.touches[0].clientY:e.clientY;currentX=clientX-initialX;currentY=clientY-initialY;xOffset=currentX;yOffset=currentY;popup.style.transform=`translate(${currentX}px, ${currentY}px)`;}
+function dragEnd(e){initialX=currentX;initialY=currentY;isDragging=false;}
+document.addEventListener('click',function closeOnClickOutside(e){if(!popup.contains(e.target)&&e.target!==button){closeCitationPopup();document.removeEventListener('click',closeOnClickOutside);}
+});}
+function closeCitationPopup(){const popup=document.querySelector('.citation-popup');if(popup){popup.remove();}
+document.querySelectorAll('.cite-button.active').forEach(btn=>{btn.classList.remove('active');btn.style.backgroundColor='';btn.style.borderColor='';btn.style.color='';});document.querySelectorAll('.file-table tr.active-row').forEach(tr=>{tr.classList.remove('active-row');});}
+function copyCitation(citation){const textarea=document.createElement('textarea');textarea.innerHTML=citation;const decodedCitation=textarea.value;navigator.clipboard.writeText(decodedCitation).then(()=>{const button=document.querySelector('.citation-copy-button');const originalText=button.textContent;button.textContent='Copied!';button.classList.add('copied');setTimeout(()=>{button.textContent=originalText;button.classList.remove('copied');},2000);}).catch(err=>{console.error('Failed to copy citation:',err);const textArea=document.createElement('textarea');textArea.value=decodedCitation;textArea.style.position='fixed';textArea.style.left='-999999px';document.body.appendChild(textArea);textArea.focus();textArea.select();try{document.execCommand('copy');const button=document.querySelector('.citation-copy-button');button.textContent='Copied!';button.classList.add('copied');setTimeout(()=>{button.textContent='Copy Citation';button.classList.remove('copied');},2000);}catch(err2){prompt('Copy this citation:',decodedCitation);}
+document.body.removeChild(textArea);});}
+document.addEventListener('DOMContentLoaded',function(){const dropdown=document.querySelector('.nav-menu .dropdown');if(!dropdown)return;const dropdownToggle=dropdown.querySelector('.dropdown-toggle');let isClickOpen=false;let hoverTimeout;dropdownToggle.addEventListener('click',function(e){e.preventDefault();isClickOpen=!isClickOpen;if(isClickOpen){dropdown.classList.add('active');}else{dropdown.classList.remove('active');}
+});dropdown.addEventListener('mouseenter',function(){clearTimeout(hoverTimeout);dropdown.classList.add('active');});dropdown.addEventListener('mouseleave',function(){if(!isClickOpen){hoverTimeout=setTimeout(function(){dropdown.classList.remove('active');},300);}
+});document.addEventListener('click',function(e){if(!dropdown.contains(e.target)){isClickOpen=false;dropdown.classList.remove('active');}
+});dropdown.addEventListener('focusin',function(){dropdown.classList.add('active');});dropdown.addEventListener('focusout',function(e){setTimeout(function(){if(!dropdown.contains(document.activeElement)){isClickOpen=false;dropdown.classList.remove('active');}
+},100);});});
\ No newline at end of file